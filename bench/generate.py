@@ -0,0 +1,140 @@
+"""Synthetic Lyrix and Ostel log trees for benchmarks
+
+Logs are written in cp866 like real Russian logs. Every Lyrix service gets
+current log and rotated logs service.1.log, service.2.log ..., only some
+services write PID to the current log, others have it in rotated logs only
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+import random
+import os
+
+
+# Subdirectories of bench root, checker gets them by MONITOR_LYRIX_LOGS_PATH and MONITOR_OSTEL_LOGS_PATH
+LYRIX_DIRECTORY = 'LyrixLogs'
+OSTEL_DIRECTORY = 'OstelLogs'
+
+MESSAGES = (
+    'Соединение с базой данных установлено',
+    'Получен запрос от клиента',
+    'Обработка очереди завершена',
+    'Превышено время ожидания ответа',
+    'Сеанс пользователя закрыт',
+    'ERROR Не удалось открыть файл конфигурации',
+)
+LEVELS = ('INFO', 'INFO', 'INFO', 'DEBUG', 'WARN', 'ERROR')
+CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def log_lines(start: datetime, count: int, rng: random.Random) -> bytes:
+    """count log lines from start time, every line is one second later"""
+
+    lines = []
+    for number in range(count):
+        time = start + timedelta(seconds=number)
+        lines.append(f"{time:%Y-%m-%d %H:%M:%S}.{rng.randrange(1000):03d} "
+                     f"[{rng.choice(LEVELS)}] {rng.choice(MESSAGES)}\n")
+
+    return ''.join(lines).encode('cp866')
+
+
+def write_log(path: Path, size: int, end: datetime, rng: random.Random,
+              pid: int | None = None, start_pid: int | None = None) -> int:
+    """Write log of about size bytes which last line is at end time
+
+    Body is one chunk repeated - big logs are written at disk speed. PID is
+    written on the first line if start_pid is set and on the last line if pid is set
+    """
+
+    head = b''
+    if start_pid is not None:
+        head = f"{end - timedelta(days=1):%Y-%m-%d %H:%M:%S}.000 [INFO] PID {start_pid}\n".encode('cp866')
+
+    tail = log_lines(end - timedelta(seconds=99), 100, rng)
+    if pid is not None:
+        tail += f"{end:%Y-%m-%d %H:%M:%S}.000 [INFO] Служба запущена, PID {pid}\n".encode('cp866')
+
+    remaining = max(0, size - len(head) - len(tail))
+    chunk = log_lines(end - timedelta(days=1), min(CHUNK_SIZE, remaining) // 80 + 1, rng)
+
+    with open(path, 'wb') as file:
+        file.write(head)
+
+        while remaining > 0:  # Whole lines only
+            part = chunk if remaining >= len(chunk) else chunk[:chunk.rfind(b'\n', 0, remaining) + 1]
+            if not part:
+                break
+            file.write(part)
+            remaining -= len(part)
+
+        file.write(tail)
+
+    # Checker orders logs by modification time
+    os.utime(path, (end.timestamp(), end.timestamp()))
+
+    return path.stat().st_size
+
+
+def generate_tree(root: Path, services: int = 50, log_size: int = 1024 * 1024, rotated: int = 3,
+                  ostel_services: int = 10, pid_ratio: float = 0.8, seed: int = 1) -> dict[str, int]:
+    """Create Lyrix and Ostel logs in LYRIX_DIRECTORY and OSTEL_DIRECTORY of root
+
+    pid_ratio of services have PID in current log, others only in the oldest
+    rotated log - checker has to read all their logs
+    """
+
+    rng = random.Random(seed)
+    lyrix_directory = root / LYRIX_DIRECTORY
+    ostel_directory = root / OSTEL_DIRECTORY
+    lyrix_directory.mkdir(parents=True, exist_ok=True)
+    ostel_directory.mkdir(parents=True, exist_ok=True)
+
+    now = datetime.now().replace(microsecond=0)
+    written = {'lyrix_files': 0, 'ostel_files': 0, 'bytes': 0}
+
+    for number in range(services):
+        service = f"Service{number:04d}"
+        pid = 10000 + number
+        has_pid = rng.random() < pid_ratio
+
+        current = lyrix_directory / f"{service}.log"
+        written['bytes'] += write_log(current, log_size, now, rng, pid if has_pid else None)
+        written['lyrix_files'] += 1
+
+        for rotation in range(1, rotated + 1):
+            rotated_log = lyrix_directory / f"{service}.{rotation}.log"
+            start_pid = pid if rotation == rotated and not has_pid else None
+            written['bytes'] += write_log(rotated_log, log_size, now - timedelta(days=rotation), rng,
+                                          start_pid=start_pid)
+            written['lyrix_files'] += 1
+
+    # Files which checker has to skip
+    for ignored in ('kernelDiag', 'default', 'console'):
+        (lyrix_directory / f"{ignored}.log").write_bytes(log_lines(now, 10, rng))
+
+    # Ostel services - some are fresh, some are late
+    for number in range(ostel_services):
+        end = now - timedelta(minutes=rng.choice((0, 1, 45, 180)))
+        written['bytes'] += write_log(ostel_directory / f"ostel{number:03d}.log", log_size, end, rng)
+        written['ostel_files'] += 1
+
+    return written
+
+
+def append_logs(root: Path, lines: int = 100, seed: int = 2) -> int:
+    """Append new lines to current Lyrix and Ostel logs like working services do"""
+
+    rng = random.Random(seed)
+    now = datetime.now().replace(microsecond=0)
+    appended = 0
+
+    for directory in (root / LYRIX_DIRECTORY, root / OSTEL_DIRECTORY):
+        for log_path in directory.glob('*.log'):
+            if log_path.stem.count('.') == 0:  # Current log, not rotated
+                data = log_lines(now - timedelta(seconds=lines), lines, rng)
+                with open(log_path, 'ab') as file:
+                    file.write(data)
+                appended += len(data)
+
+    return appended
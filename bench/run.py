@@ -0,0 +1,327 @@
+"""Benchmarks of services, servers and api checkers
+
+    python bench/run.py                         all scenarios, compare with baselines
+    python bench/run.py services --log-size 1024
+    python bench/run.py api --apis 500 --save   save results as new baseline
+
+Every scenario runs in its own interpreter in a temporary work directory,
+checkers are pointed at its logs, servers.txt and api.txt by MONITOR_* variables,
+so real paths are never touched and peak memory belongs to the checker only. Baselines are kept in bench/baselines.json with scenario parameters,
+results are compared only with baseline of the same parameters
+"""
+
+from pathlib import Path
+from time import perf_counter
+import subprocess
+import tempfile
+import argparse
+import shutil
+import json
+import math
+import sys
+import os
+
+BENCH_DIRECTORY = Path(__file__).resolve().parent
+ROOT_DIRECTORY = BENCH_DIRECTORY.parent
+BASELINES_PATH = BENCH_DIRECTORY / 'baselines.json'
+
+sys.path.insert(0, str(BENCH_DIRECTORY))
+
+from generate import generate_tree, append_logs, LYRIX_DIRECTORY, OSTEL_DIRECTORY  # noqa: E402
+from stubs import StubHTTPServer, probe_targets  # noqa: E402
+
+
+SERVERS_FILE = 'servers.txt'
+API_FILE = 'api.txt'
+
+# Differences smaller than these are noise, not regressions
+NOISE_FLOORS = {'sec': 0.005, 'ms': 1.0, 'mb': 2.0, 'bytes': 64 * 1024}
+
+
+def percentile(values: list[float], percent: float) -> float | None:
+    """Nearest rank percentile"""
+
+    if not values:
+        return None
+
+    values = sorted(values)
+    return values[max(1, math.ceil(percent / 100 * len(values))) - 1]
+
+
+def read_bytes() -> int | None:
+    """Bytes read by this process with read system calls, Linux only"""
+
+    try:
+        with open('/proc/self/io', 'r', encoding='utf-8') as io_file:
+            for line in io_file:
+                if line.startswith('rchar:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+
+def peak_memory() -> float | None:
+    """Peak resident memory of this process in MiB"""
+
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+
+    # Linux reports KiB, macOS reports bytes
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def measure(cycle, cycles: int, between=None) -> dict:
+    """Run cycle n times, first cycle is cold and is reported separately"""
+
+    cycle_times = []
+    bytes_before = read_bytes()
+
+    for number in range(cycles):
+        if number and between is not None:
+            between()
+
+        started = perf_counter()
+        cycle()
+        cycle_times.append(perf_counter() - started)
+
+    bytes_after = read_bytes()
+
+    return {
+        'cycle_first_sec': cycle_times[0],
+        'cycle_p50_sec': percentile(cycle_times[1:] or cycle_times, 50),
+        'cycle_max_sec': max(cycle_times[1:] or cycle_times),
+        'read_bytes': None if bytes_before is None else bytes_after - bytes_before,
+    }
+
+
+def target_percentiles(latencies: list[float]) -> dict:
+    return {f'target_p{percent}_ms': percentile(latencies, percent) for percent in (50, 95, 99)}
+
+
+# Workers - run in a fresh interpreter with work directory as current directory
+
+def services_worker(options: dict) -> dict:
+    sys.path.insert(0, str(ROOT_DIRECTORY / 'client'))
+    from servicesChecker import ServicesChecker
+
+    services_checker = ServicesChecker(scan_workers=options['scan_workers'], scan_processes=options['scan_processes'])
+
+    checker_times = {'lyrix': [], 'ostel': []}
+
+    def cycle() -> None:
+        for name, check in (('lyrix', services_checker.get_lyrixServices_status),
+                            ('ostel', services_checker.get_ostelServices_status)):
+            started = perf_counter()
+            check()
+            checker_times[name].append((perf_counter() - started) * 1000)
+
+    result = measure(cycle, options['cycles'], lambda: append_logs(Path.cwd(), options['append']))
+    result['lyrix_p50_ms'] = percentile(checker_times['lyrix'][1:] or checker_times['lyrix'], 50)
+    result['ostel_p50_ms'] = percentile(checker_times['ostel'][1:] or checker_times['ostel'], 50)
+    result['targets'] = len(services_checker.lyrix_services)
+
+    return result
+
+
+def servers_worker(options: dict) -> dict:
+    sys.path.insert(0, str(ROOT_DIRECTORY / 'server'))
+    from servers_check.checker import servers_checker
+    from servers_check.probe import Prober
+
+    servers_checker.prober = Prober(options['count'], options['timeout'])
+
+    result = measure(servers_checker.ping, options['cycles'])
+    result.update(target_percentiles([probe_result.rtt_avg for probe_result in servers_checker.probe_stats.values()
+                                      if probe_result.rtt_avg is not None]))
+    result['targets'] = len(servers_checker.servers)
+    result['probe_method'] = servers_checker.prober.method
+
+    return result
+
+
+def api_worker(options: dict) -> dict:
+    sys.path.insert(0, str(ROOT_DIRECTORY / 'server'))
+    from api_check.checker import api_checker
+
+    latencies = []
+
+    def cycle() -> None:
+        api_checker.http_request()
+        latencies.extend(response_time * 1000 for response_time in api_checker.response_times.values())
+
+    result = measure(cycle, options['cycles'])
+    result.update(target_percentiles(latencies))
+    result['targets'] = len(api_checker.apis)
+    api_checker.engine.close()
+
+    return result
+
+
+# Scenarios - prepare work directory, run worker and clean up
+
+def prepare_services(work: Path, options: dict) -> None:
+    generate_tree(work, options['services'], options['log_size'] * 1024 * 1024, options['rotated'],
+                  options['ostel'], seed=options['seed'])
+
+
+def prepare_servers(work: Path, options: dict) -> None:
+    servers = probe_targets(options['servers'], options['down_ratio'], options['seed'])
+    with open(work / SERVERS_FILE, 'w', encoding='utf-8') as file:
+        file.writelines(f"{server}:bench server {number}\n" for number, server in enumerate(servers))
+
+
+def prepare_api(work: Path, options: dict) -> StubHTTPServer:
+    stub = StubHTTPServer(options['latency'] / 1000, options['latency'] / 2000,
+                          options['error_rate'], seed=options['seed'])
+    with open(work / API_FILE, 'w', encoding='utf-8') as file:
+        file.writelines(f"{stub.url(number)} bench api {number}\n" for number in range(options['apis']))
+    stub.start()
+
+    return stub
+
+
+SCENARIOS = {
+    'services': (prepare_services, services_worker,
+                 ('services', 'log_size', 'rotated', 'ostel', 'append', 'scan_workers', 'scan_processes',
+                  'cycles', 'seed')),
+    'servers': (prepare_servers, servers_worker,
+                ('servers', 'down_ratio', 'count', 'timeout', 'cycles', 'seed')),
+    'api': (prepare_api, api_worker,
+            ('apis', 'latency', 'error_rate', 'cycles', 'seed')),
+}
+
+
+def work_environment(work: Path) -> dict[str, str]:
+    """Environment of worker - checkers read only files of work directory"""
+
+    return os.environ | {
+        'MONITOR_LYRIX_LOGS_PATH': str(work / LYRIX_DIRECTORY),
+        'MONITOR_OSTEL_LOGS_PATH': str(work / OSTEL_DIRECTORY),
+        'MONITOR_SERVERS_PATH': str(work / SERVERS_FILE),
+        'MONITOR_API_PATH': str(work / API_FILE),
+    }
+
+
+def run_scenario(name: str, options: dict, keep: bool = False) -> dict:
+    prepare, _, parameters = SCENARIOS[name]
+    options = {parameter: options[parameter] for parameter in parameters}
+    work = Path(tempfile.mkdtemp(prefix=f'bench_{name}_'))
+
+    stub = prepare(work, options)
+
+    try:
+        worker = subprocess.run([sys.executable, __file__, '--worker', name, json.dumps(options)],
+                                cwd=work, env=work_environment(work), capture_output=True, text=True)
+    finally:
+        if stub is not None:
+            stub.stop()
+        if not keep:
+            shutil.rmtree(work, ignore_errors=True)
+
+    if worker.returncode != 0:
+        raise RuntimeError(f"{name} benchmark failed:\n{worker.stderr}")
+
+    return {'parameters': options, 'results': json.loads(worker.stdout.splitlines()[-1])}
+
+
+def compare(result: dict, baseline: dict | None, tolerance: float) -> dict[str, str]:
+    """Mark metrics which are worse than baseline by more than tolerance"""
+
+    marks = dict()
+    if baseline is None or baseline['parameters'] != result['parameters']:
+        return marks
+
+    for metric, value in result['results'].items():
+        base = baseline['results'].get(metric)
+        if not isinstance(value, (int, float)) or not isinstance(base, (int, float)) or metric == 'targets':
+            continue
+
+        floor = NOISE_FLOORS[metric.rsplit('_', 1)[-1]] if metric.rsplit('_', 1)[-1] in NOISE_FLOORS else 0
+        change = (value - base) / base * 100 if base else 0.0
+
+        if value > base * (1 + tolerance) and value - base > floor:
+            marks[metric] = f"REGRESSION +{change:0.0f}%"
+        else:
+            marks[metric] = f"{change:+0.0f}%"
+
+    return marks
+
+
+def show(name: str, result: dict, baseline: dict | None, marks: dict[str, str]) -> None:
+    print(f"\n{name} {' '.join(f'{key}={value}' for key, value in result['parameters'].items())}")
+
+    if baseline is None:
+        print("There is no baseline for this scenario")
+    elif baseline['parameters'] != result['parameters']:
+        print("Baseline has other parameters, results are not compared")
+
+    for metric, value in result['results'].items():
+        if isinstance(value, float):
+            value = f"{value:0.4f}"
+        print(f"{metric.ljust(25)}{str(value).ljust(20)}{marks.get(metric, '')}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks of services, servers and api checkers")
+    parser.add_argument('scenarios', nargs='*', default=list(SCENARIOS),
+                        help=f"scenarios to run: {', '.join(SCENARIOS)}, all by default")
+    parser.add_argument('--cycles', type=int, default=5, help="checks in every scenario, first one is cold")
+    parser.add_argument('--seed', type=int, default=1)
+
+    parser.add_argument('--services', type=int, default=50, help="Lyrix services count")
+    parser.add_argument('--log-size', type=int, default=8, help="size of every log in MiB")
+    parser.add_argument('--rotated', type=int, default=3, help="rotated logs of every service")
+    parser.add_argument('--ostel', type=int, default=10, help="Ostel services count")
+    parser.add_argument('--append', type=int, default=100, help="lines appended to logs between checks")
+    parser.add_argument('--scan-workers', type=int, default=4, help="threads which scan services logs")
+    parser.add_argument('--scan-processes', type=int, default=0, help="processes for big logs parsing")
+
+    parser.add_argument('--servers', type=int, default=200)
+    parser.add_argument('--down-ratio', type=float, default=0.1, help="part of servers which never answer")
+    parser.add_argument('--count', type=int, default=4, help="probes for every server")
+    parser.add_argument('--timeout', type=float, default=1.0, help="probe reply timeout in seconds")
+
+    parser.add_argument('--apis', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=20, help="stub api latency in ms")
+    parser.add_argument('--error-rate', type=float, default=0.05, help="part of api requests answered with 500")
+
+    parser.add_argument('--save', action='store_true', help="save results as new baselines")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed slowdown, 0.2 is 20%%")
+    parser.add_argument('--keep', action='store_true', help="keep work directories")
+    arguments = parser.parse_args()
+
+    for name in arguments.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"There is no scenario {name}, choose from {', '.join(SCENARIOS)}")
+
+    baselines = json.loads(BASELINES_PATH.read_text(encoding='utf-8')) if BASELINES_PATH.exists() else dict()
+    regressions = 0
+
+    for name in dict.fromkeys(arguments.scenarios):
+        result = run_scenario(name, vars(arguments), arguments.keep)
+        marks = compare(result, baselines.get(name), arguments.tolerance)
+        regressions += sum(mark.startswith('REGRESSION') for mark in marks.values())
+        show(name, result, baselines.get(name), marks)
+
+        if arguments.save:
+            baselines[name] = result
+
+    if arguments.save:
+        BASELINES_PATH.write_text(json.dumps(baselines, indent=4), encoding='utf-8')
+        print(f"\nBaselines are saved to {BASELINES_PATH}")
+
+    if regressions:
+        print(f"\n{regressions} metrics are worse than baseline by more than {arguments.tolerance:0.0%}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4 and sys.argv[1] == '--worker':
+        worker_result = SCENARIOS[sys.argv[2]][1](json.loads(sys.argv[3]))
+        worker_result['peak_rss_mb'] = peak_memory()
+        print(json.dumps(worker_result))
+    else:
+        sys.exit(main())
@@ -0,0 +1,102 @@
+"""Local stand-ins for monitored network targets
+
+StubHTTPServer answers api checks with configurable latency and error rate.
+probe_targets makes servers inventory from loopback addresses which always
+answer and TEST-NET addresses which never answer
+"""
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Thread
+from ipaddress import ip_address, ip_network
+from time import sleep
+import random
+
+
+# Reserved for documentation, never routed
+TEST_NETWORKS = (ip_network('192.0.2.0/24'), ip_network('198.51.100.0/24'), ip_network('203.0.113.0/24'))
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # Default 5 drops connects of parallel checks and adds SYN retries
+
+
+class StubHTTPServer:
+    """HTTP server on 127.0.0.1 with random latency, errors and hung requests"""
+
+    def __init__(self, latency: float = 0.02, jitter: float = 0.01, error_rate: float = 0.05,
+                 slow_rate: float = 0.0, slow_latency: float = 15, seed: int = 1) -> None:
+        self.latency = latency  # Seconds
+        self.jitter = jitter
+        self.error_rate = error_rate  # Part of requests answered with 500
+        self.slow_rate = slow_rate  # Part of requests answered after slow_latency seconds
+        self.slow_latency = slow_latency
+        self.requests = 0
+
+        rng = random.Random(seed)
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive like real api
+
+            def do_GET(self) -> None:
+                stub.requests += 1
+                draw = rng.random()
+
+                if draw < stub.slow_rate:
+                    sleep(stub.slow_latency)
+                else:
+                    sleep(max(0.0, stub.latency + rng.uniform(-stub.jitter, stub.jitter)))
+
+                status = 500 if draw > 1 - stub.error_rate else 200
+                body = b'{"status": "ok"}' if status == 200 else b'{"status": "error"}'
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_HEAD = do_GET
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self.__server = StubServer(('127.0.0.1', 0), Handler)
+        self.__thread = Thread(target=self.__server.serve_forever, name='http_stub', daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.__server.server_address[1]
+
+    def url(self, number: int) -> str:
+        return f"http://127.0.0.1:{self.port}/api/{number}"
+
+    def start(self) -> None:
+        self.__thread.start()
+
+    def stop(self) -> None:
+        self.__server.shutdown()
+        self.__server.server_close()
+
+
+def probe_targets(count: int, down_ratio: float = 0.1, seed: int = 1) -> list[str]:
+    """Servers inventory - loopback addresses are up, TEST-NET addresses are down
+
+    All 127.0.0.0/8 answers on Linux. TEST-NET networks are never routed, so
+    their probes wait until timeout like a dead server
+    """
+
+    rng = random.Random(seed)
+    targets = []
+    down = 0
+
+    for number in range(count):
+        if rng.random() < down_ratio:  # 762 different down addresses, then they repeat
+            network = TEST_NETWORKS[down % len(TEST_NETWORKS)]
+            targets.append(str(network[down // len(TEST_NETWORKS) % 254 + 1]))
+            down += 1
+        else:
+            targets.append(str(ip_address('127.0.0.1') + number))
+
+    return targets
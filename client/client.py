@@ -1,23 +1,44 @@
-from concurrent.futures import ThreadPoolExecutor
-from threading import Thread
-from json import dumps
-from time import sleep
+from concurrent.futures import Future
+from threading import Thread, Event, Lock
+from time import monotonic
+import random
 import socket
 
 from servicesChecker import services_checker
+from executor import CheckerExecutor
+import protocol
 
 
 class Client:
+    HEARTBEAT_INTERVAL = 5  # Seconds between heartbeats to the server
+    HEARTBEAT_MISSES = 3  # Server is lost after so many missed heartbeats
+    RECONNECT_MIN = 1  # Seconds, the first reconnect delay limit, it is doubled by every failed attempt
+    RECONNECT_MAX = 60
+
     def __init__(self) -> None:
         self.__client_hostName = socket.gethostname()
         self.__server_hostName = None
         self.__server_portNumber = None
         self.__client_status = False
+        self.__send_lock = Lock()  # Push thread and requests thread share one socket
+
+        # Push mode - send changed statuses every push_interval seconds without requests
+        self.__push_interval = None
+        self.__push_stop = Event()
+        self.__push_seq = 0
+        self.__acked_push = 0, dict()  # Last applied by server sequence and statuses
+        self.__unacked_push = None  # Sent sequence, statuses and send time
+
+        self.__heartbeat_stop = Event()
+        self.__stop_event = Event()  # Set on stop - reconnect delay ends
 
-    def start(self, server_hostName: str, server_portNumber: int) -> None:
+    def start(self, server_hostName: str, server_portNumber: int, push_interval: float | None = None) -> None:
         self.__server_hostName = server_hostName
         self.__server_portNumber = server_portNumber
+        self.__push_interval = push_interval
         self.__client_status = True
+        self.__stop_event.clear()
+        attempt = 0  # Failed connections in a row
 
         while self.__client_status is True:
             try:  # Try to connect the server until it response
@@ -27,25 +48,62 @@ class Client:
                     (self.__server_hostName, self.__server_portNumber))
 
                 #  Send first message to the server - client host name
-                self.client_socket.send(self.__client_hostName.encode('utf-8'))
+                self.client_socket.sendall(protocol.encode_frame(
+                    protocol.HELLO, 0, self.__client_hostName))
                 self.__client_status = True
 
                 print(
                     f"\nClient is running, connected to {server_hostName}:{server_portNumber}\n")
+                connected_at = monotonic()
+
+                # Server finds dead agent by missed heartbeats, not by TCP timeouts
+                self.__heartbeat_stop.clear()
+                Thread(target=self.__send_heartbeats, daemon=True).start()
+
+                # Server has no statuses of this connection yet - start push from full statuses
+                if self.__push_interval is not None:
+                    self.__acked_push, self.__unacked_push = (0, dict()), None
+                    self.__push_stop.clear()
+                    Thread(target=self.__push_statuses, daemon=True).start()
+
+                try:
+                    self.__recieve_messages_fromServer()
+                finally:
+                    self.__push_stop.set()
+                    self.__heartbeat_stop.set()
 
-                self.__recieve_messages_fromServer()
+                # Connection worked for a while - server is fine, reconnect soon
+                if monotonic() - connected_at >= self.HEARTBEAT_INTERVAL * self.HEARTBEAT_MISSES:
+                    attempt = 0
+                delay = self.__get_reconnectDelay(attempt)
+                if self.__client_status is True:
+                    print(f"\nClient will try reconnect after {delay:0.1f} seconds\n")
 
-            # Rise this if the server is not working at the moment. Try againg after 60 seconds
+            # Rise this if the server is not working at the moment. Try again after delay
             except ConnectionRefusedError:
+                delay = self.__get_reconnectDelay(attempt)
                 print(
-                    f"\nServer on {server_hostName}:{server_portNumber} is not working at the moment. Client will try reconnect after 60 seconds\n")
-                sleep(60)
+                    f"\nServer on {server_hostName}:{server_portNumber} is not working at the moment. Client will try reconnect after {delay:0.1f} seconds\n")
 
             # No server on server_hostName:server_portNumber
             except TimeoutError:
+                delay = self.__get_reconnectDelay(attempt)
                 print(
-                    f"\nServer on {server_hostName}:{server_portNumber} does not exist in this network. Client will try reconnect after 60 seconds\n")
-                sleep(60)
+                    f"\nServer on {server_hostName}:{server_portNumber} does not exist in this network. Client will try reconnect after {delay:0.1f} seconds\n")
+
+            # Network is unreachable, host name is not resolved and other socket errors
+            except OSError as error:
+                delay = self.__get_reconnectDelay(attempt)
+                print(
+                    f"\nCan't connect to {server_hostName}:{server_portNumber} - {error}. Client will try reconnect after {delay:0.1f} seconds\n")
+
+            attempt += 1
+            self.__stop_event.wait(delay)
+
+    def __get_reconnectDelay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter - agents do not reconnect all at once after server restart"""
+
+        return random.uniform(0, min(self.RECONNECT_MAX, self.RECONNECT_MIN * 2 ** attempt))
 
     def stop(self) -> None:
         """Close connection by client"""
@@ -53,69 +111,200 @@ class Client:
         if self.__client_status is False:
             print("\nClient is not working at the moment\n")
         else:
-            self.client_socket.close()
             self.__client_status = False
+            self.__stop_event.set()
+            self.client_socket.close()
             print(
                 f"\nConnection to {self.__server_hostName}:{self.__server_portNumber} is closed by client\n")
 
-    def __send(self, message: str) -> None:
-        """Send messages to the server"""
+    def __send(self, message_type: int, request_id: int, body, binary: bool = False) -> None:
+        """Send framed messages to the server"""
 
         if self.__client_status is False:
             print("\nClient is not working at the moment\n")
         else:
             try:
-                self.client_socket.send(message.encode('utf-8'))
-            except BrokenPipeError:
+                frame = protocol.encode_frame(message_type, request_id, body, binary=binary)
+                with self.__send_lock:
+                    self.client_socket.sendall(frame)
+            except OSError:  # Broken pipe, reset connection or socket closed by receiver
                 print(
                     f"\nServer on {self.__server_hostName}:{self.__server_portNumber} is not working at the moment\n")
 
     def __recieve_messages_fromServer(self) -> None:
+        decoder = protocol.FrameDecoder()  # Frames can be split or merged by TCP
+
         try:
 
             while self.__client_status is True:
-                message: str = self.client_socket.recv(1024).decode('utf-8')
-                if message == 'services_statuses':
-                    services_statuses = model.get_servicesStatuses()
-                    self.__send(dumps(services_statuses))
+                data = self.client_socket.recv(65536)
+                if not data:  # Server closed connection
+                    raise ConnectionResetError
+
+                for frame in decoder.feed(data):
+                    if frame.type == protocol.HEARTBEAT:
+                        # Server is lost if it is silent for missed heartbeats
+                        self.client_socket.settimeout(frame.body * self.HEARTBEAT_MISSES)
+                        continue
+                    if frame.type == protocol.ACK:
+                        self.__acknowledge_push(frame)
+                        continue
+                    if frame.type != protocol.REQUEST:
+                        continue
 
-        # Connection closed by server
-        except ConnectionResetError:
+                    # Answer in encoding of request - JSON or compact binary
+                    binary = bool(frame.flags & protocol.BINARY)
+
+                    if frame.body == 'services_statuses':
+                        try:
+                            services_statuses = model.get_servicesStatuses()
+                        except (OSError, ValueError, RuntimeError) as error:
+                            self.__send(protocol.ERROR, frame.request_id, str(error), binary)
+                        else:
+                            self.__send(protocol.RESPONSE, frame.request_id, services_statuses, binary)
+                    else:
+                        self.__send(protocol.ERROR, frame.request_id,
+                                    f"Unknown command {frame.body}", binary)
+
+        # Connection closed by server or server sent broken frame - client connects again
+        except (ConnectionResetError, protocol.ProtocolError):
             self.client_socket.close()
-            self.__client_status = False
             print(
                 f"\nConnection to {self.__server_hostName}:{self.__server_portNumber} is closed by server\n")
 
-        # Connection closed by client
-        except ConnectionAbortedError:
-            pass
+        # Server sent no heartbeats - it hangs or network is broken
+        except TimeoutError:
+            self.client_socket.close()
+            print(
+                f"\nServer on {self.__server_hostName}:{self.__server_portNumber} sent no heartbeats, connection is closed\n")
+
+        # Connection closed by client or other socket error
+        except OSError:
+            if self.__client_status is True:  # Client connects again
+                self.client_socket.close()
+
+    def __send_heartbeats(self) -> None:
+        """Tell the server that agent is alive, body is seconds to the next heartbeat"""
+
+        while self.__client_status is True:
+            self.__send(protocol.HEARTBEAT, 0, self.HEARTBEAT_INTERVAL)
+
+            if self.__heartbeat_stop.wait(self.HEARTBEAT_INTERVAL):
+                break
+
+    def __push_statuses(self) -> None:
+        """Send only statuses changed since the last statuses applied by server"""
+
+        while self.__client_status is True:
+            # Push is not acknowledged until next push - server lost it, send full statuses
+            if self.__unacked_push is not None and monotonic() - self.__unacked_push[2] >= self.__push_interval:
+                self.__acked_push = 0, dict()
+
+            try:
+                lyrixServices_status, ostelServices_status = model.get_servicesStatuses()
+            except (OSError, ValueError, RuntimeError):
+                lyrixServices_status = None
+
+            if lyrixServices_status is not None:
+                statuses = {'lyrix': lyrixServices_status, 'ostel': ostelServices_status}
+                base_seq, base_statuses = self.__acked_push
+                self.__push_seq = self.__push_seq % 0xFFFFFFFF + 1
+                self.__unacked_push = self.__push_seq, statuses, monotonic()
+
+                # Empty delta is still sent - server knows that agent is alive and statuses are fresh
+                self.__send(protocol.PUSH, self.__push_seq, {
+                    'base': base_seq,
+                    'full': base_seq == 0,
+                    'interval': self.__push_interval,
+                    'delta': protocol.diff_statuses(base_statuses, statuses),
+                })
+
+            if self.__push_stop.wait(self.__push_interval):
+                break
+
+    def __acknowledge_push(self, frame: protocol.Frame) -> None:
+        """Server applied push or asks for full statuses"""
+
+        if frame.body == protocol.RESYNC:
+            self.__acked_push, self.__unacked_push = (0, dict()), None
+        elif self.__unacked_push is not None and self.__unacked_push[0] == frame.request_id:
+            self.__acked_push = self.__unacked_push[:2]
+            self.__unacked_push = None
 
 
 class Model:
     """Class for getting data from checkers and return values"""
 
-    def __init__(self) -> None:
+    def __init__(self, max_workers: int = 2, deadline: float = 60, cache_ttl: float = 10) -> None:
         self.__client = Client()
 
-    def get_servicesStatuses(self) -> tuple[dict[str, tuple[str]], dict[str, tuple[str]] | str]:
-        """Get data services statuses from Lyrix and ostel checkers"""
+        # Statuses are reused for cache_ttl seconds, concurrent callers wait for one check
+        self.cache_ttl = cache_ttl
+        self.__cache = None  # Statuses and monotonic time of check start
+        self.__cache_lock = Lock()
+        self.__inFlight: Future | None = None
+
+        # Long-lived threads for services checkers, every checker has its own deadline
+        self.__executor = CheckerExecutor(max_workers, deadline)
+        self.__executor.register('lyrix', services_checker.get_lyrixServices_status)
+        self.__executor.register('ostel', services_checker.get_ostelServices_status)
+
+    def get_servicesStatuses(self, force: bool = False) -> tuple[dict[str, tuple[str]] | str, dict[str, tuple[str]] | str]:
+        """Get services statuses not older than cache_ttl seconds
+
+        force skips cached statuses, check in progress is joined - it is fresh anyway
+        """
+
+        with self.__cache_lock:
+            if not force and self.__cache is not None and monotonic() - self.__cache[1] < self.cache_ttl:
+                return self.__cache[0]
+
+            inFlight = self.__inFlight
+            is_checking = inFlight is None
+            if is_checking:  # This caller checks, others wait for its result
+                inFlight = self.__inFlight = Future()
+
+        if not is_checking:
+            return inFlight.result()  # Error of check is raised for every caller
+
+        started = monotonic()
+
+        try:
+            statuses = self.__check_servicesStatuses()
+        except BaseException as error:
+            inFlight.set_exception(error)
+            raise
+        else:
+            with self.__cache_lock:
+                self.__cache = statuses, started
+            inFlight.set_result(statuses)
+            return statuses
+        finally:
+            with self.__cache_lock:
+                self.__inFlight = None
+
+    def __check_servicesStatuses(self) -> tuple[dict[str, tuple[str]] | str, dict[str, tuple[str]] | str]:
+        """Get data services statuses from Lyrix and ostel checkers
+
+        Error of Lyrix checker is raised, error of ostel checker is returned as text
+        like missing ostel services
+        """
 
-        # Thread pool for parallel checkers execution
-        with ThreadPoolExecutor(2) as pool:
-            lyrixChecker_thread = pool.submit(
-                services_checker.get_lyrixServices_status)
-            ostelChecker_thread = pool.submit(
-                services_checker.get_ostelServices_status)
+        statuses = dict()
+        for name, result in self.__executor.run():
+            statuses[name] = result
 
-            # Get results from threads
-            lyrixServices_status = lyrixChecker_thread.result()
-            ostelServices_status = ostelChecker_thread.result()
+        if isinstance(statuses['lyrix'], Exception):
+            raise statuses['lyrix']
+        if isinstance(statuses['ostel'], Exception):
+            statuses['ostel'] = str(statuses['ostel'])
 
-        return lyrixServices_status, ostelServices_status
+        return statuses['lyrix'], statuses['ostel']
 
-    def start_client(self, server_hostName: str, server_portNumber: int) -> None:
+    def start_client(self, server_hostName: str, server_portNumber: int,
+                     push_interval: float | None = None) -> None:
         client_thread = Thread(target=self.__client.start, args=(
-            server_hostName, server_portNumber), daemon=True)
+            server_hostName, server_portNumber, push_interval), daemon=True)
         client_thread.start()
 
     def stop_client(self) -> None:
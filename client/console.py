@@ -1,5 +1,12 @@
+from time import perf_counter
+started = perf_counter()  # Startup time is measured from here to the first prompt
+
 from sys import argv
+import os
+
 from client import model
+from servicesChecker import services_checker
+from metrics import metrics
 
 
 class Console:
@@ -10,6 +17,10 @@ class Console:
             'exit': "Close console",
             'stop': "Stop client",
             'status': "Show current services status - for test",
+            'refresh': "Show services status checked now, without cached results",
+            'metrics': "Show the slowest log scans and bytes read",
+            'watch': "Keep services statuses up to date by logs changes, status does not scan logs",
+            'unwatch': "Stop logs watcher, every status scans logs",
         }
 
     def show_commands(self) -> None:
@@ -21,6 +32,67 @@ class Console:
 
         print('\n')
 
+    def show_statuses(self, services_statuses: tuple) -> None:
+        """Show Lyrix and ostel services statuses"""
+        print('\n')
+
+        for status in services_statuses:
+            if isinstance(status, str):  # Services does not exist or checker failed
+                print(status, '\n')
+                continue
+            for service_name, result in status.items():
+                print(service_name.ljust(50),
+                      result[0].ljust(40), f'last log was {result[1]}')
+            print('\n')
+
+    def check_statuses(self, force: bool = False) -> None:
+        """Check services statuses and show them, checker error is shown as failed row"""
+
+        try:
+            services_statuses = model.get_servicesStatuses(force)
+        except (OSError, ValueError, RuntimeError) as error:  # CheckerTimeout is OSError too
+            print('\n')
+            print('Lyrix services'.ljust(50), 'failed'.ljust(40), str(error))
+            print('\n')
+        else:
+            self.show_statuses(services_statuses)
+
+    def show_metrics(self) -> None:
+        """Show services which logs scan is the longest and bytes read by scans"""
+        print('\n')
+
+        for summary in metrics.summary():
+            print(f"{summary.labels.ljust(50)}{f'{summary.count} scans, avg {summary.avg:0.3f} sec'.ljust(40)}"
+                  f"total {summary.total:0.1f} sec")
+        print('\n')
+
+        for summary in metrics.summary('_bytes'):
+            print(f"{summary.labels.ljust(50)}{f'{summary.count} scans, avg {summary.avg:0.0f} bytes'.ljust(40)}"
+                  f"total {summary.total:0.0f} bytes")
+        print('\n')
+
+        for name, labels, value in metrics.values():
+            print(f"{f'{name} {labels}'.ljust(50)}{value:g}")
+        print('\n')
+
+    def watch_logs(self) -> None:
+        """Start logs watcher"""
+
+        if services_checker.is_watching:
+            print("\nLogs are already watched\n")
+        else:
+            services_checker.watch()
+            print("\nLogs are watched, statuses are updated by logs changes\n")
+
+    def unwatch_logs(self) -> None:
+        """Stop logs watcher"""
+
+        if services_checker.is_watching:
+            services_checker.unwatch()
+            print("\nLogs are not watched, statuses are checked by request\n")
+        else:
+            print("\nLogs are not watched at the moment\n")
+
     def commands_handler(self) -> None:
         while self.__command != 'exit':
             try:
@@ -31,14 +103,11 @@ class Console:
                 match self.__command:
                     case 'commands': self.show_commands()
                     case 'stop': model.stop_client()
-                    case 'status':
-                        services_statuses = model.get_servicesStatuses()
-                        print('\n')
-                        for status in services_statuses:
-                            for service_name, result in status.items():
-                                print(service_name.ljust(50),
-                                      result[0].ljust(40), f'last log was {result[1]}')
-                            print('\n')
+                    case 'status': self.check_statuses()
+                    case 'refresh': self.check_statuses(force=True)
+                    case 'metrics': self.show_metrics()
+                    case 'watch': self.watch_logs()
+                    case 'unwatch': self.unwatch_logs()
 
             except KeyboardInterrupt:
                 self.__command = 'exit'
@@ -54,7 +123,18 @@ if __name__ == '__main__':
     else:
         server_host, server_port = '10.40.21.3', 9186
 
-    model.start_client(server_host, server_port)
+    # Optional push interval in seconds - send changed statuses without server requests
+    push_interval = float(argv[3]) if len(argv) > 3 else None
+
+    # Watcher mode - status requests read snapshots updated by logs changes
+    if os.environ.get('MONITOR_WATCH_LOGS', '').lower() in ('1', 'true', 'yes'):
+        services_checker.watch()
+
+    model.start_client(server_host, server_port, push_interval)
     print("\nAvailable commands:")
     client_console.show_commands()
+
+    metrics.gauge('startup_seconds', "Time from program start to the first prompt").labels().set(
+        perf_counter() - started)
+
     client_console.commands_handler()
@@ -0,0 +1,157 @@
+"""Long-lived thread pool for checkers
+
+Checkers are registered once by name with their own deadline, run returns
+results as soon as every checker finishes. Checker which did not finish in its
+deadline gets CheckerTimeout and is not started again until the hung check ends.
+
+The same module is used by agent (client) and server, keep both copies equal
+"""
+
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from collections.abc import Callable, Iterator
+from typing import NamedTuple, Any
+from threading import Lock
+from time import monotonic
+
+
+class CheckerTimeout(TimeoutError):
+    """Checker did not finish in its deadline"""
+
+
+class CheckerCancelled(Exception):
+    """Check was cancelled before checker finished"""
+
+
+class Checker(NamedTuple):
+    name: str
+    function: Callable[..., Any]
+    deadline: float | None  # Seconds, executor default deadline if None
+
+
+class CheckerExecutor:
+    """Registry of checkers and shared pool of threads which run them"""
+
+    def __init__(self, max_workers: int = 8, deadline: float = 300) -> None:
+        self.max_workers = max_workers
+        self.deadline = deadline  # Default checker deadline in seconds
+
+        self.__checkers: dict[str, Checker] = dict()
+        self.__hung: dict[str, Future] = dict()  # Checks which did not finish in deadline
+        self.__cancel_futures: set[Future] = set()  # One for every active run, done on cancel
+        self.__queued = 0  # Submitted checks which wait for free thread
+        self.__lock = Lock()
+        self.__pool = ThreadPoolExecutor(max_workers, thread_name_prefix='checker')
+
+    def register(self, name: str, function: Callable[..., Any], deadline: float | None = None) -> None:
+        """Add checker or replace checker with the same name"""
+
+        with self.__lock:
+            self.__checkers[name] = Checker(name, function, deadline)
+
+    def unregister(self, name: str) -> None:
+        with self.__lock:
+            self.__checkers.pop(name, None)
+
+    @property
+    def queue_depth(self) -> int:
+        """Checks which wait for free thread"""
+
+        return self.__queued
+
+    @property
+    def names(self) -> list[str]:
+        """Names of registered checkers in registration order"""
+
+        with self.__lock:
+            return list(self.__checkers)
+
+    def run(self, calls: dict[str, tuple] | None = None) -> Iterator[tuple[str, Any]]:
+        """Run checkers in parallel and yield (name, result) as every checker finishes
+
+        calls is checker name: arguments, all checkers without arguments if None.
+        Result is an exception if checker failed, did not finish in deadline or was cancelled
+        """
+
+        with self.__lock:
+            if calls is None:
+                calls = {name: () for name in self.__checkers}
+            checkers = {name: self.__checkers[name] for name in calls if name in self.__checkers}
+
+        started = monotonic()
+        futures: dict[Future, str] = dict()
+        deadlines: dict[str, float] = dict()
+
+        for name, checker in checkers.items():
+            hung = self.__hung.get(name)
+
+            # Hung check still holds a thread - do not stack one more on top of it
+            if hung is not None and not hung.done():
+                yield name, CheckerTimeout(f"{name} checker is still running previous check")
+                continue
+
+            with self.__lock:
+                self.__queued += 1
+            future = self.__pool.submit(self.__call, checker.function, calls[name])
+            futures[future] = name
+            deadlines[name] = started + (self.deadline if checker.deadline is None else checker.deadline)
+
+        cancel_future = Future()
+        with self.__lock:
+            self.__cancel_futures.add(cancel_future)
+
+        try:
+            while futures:
+                timeout = max(0.0, min(deadlines[name] for name in futures.values()) - monotonic())
+                done, _ = wait([*futures, cancel_future], timeout, FIRST_COMPLETED)
+
+                if cancel_future in done:
+                    for future, name in futures.items():
+                        self.__cancel(future)  # Not started check is cancelled, started one ends in background
+                        yield name, CheckerCancelled(f"{name} check was cancelled")
+                    return
+
+                for future in done:
+                    name = futures.pop(future)
+                    exception = future.exception()
+                    yield name, future.result() if exception is None else exception
+
+                # Checkers which deadline has come
+                now = monotonic()
+                for future, name in list(futures.items()):
+                    if deadlines[name] <= now:
+                        del futures[future]
+                        if not self.__cancel(future):  # Check is running, it ends in background
+                            self.__hung[name] = future
+                        deadline = round(deadlines[name] - started, 1)
+                        yield name, CheckerTimeout(f"{name} checker did not finish in {deadline:g} seconds")
+        finally:
+            with self.__lock:
+                self.__cancel_futures.discard(cancel_future)
+
+    def __call(self, function: Callable[..., Any], arguments: tuple) -> Any:
+        with self.__lock:
+            self.__queued -= 1
+
+        return function(*arguments)
+
+    def __cancel(self, future: Future) -> bool:
+        """Cancel not started check, False if check is already running"""
+
+        if not future.cancel():
+            return False
+
+        with self.__lock:
+            self.__queued -= 1
+        return True
+
+    def cancel(self) -> None:
+        """Stop all active runs, their checkers get CheckerCancelled"""
+
+        with self.__lock:
+            for cancel_future in self.__cancel_futures:
+                if not cancel_future.done():
+                    cancel_future.set_result(None)
+
+    def shutdown(self) -> None:
+        self.cancel()
+        self.__pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,71 @@
+from typing import NamedTuple
+import re
+
+
+class LogField(NamedTuple):
+    """Value which is got from log lines
+
+    pattern is bytes regex, ^ matches at line start. Value is the first group
+    or the whole match if pattern has no groups. count fields are numbers of
+    matches, other fields are the last match
+    """
+
+    name: str
+    pattern: bytes
+    count: bool = False
+    encoding: str = 'ascii'
+
+
+class LogExtractor:
+    """Get all fields from raw log bytes, only found fragments are decoded
+
+    Every field pattern is compiled once and applied to the same chunk, so new
+    field does not add file read. Patterns are not joined into one alternation -
+    re searches literal prefix like 'PID' much faster than alternation of all
+    fields. The last value is searched from the chunk end by growing windows,
+    so field on every line like log time costs only the last lines
+    """
+
+    def __init__(self, fields: list[LogField], window: int = 16 * 1024) -> None:
+        self.fields = fields
+        self.window = window  # Bytes of the first window for the last value
+        self.__patterns = [(field, re.compile(field.pattern, re.MULTILINE)) for field in fields]
+
+    @property
+    def names(self) -> set[str]:
+        return {field.name for field in self.fields}
+
+    def empty(self) -> dict[str, str | int | None]:
+        """Values before any log line"""
+
+        return {field.name: 0 if field.count else None for field in self.fields}
+
+    def extract(self, data: bytes, values: dict | None = None) -> dict[str, str | int | None]:
+        """Update values by complete lines in data - last values are replaced, counts are added"""
+
+        values = self.empty() if values is None else values
+
+        for field, pattern in self.__patterns:
+            if field.count:
+                values[field.name] += len(pattern.findall(data))
+            else:
+                value = self.__find_last(pattern, data)
+                if value is not None:
+                    values[field.name] = value.decode(field.encoding)
+
+        return values
+
+    def __find_last(self, pattern: re.Pattern, data: bytes) -> bytes | None:
+        """Search windows from the end to the start, windows start at line start"""
+
+        end, window = len(data), self.window
+
+        while end > 0:
+            start = data.rfind(b'\n', 0, end - window) + 1 if end > window else 0
+            matches = pattern.findall(data, start, end)
+            if matches:
+                return matches[-1]
+
+            end, window = start, window * 2
+
+        return None
@@ -0,0 +1,68 @@
+from collections.abc import Iterator, Callable
+from pathlib import Path
+import mmap
+import os
+
+
+def reverse_blocks(log_path: Path, block_size: int = 64 * 1024, use_mmap: bool = False,
+                   on_read: Callable[[int], None] | None = None) -> Iterator[bytes]:
+    """Read log blocks from the end of file to the start without reading whole file
+
+    Every block starts at line start and ends at line end, so lines are not
+    split between blocks. Blocks are bytes - only found fragments have to be
+    decoded from cp866. The last line can be partial if log is being written
+    right now. on_read gets count of every read bytes
+    """
+
+    if use_mmap:
+        yield from _reverse_blocks_mmap(log_path, block_size, on_read)
+    else:
+        yield from _reverse_blocks_read(log_path, block_size, on_read)
+
+
+def _reverse_blocks_read(log_path: Path, block_size: int,
+                         on_read: Callable[[int], None] | None = None) -> Iterator[bytes]:
+    """Seek to the end of file and read blocks backwards"""
+
+    with open(log_path, mode='rb') as log:
+        position = log.seek(0, os.SEEK_END)
+        head = b''  # Line start from previous block, it can be partial
+
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            log.seek(position)
+            if on_read is not None:
+                on_read(read_size)
+
+            block = log.read(read_size) + head
+
+            # First line in block can continue in previous block
+            if position > 0:
+                line_start = block.find(b'\n') + 1
+                if line_start == 0:  # Line is longer than block
+                    head = block
+                    continue
+                head, block = block[:line_start], block[line_start:]
+
+            if block:
+                yield block
+
+
+def _reverse_blocks_mmap(log_path: Path, block_size: int,
+                         on_read: Callable[[int], None] | None = None) -> Iterator[bytes]:
+    """Map file to memory and cut blocks at line breaks backwards"""
+
+    with open(log_path, mode='rb') as log:
+        if os.fstat(log.fileno()).st_size == 0:  # Empty file can't be mapped
+            return
+
+        with mmap.mmap(log.fileno(), 0, access=mmap.ACCESS_READ) as log_map:
+            end = len(log_map)
+
+            while end > 0:
+                start = log_map.rfind(b'\n', 0, end - block_size) + 1 if end > block_size else 0
+                if on_read is not None:  # Mapped pages are read by searched blocks
+                    on_read(end - start)
+                yield log_map[start:end]
+                end = start
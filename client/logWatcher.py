@@ -0,0 +1,279 @@
+from collections.abc import Callable
+from threading import Thread, Event
+from pathlib import Path
+from time import monotonic
+from os import scandir
+import struct
+import select
+import sys
+import os
+
+
+class LogWatcher:
+    """Watch logs directories and report changed file names
+
+    Changes are got from inotify on Linux and ReadDirectoryChangesW on Windows,
+    other systems and failed watches fall back to directory polling.
+    on_change gets directory and changed file names, None names means that
+    any file could change - events were lost or directory was replaced.
+    All directories are also reported every resync_interval seconds - Windows
+    can delay size change events of files which are still open for writing
+    """
+
+    # inotify event masks from sys/inotify.h
+    IN_MODIFY, IN_ATTRIB, IN_CLOSE_WRITE = 0x002, 0x004, 0x008
+    IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x040, 0x080, 0x100, 0x200
+    IN_DELETE_SELF, IN_MOVE_SELF, IN_Q_OVERFLOW, IN_IGNORED = 0x400, 0x800, 0x4000, 0x8000
+
+    def __init__(self, directories: list[Path], on_change: Callable[[Path, set[str] | None], None],
+                 poll_interval: float = 2.0, latency: float = 0.5, resync_interval: float = 60) -> None:
+        self.directories = [Path(directory) for directory in directories]
+        self.on_change = on_change
+        self.poll_interval = poll_interval  # Seconds between directory scans in polling mode
+        self.latency = latency  # Seconds to collect events of one burst of writes
+        self.resync_interval = resync_interval
+
+        self.method = None  # inotify, windows or polling - chosen on start
+        self.last_error: Exception | None = None  # The last on_change error
+        self.__stop_event = Event()
+        self.__threads: list[Thread] = []
+
+    @property
+    def is_running(self) -> bool:
+        return any(thread.is_alive() for thread in self.__threads)
+
+    def start(self) -> None:
+        self.__stop_event.clear()
+
+        if sys.platform == 'win32':
+            self.method, target = 'windows', self.__watch_windows
+        elif sys.platform.startswith('linux'):
+            self.method, target = 'inotify', self.__watch_inotify
+        else:
+            self.method, target = 'polling', self.__watch_polling
+
+        self.__threads = [Thread(target=target, name='log_watcher', daemon=True)]
+        self.__threads[0].start()
+
+    def stop(self) -> None:
+        self.__stop_event.set()
+
+        if self.method == 'windows':
+            self.__cancel_windowsReads()
+
+        for thread in self.__threads:
+            thread.join(self.poll_interval + self.latency + 1)
+        self.__threads = []
+
+    def __report(self, directory: Path, names: set[str] | None) -> None:
+        try:
+            self.on_change(directory, names)
+        except Exception as error:  # Callback error must not stop watching, but it is not hidden
+            self.last_error = error
+            print(f"\nLogs watcher callback failed for {directory} - {error!r}\n", file=sys.stderr)
+
+    def __resync(self) -> None:
+        for directory in self.directories:
+            self.__report(directory, None)
+
+    def __watch_polling(self) -> None:
+        """Compare modification time and size of every file with previous scan"""
+
+        self.method = 'polling'
+        signatures = {directory: self.__get_signatures(directory) for directory in self.directories}
+        next_resync = self.resync_interval
+        self.__resync()  # Files could change before the first scan, like before inotify watch
+
+        while not self.__stop_event.wait(self.poll_interval):
+            for directory in self.directories:
+                old_signatures, signatures[directory] = signatures[directory], self.__get_signatures(directory)
+                names = {name for name in old_signatures.keys() | signatures[directory].keys()
+                         if old_signatures.get(name) != signatures[directory].get(name)}
+                if names:
+                    self.__report(directory, names)
+
+            next_resync -= self.poll_interval
+            if next_resync <= 0:
+                self.__resync()
+                next_resync = self.resync_interval
+
+    @staticmethod
+    def __get_signatures(directory: Path) -> dict[str, tuple[int, int]]:
+        try:
+            with scandir(directory) as entries:
+                return {entry.name: (entry_stat.st_mtime_ns, entry_stat.st_size)
+                        for entry in entries for entry_stat in (entry.stat(),)}
+        except OSError:  # Directory does not exist yet or was removed
+            return dict()
+
+    def __watch_inotify(self) -> None:
+        """Read inotify events of all directories in one thread"""
+
+        import ctypes
+        import ctypes.util
+
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            inotify_fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            inotify_fd = -1
+        if inotify_fd < 0:
+            self.__watch_polling()
+            return
+
+        mask = (self.IN_MODIFY | self.IN_ATTRIB | self.IN_CLOSE_WRITE | self.IN_MOVED_FROM | self.IN_MOVED_TO |
+                self.IN_CREATE | self.IN_DELETE | self.IN_DELETE_SELF | self.IN_MOVE_SELF)
+        watches: dict[int, Path] = dict()  # Watch descriptor: directory
+
+        def add_watches() -> None:
+            """Watch directories which are not watched yet, they could appear after start"""
+
+            watched = set(watches.values())
+            for directory in self.directories:
+                if directory not in watched:
+                    watch = libc.inotify_add_watch(inotify_fd, os.fsencode(directory), mask)
+                    if watch >= 0:
+                        watches[watch] = directory
+                        self.__report(directory, None)  # Files could change before watch
+
+        try:
+            add_watches()
+            next_resync = monotonic() + self.resync_interval
+
+            while not self.__stop_event.is_set():
+                if monotonic() >= next_resync:
+                    add_watches()
+                    self.__resync()
+                    next_resync = monotonic() + self.resync_interval
+
+                # Short timeout - stop is noticed without event
+                ready, _, _ = select.select([inotify_fd], [], [], self.poll_interval)
+                if not ready:
+                    continue
+
+                # Writer appends many times in a row - report the whole burst once
+                self.__stop_event.wait(self.latency)
+                changes: dict[Path, set[str] | None] = dict()
+
+                for watch, event_mask, name in self.__read_inotifyEvents(inotify_fd):
+                    if event_mask & self.IN_Q_OVERFLOW:  # Events were lost
+                        changes = dict.fromkeys(self.directories)
+                        continue
+
+                    directory = watches.get(watch)
+                    if directory is None:
+                        continue
+
+                    if event_mask & (self.IN_DELETE_SELF | self.IN_MOVE_SELF | self.IN_IGNORED):
+                        del watches[watch]  # Watched again by add_watches when it is back
+                        changes[directory] = None
+                    elif directory not in changes or changes[directory] is not None:
+                        changes.setdefault(directory, set()).add(name)
+
+                for directory, names in changes.items():
+                    self.__report(directory, names)
+        finally:
+            os.close(inotify_fd)
+
+    @staticmethod
+    def __read_inotifyEvents(inotify_fd: int) -> list[tuple[int, int, str]]:
+        """Read all waiting events as (watch, mask, file name)"""
+
+        events = []
+        header = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+        while True:
+            try:
+                data = os.read(inotify_fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+
+            offset = 0
+            while offset < len(data):
+                watch, event_mask, _, name_length = header.unpack_from(data, offset)
+                offset += header.size
+                name = os.fsdecode(data[offset:offset + name_length].rstrip(b'\0'))
+                offset += name_length
+                events.append((watch, event_mask, name))
+
+    def __watch_windows(self) -> None:
+        """ReadDirectoryChangesW blocks, so every directory has its own reader thread"""
+
+        for directory in self.directories:
+            reader = Thread(target=self.__read_windowsChanges, args=(directory,),
+                            name=f'log_watcher_{directory.name}', daemon=True)
+            reader.start()
+            self.__threads.append(reader)
+
+        while not self.__stop_event.wait(self.resync_interval):
+            self.__resync()
+
+    def __cancel_windowsReads(self) -> None:
+        """Wake reader threads which wait in ReadDirectoryChangesW"""
+
+        import ctypes
+
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        THREAD_TERMINATE = 0x0001  # Access right needed by CancelSynchronousIo
+
+        for thread in self.__threads[1:]:
+            if thread.native_id is None:
+                continue
+
+            handle = kernel32.OpenThread(THREAD_TERMINATE, False, thread.native_id)
+            if handle:
+                kernel32.CancelSynchronousIo(handle)
+                kernel32.CloseHandle(handle)
+
+    def __read_windowsChanges(self, directory: Path) -> None:
+        """Wait for changes of one directory, reopen it if it was removed"""
+
+        import ctypes
+        from ctypes import wintypes
+
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        kernel32.CreateFileW.restype = wintypes.HANDLE
+
+        FILE_LIST_DIRECTORY = 0x0001
+        FILE_SHARE_ALL = 0x0001 | 0x0002 | 0x0004  # Read, write, delete - writers are not blocked
+        OPEN_EXISTING = 3
+        FILE_FLAG_BACKUP_SEMANTICS = 0x02000000  # Needed to open directory
+        FILE_NOTIFY_CHANGE = 0x0001 | 0x0008 | 0x0010  # File name, size, last write
+        INVALID_HANDLE_VALUE = ctypes.c_void_p(-1).value
+
+        buffer = ctypes.create_string_buffer(64 * 1024)
+        returned = wintypes.DWORD()
+        header = struct.Struct('III')  # NextEntryOffset, Action, FileNameLength
+
+        while not self.__stop_event.is_set():
+            handle = kernel32.CreateFileW(str(directory), FILE_LIST_DIRECTORY, FILE_SHARE_ALL, None,
+                                          OPEN_EXISTING, FILE_FLAG_BACKUP_SEMANTICS, None)
+            if handle == INVALID_HANDLE_VALUE:  # Directory does not exist yet
+                self.__stop_event.wait(self.poll_interval)
+                continue
+
+            self.__report(directory, None)  # Files could change before watch
+
+            try:
+                while not self.__stop_event.is_set():
+                    if not kernel32.ReadDirectoryChangesW(handle, buffer, len(buffer), False, FILE_NOTIFY_CHANGE,
+                                                          ctypes.byref(returned), None, None):
+                        break  # Directory was removed
+
+                    if returned.value == 0:  # Buffer overflow - events were lost
+                        self.__report(directory, None)
+                        continue
+
+                    names, offset = set(), 0
+                    while True:
+                        next_offset, _, name_length = header.unpack_from(buffer.raw, offset)
+                        name_start = offset + header.size
+                        names.add(buffer.raw[name_start:name_start + name_length].decode('utf-16-le'))
+                        if next_offset == 0:
+                            break
+                        offset += next_offset
+
+                    # Writer appends many times in a row - the burst is reported by the last read
+                    self.__report(directory, names)
+            finally:
+                kernel32.CloseHandle(handle)
@@ -0,0 +1,131 @@
+from datetime import datetime
+from typing import NamedTuple
+from subprocess import run
+import sys
+import os
+
+
+class ProcessInfo(NamedTuple):
+    """Live process from process table snapshot"""
+
+    pid: int
+    name: str
+    start_time: datetime | None  # Local time, None if process is not accessible
+
+
+class ProcessTable:
+    """Get all live processes in one call: /proc on Linux, ToolHelp snapshot on Windows"""
+
+    def snapshot(self) -> dict[int, ProcessInfo]:
+        """Get processes by pid, lookup for every service is O(1)"""
+
+        if sys.platform == 'win32':
+            return self.__snapshot_windows()
+        if os.path.isdir('/proc/self'):
+            return self.__snapshot_proc()
+
+        return self.__snapshot_ps()
+
+    @staticmethod
+    def __snapshot_proc() -> dict[int, ProcessInfo]:
+        """Read /proc/<pid>/stat for every process"""
+
+        clock_ticks = os.sysconf('SC_CLK_TCK')
+        boot_time = 0
+        with open('/proc/stat', mode='rb') as proc_stat:
+            for line in proc_stat:
+                if line.startswith(b'btime'):
+                    boot_time = int(line.split()[1])
+                    break
+
+        processes = dict()
+        for pid in os.listdir('/proc'):
+            if not pid.isdigit():
+                continue
+
+            try:
+                with open(f'/proc/{pid}/stat', mode='rb') as process_stat:
+                    stat = process_stat.read()
+            except OSError:  # Process is ended while reading the table
+                continue
+
+            # Process name is in brackets and can contain spaces, start time is 22 field
+            name = stat[stat.index(b'(') + 1:stat.rindex(b')')].decode(errors='replace')
+            start_ticks = int(stat[stat.rindex(b')') + 2:].split()[19])
+            start_time = datetime.fromtimestamp(boot_time + start_ticks / clock_ticks)
+
+            processes[int(pid)] = ProcessInfo(int(pid), name, start_time)
+
+        return processes
+
+    @staticmethod
+    def __snapshot_windows() -> dict[int, ProcessInfo]:
+        """Enumerate processes with CreateToolhelp32Snapshot, no tasklist process spawn"""
+
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESSENTRY32W(ctypes.Structure):
+            _fields_ = [('dwSize', wintypes.DWORD),
+                        ('cntUsage', wintypes.DWORD),
+                        ('th32ProcessID', wintypes.DWORD),
+                        ('th32DefaultHeapID', ctypes.c_size_t),
+                        ('th32ModuleID', wintypes.DWORD),
+                        ('cntThreads', wintypes.DWORD),
+                        ('th32ParentProcessID', wintypes.DWORD),
+                        ('pcPriClassBase', ctypes.c_long),
+                        ('dwFlags', wintypes.DWORD),
+                        ('szExeFile', ctypes.c_wchar * 260)]
+
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        kernel32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+        kernel32.OpenProcess.restype = wintypes.HANDLE
+
+        TH32CS_SNAPPROCESS = 0x00000002
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        INVALID_HANDLE_VALUE = ctypes.c_void_p(-1).value
+
+        snapshot = kernel32.CreateToolhelp32Snapshot(TH32CS_SNAPPROCESS, 0)
+        if snapshot == INVALID_HANDLE_VALUE:
+            raise ctypes.WinError(ctypes.get_last_error())
+
+        processes = dict()
+        entry = PROCESSENTRY32W()
+        entry.dwSize = ctypes.sizeof(PROCESSENTRY32W)
+        times = [wintypes.FILETIME() for _ in range(4)]  # creation, exit, kernel, user
+
+        try:
+            has_entry = kernel32.Process32FirstW(snapshot, ctypes.byref(entry))
+            while has_entry:
+                pid, start_time = entry.th32ProcessID, None
+
+                # Creation time is FILETIME - 100 ns intervals since 1601
+                handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+                if handle:
+                    if kernel32.GetProcessTimes(handle, *map(ctypes.byref, times)):
+                        filetime = times[0].dwHighDateTime << 32 | times[0].dwLowDateTime
+                        start_time = datetime.fromtimestamp(
+                            (filetime - 116444736000000000) / 10_000_000)
+                    kernel32.CloseHandle(handle)
+
+                processes[pid] = ProcessInfo(pid, entry.szExeFile, start_time)
+                has_entry = kernel32.Process32NextW(snapshot, ctypes.byref(entry))
+        finally:
+            kernel32.CloseHandle(snapshot)
+
+        return processes
+
+    @staticmethod
+    def __snapshot_ps() -> dict[int, ProcessInfo]:
+        """One ps call for other systems, start time is not available"""
+
+        ps_output = run(['ps', '-A', '-o', 'pid=,comm='],
+                        capture_output=True, text=True).stdout
+
+        processes = dict()
+        for line in ps_output.splitlines():
+            pid, _, name = line.strip().partition(' ')
+            if pid.isdigit():
+                processes[int(pid)] = ProcessInfo(int(pid), name.strip(), None)
+
+        return processes
@@ -0,0 +1,281 @@
+"""Framed messages between agents and server
+
+Every frame is a header followed by body:
+
+    length      uint32  body length in bytes
+    type        uint8   message type - HELLO, REQUEST, RESPONSE, ERROR, PUSH, ACK,
+                        HEARTBEAT
+    flags       uint8   BINARY - body in compact binary encoding instead of JSON
+                        COMPRESSED - body is zlib compressed
+    request_id  uint32  response has request_id of its request, PUSH and ACK
+                        have sequence number of agent push
+
+The same module is used by agent (client) and server, keep both copies equal
+"""
+
+from typing import NamedTuple, Any
+import struct
+import json
+import zlib
+
+
+HELLO = 1  # First message from agent, body is agent host name
+REQUEST = 2  # Command for agent, body is command name
+RESPONSE = 3  # Command result
+ERROR = 4  # Command failed, body is error text
+PUSH = 5  # Statuses delta from agent in push mode
+ACK = 6  # Push is applied by server, body RESYNC asks agent for full statuses
+HEARTBEAT = 7  # Sender is alive, body is seconds to the next heartbeat
+
+RESYNC = 'resync'
+
+BINARY = 0b01
+COMPRESSED = 0b10
+
+HEADER = struct.Struct('!IBBI')
+MAX_BODY_SIZE = 64 * 1024 * 1024
+COMPRESS_THRESHOLD = 1024  # Smaller bodies are not worth compression
+
+
+class ProtocolError(ValueError):
+    """Frame can't be decoded"""
+
+
+class Frame(NamedTuple):
+    type: int
+    request_id: int
+    body: Any
+    flags: int = 0
+
+
+def encode_frame(message_type: int, request_id: int, body: Any,
+                 binary: bool = False, compress: bool = True) -> bytes:
+    """Encode message to frame bytes"""
+
+    flags = 0
+
+    if binary:
+        payload = BinaryCodec.encode(body)
+        flags |= BINARY
+    else:
+        payload = json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    if compress and len(payload) > COMPRESS_THRESHOLD:
+        compressed_payload = zlib.compress(payload)
+        if len(compressed_payload) < len(payload):
+            payload = compressed_payload
+            flags |= COMPRESSED
+
+    return HEADER.pack(len(payload), message_type, flags, request_id) + payload
+
+
+def decode_body(flags: int, payload: bytes, max_body_size: int = MAX_BODY_SIZE) -> Any:
+    """Decode frame body by header flags, decompressed body is limited like frame body"""
+
+    try:
+        if flags & COMPRESSED:
+            decompressor = zlib.decompressobj()
+            payload = decompressor.decompress(payload, max_body_size)
+            if decompressor.unconsumed_tail:  # Small frame must not expand to gigabytes
+                raise ProtocolError(f"Decompressed frame body is larger than {max_body_size} bytes")
+
+        if flags & BINARY:
+            return BinaryCodec.decode(payload)
+
+        return json.loads(payload.decode('utf-8'))
+
+    except (zlib.error, ValueError, TypeError, IndexError, RecursionError, struct.error) as error:
+        raise ProtocolError(f"Broken frame body - {error}") from None
+
+
+class FrameDecoder:
+    """Incremental decoder - feed bytes from socket as they come, get complete frames"""
+
+    def __init__(self, max_body_size: int = MAX_BODY_SIZE) -> None:
+        self.max_body_size = max_body_size
+        self.__buffer = bytearray()
+
+    def feed(self, data: bytes) -> list[Frame]:
+        """Add received bytes and get all frames completed by them"""
+
+        self.__buffer += data
+        frames = []
+
+        while len(self.__buffer) >= HEADER.size:
+            length, message_type, flags, request_id = HEADER.unpack_from(self.__buffer)
+
+            if length > self.max_body_size:
+                raise ProtocolError(f"Frame body is too large - {length} bytes")
+
+            frame_end = HEADER.size + length
+            if len(self.__buffer) < frame_end:  # Wait for the rest of frame
+                break
+
+            payload = bytes(self.__buffer[HEADER.size:frame_end])
+            del self.__buffer[:frame_end]
+
+            frames.append(Frame(message_type, request_id,
+                                decode_body(flags, payload, self.max_body_size), flags))
+
+        return frames
+
+
+def diff_statuses(base: dict, current: dict) -> dict:
+    """Get changed and removed entries of every statuses section since base statuses
+
+    Section which is not a dict (for example message that Ostel services do not
+    exist) is replaced as a whole
+    """
+
+    delta = dict()
+
+    for section, values in current.items():
+        base_values = base.get(section)
+
+        if not isinstance(values, dict) or not isinstance(base_values, dict):
+            if section not in base or values != base_values:
+                delta[section] = {'replace': values}
+            continue
+
+        changed = {name: value for name, value in values.items() if base_values.get(name) != value}
+        removed = [name for name in base_values if name not in values]
+
+        if changed or removed:
+            delta[section] = {'changed': changed, 'removed': removed}
+
+    return delta
+
+
+def apply_delta(state: dict, delta: dict) -> dict:
+    """Get new statuses by applying delta from diff_statuses to previous statuses"""
+
+    state = dict(state)
+
+    for section, section_delta in delta.items():
+        if 'replace' in section_delta:
+            state[section] = section_delta['replace']
+            continue
+
+        values = state.get(section)
+        values = dict(values) if isinstance(values, dict) else dict()
+        values.update(section_delta['changed'])
+        for name in section_delta['removed']:
+            values.pop(name, None)
+
+        state[section] = values
+
+    return state
+
+
+class BinaryCodec:
+    """Compact tag-length-value encoding for None, bool, int, float, str, list and dict"""
+
+    NONE, TRUE, FALSE, INT, NEGATIVE_INT, FLOAT, STR, LIST, DICT = range(9)
+    FLOAT_FORMAT = struct.Struct('!d')
+
+    @classmethod
+    def encode(cls, value: Any) -> bytes:
+        output = bytearray()
+        cls.__encode(value, output)
+
+        return bytes(output)
+
+    @classmethod
+    def decode(cls, data: bytes) -> Any:
+        value, position = cls.__decode(memoryview(data), 0)
+
+        if position != len(data):
+            raise ValueError("Trailing bytes after value")
+
+        return value
+
+    @staticmethod
+    def __write_varint(number: int, output: bytearray) -> None:
+        while number > 0x7F:
+            output.append(number & 0x7F | 0x80)
+            number >>= 7
+        output.append(number)
+
+    @staticmethod
+    def __read_varint(data: memoryview, position: int) -> tuple[int, int]:
+        number = shift = 0
+
+        while True:
+            byte = data[position]
+            position += 1
+            number |= (byte & 0x7F) << shift
+            shift += 7
+
+            if not byte & 0x80:
+                return number, position
+
+    @classmethod
+    def __encode(cls, value: Any, output: bytearray) -> None:
+        if value is None:
+            output.append(cls.NONE)
+        elif value is True:
+            output.append(cls.TRUE)
+        elif value is False:
+            output.append(cls.FALSE)
+        elif isinstance(value, int):
+            output.append(cls.INT if value >= 0 else cls.NEGATIVE_INT)
+            cls.__write_varint(abs(value), output)
+        elif isinstance(value, float):
+            output.append(cls.FLOAT)
+            output += cls.FLOAT_FORMAT.pack(value)
+        elif isinstance(value, str):
+            encoded = value.encode('utf-8')
+            output.append(cls.STR)
+            cls.__write_varint(len(encoded), output)
+            output += encoded
+        elif isinstance(value, (list, tuple)):
+            output.append(cls.LIST)
+            cls.__write_varint(len(value), output)
+            for item in value:
+                cls.__encode(item, output)
+        elif isinstance(value, dict):
+            output.append(cls.DICT)
+            cls.__write_varint(len(value), output)
+            for key, item in value.items():
+                cls.__encode(key, output)
+                cls.__encode(item, output)
+        else:
+            raise TypeError(f"Type {type(value).__name__} can't be encoded")
+
+    @classmethod
+    def __decode(cls, data: memoryview, position: int) -> tuple[Any, int]:
+        tag = data[position]
+        position += 1
+
+        if tag == cls.NONE:
+            return None, position
+        if tag == cls.TRUE:
+            return True, position
+        if tag == cls.FALSE:
+            return False, position
+        if tag in (cls.INT, cls.NEGATIVE_INT):
+            number, position = cls.__read_varint(data, position)
+            return (number if tag == cls.INT else -number), position
+        if tag == cls.FLOAT:
+            return cls.FLOAT_FORMAT.unpack_from(data, position)[0], position + 8
+        if tag == cls.STR:
+            length, position = cls.__read_varint(data, position)
+            if position + length > len(data):
+                raise ValueError("String is out of data")
+            return str(data[position:position + length], 'utf-8'), position + length
+        if tag == cls.LIST:
+            length, position = cls.__read_varint(data, position)
+            items = []
+            for _ in range(length):
+                item, position = cls.__decode(data, position)
+                items.append(item)
+            return items, position
+        if tag == cls.DICT:
+            length, position = cls.__read_varint(data, position)
+            items = dict()
+            for _ in range(length):
+                key, position = cls.__decode(data, position)
+                items[key], position = cls.__decode(data, position)
+            return items, position
+
+        raise ValueError(f"Unknown value tag {tag}")
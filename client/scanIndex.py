@@ -0,0 +1,184 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from threading import Lock
+import multiprocessing
+import json
+import os
+
+from logExtractor import LogExtractor
+
+
+class ScanIndex:
+    """Remember scan position and extractor fields like last PID for every log file
+
+    Logs are append-only, so next scan reads only bytes appended after the last
+    complete line. Index entry is dropped if file was rotated (other file with
+    the same path) or truncated, or if extractor got new field. Index can be
+    saved to disk to survive restarts
+    """
+
+    def __init__(self, extractor: LogExtractor, index_path: Path | None = None,
+                 block_size: int = 4 * 1024 * 1024, processes: int = 0,
+                 process_threshold: int = 1024 * 1024) -> None:
+        self.extractor = extractor
+        self.index_path = index_path  # Index is kept only in memory if path is None
+        self.block_size = block_size  # Bytes read from log at once
+
+        # Regex work of big scans runs in worker processes, 0 - in the calling thread
+        self.processes = processes
+        self.process_threshold = process_threshold  # New bytes of log worth sending to process
+        self.__pool: ProcessPoolExecutor | None = None
+
+        # Entries by log path: identity, size, mtime, offset and extractor fields
+        self.__entries: dict[str, dict] = dict()
+        self.__lock = Lock()
+        self.__changed = False
+        self.bytes_read = 0  # Bytes read from logs by all scans
+
+        self.load()
+
+    def scan(self, log_path: Path) -> dict[str, str | int | None]:
+        """Get extractor fields of log, parse only new bytes"""
+
+        log_stat = os.stat(log_path)
+        identity = [log_stat.st_dev, log_stat.st_ino]
+
+        with self.__lock:
+            entry = self.__entries.get(str(log_path))
+
+        # New file, rotated file, truncated file or new field - scan from the start
+        if (entry is None or entry['identity'] != identity or log_stat.st_size < entry['offset']
+                or not self.extractor.names <= entry.keys()):
+            entry = {'identity': identity, 'size': 0, 'mtime': 0, 'offset': 0, **self.extractor.empty()}
+
+        # File was not changed since last scan
+        elif entry['size'] == log_stat.st_size and entry['mtime'] == log_stat.st_mtime_ns:
+            return self.__get_fields(entry)
+
+        entry = self.__scan_tail(log_path, dict(entry), log_stat.st_size)
+        entry['size'], entry['mtime'] = log_stat.st_size, log_stat.st_mtime_ns
+
+        with self.__lock:
+            self.__entries[str(log_path)] = entry
+            self.__changed = True
+
+        return self.__get_fields(entry)
+
+    def __get_fields(self, entry: dict) -> dict[str, str | int | None]:
+        return {name: entry[name] for name in self.extractor.names}
+
+    def __scan_tail(self, log_path: Path, entry: dict, size: int) -> dict:
+        """Parse new bytes in this thread or in process pool if there are many of them"""
+
+        pool = self.__get_pool() if size - entry['offset'] >= self.process_threshold else None
+
+        if pool is None:
+            entry, bytes_read = scan_tail(log_path, entry, self.extractor, self.block_size)
+        else:
+            try:  # Thread waits without GIL, regex work runs on other core
+                entry, bytes_read = pool.submit(scan_tail, log_path, entry, self.extractor, self.block_size).result()
+            except BrokenProcessPool:  # Worker was killed - pool is created again by next scan
+                with self.__lock:
+                    if self.__pool is pool:
+                        self.__pool = None
+                pool.shutdown(wait=False)
+                entry, bytes_read = scan_tail(log_path, entry, self.extractor, self.block_size)
+
+        with self.__lock:
+            self.bytes_read += bytes_read
+
+        return entry
+
+    def __get_pool(self) -> ProcessPoolExecutor | None:
+        """Process pool is started by the first big scan"""
+
+        if self.processes <= 0:
+            return None
+
+        with self.__lock:
+            if self.__pool is None:
+                # Spawn works the same way on Windows and Linux, agent has threads when pool starts
+                self.__pool = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context('spawn'))
+
+            return self.__pool
+
+    def close(self) -> None:
+        """Stop process pool"""
+
+        with self.__lock:
+            pool, self.__pool = self.__pool, None
+
+        if pool is not None:
+            pool.shutdown()
+
+    def prune(self, log_paths: list[Path]) -> None:
+        """Remove entries for logs which no longer exist"""
+
+        existing_paths = {str(log_path) for log_path in log_paths}
+
+        with self.__lock:
+            for log_path in list(self.__entries):
+                if log_path not in existing_paths:
+                    del self.__entries[log_path]
+                    self.__changed = True
+
+    def load(self) -> None:
+        """Load index from disk, start with empty index if file is missing or broken"""
+
+        if self.index_path is None:
+            return
+
+        try:
+            with open(self.index_path, mode='r', encoding='utf-8') as index_file:
+                entries = json.load(index_file)
+        except (OSError, ValueError):
+            return
+
+        if isinstance(entries, dict):
+            with self.__lock:
+                self.__entries = entries
+
+    def save(self) -> None:
+        """Save index to disk if it was changed"""
+
+        if self.index_path is None or not self.__changed:
+            return
+
+        with self.__lock:
+            entries = json.dumps(self.__entries)
+            self.__changed = False
+
+        # Write to temporary file first - index is never left half written
+        temp_path = f"{self.index_path}.tmp"
+        with open(temp_path, mode='w', encoding='utf-8') as index_file:
+            index_file.write(entries)
+        os.replace(temp_path, self.index_path)
+
+
+def scan_tail(log_path: Path, entry: dict, extractor: LogExtractor, block_size: int) -> tuple[dict, int]:
+    """Parse complete lines after entry offset, partial last line is parsed next time
+
+    Function is module level - it can be run by process pool worker
+    """
+
+    bytes_read = 0
+
+    with open(log_path, mode='rb') as log:
+        log.seek(entry['offset'])
+        rest = b''  # Incomplete line from previous block
+
+        while block := log.read(block_size):
+            bytes_read += len(block)
+            block = rest + block
+            line_end = block.rfind(b'\n') + 1
+            lines, rest = block[:line_end], block[line_end:]
+
+            if not lines:
+                continue
+
+            # Last values are replaced, counts are added, only found fragments are decoded
+            extractor.extract(lines, entry)
+            entry['offset'] += line_end
+
+    return entry, bytes_read
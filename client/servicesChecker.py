@@ -1,113 +1,313 @@
 from pathlib import Path
-from os.path import getmtime as modification_date
 from datetime import datetime, timedelta
-from os import popen
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Callable
+from typing import NamedTuple, Any
+from threading import Lock
+from os import scandir, stat
+from operator import itemgetter
+from time import perf_counter
+import os
 import re
 
+from logReader import reverse_blocks
+from logExtractor import LogExtractor, LogField
+from logWatcher import LogWatcher
+from scanIndex import ScanIndex
+from processTable import ProcessTable, ProcessInfo
+from metrics import metrics, Counter, SIZE_BUCKETS
+
+
+check_seconds = metrics.histogram('check_duration_seconds', "Duration of one target check", ('checker', 'target'))
+scan_bytes = metrics.histogram('log_scan_bytes', "Bytes read by one service logs scan", ('service',), SIZE_BUCKETS)
+log_errors = metrics.gauge('log_errors', "ERROR messages in current service log", ('service',))
+
+# Fields got from log lines, every read block is parsed for all of them
+TIME_FIELD = LogField('last_time', rb'^(\d{4}-[\d-]+[^\S\n][\d:]+)', encoding='cp866')
+PID_FIELD = LogField('pid', rb'PID[^\S\n](\d+)')
+ERRORS_FIELD = LogField('errors', rb'ERROR\b', count=True)
+
+
+class LyrixSnapshot(NamedTuple):
+    """Last state of one Lyrix service from its logs"""
+
+    log_path: Path  # Current log - the last modified one
+    pid: str | None  # Last PID from the newest log which has it
+    pid_logTime: str | None  # Last log time in log with PID
+    last_logTime: str  # Last log time in current log
+    errors: int  # ERROR messages in current log
+
 
 class ServicesChecker:
     """Check service statuses, both lyrix and ostel"""
 
-    def __init__(self) -> None:
-        self.__LyrixLogs_path = Path(
-            r'C:\Users\from_\Downloads\test_logs\LyrixLogs')
-        self.__OstelLogs_path = Path(
-            r'C:\Users\from_\Downloads\test_logs\OstelLogs')
-        self.__lastLogTime_pattern = '\d{4}-[\d-]+\s[\d:]+'
-        self.__pid_pattern = 'PID\s\d+'
+    def __init__(self, lyrixLogs_path: Path | None = None, ostelLogs_path: Path | None = None,
+                 use_mmap: bool = False, index_path: Path | None = None,
+                 scan_workers: int | None = None, scan_processes: int | None = None) -> None:
+        # Logs directories are read on first check, so import does not scan them
+        self.lyrixLogs_path = Path(lyrixLogs_path or os.environ.get(
+            'MONITOR_LYRIX_LOGS_PATH', r'C:\Users\from_\Downloads\test_logs\LyrixLogs'))
+        self.ostelLogs_path = Path(ostelLogs_path or os.environ.get(
+            'MONITOR_OSTEL_LOGS_PATH', r'C:\Users\from_\Downloads\test_logs\OstelLogs'))
         self.__logTime_format = '%Y-%m-%d %H:%M:%S'
+        # Read log tails through memory map
+        self.use_mmap = use_mmap or os.environ.get('MONITOR_SCAN_MMAP', '').lower() in ('1', 'true', 'yes')
+
+        # Scan index survives agent restarts if it has path, it is kept only in memory otherwise
+        index_path = index_path or os.environ.get('MONITOR_SCAN_INDEX_PATH') or None
+
+        # Services are scanned in parallel threads, regex work of big logs can run in processes
+        self.scan_workers = scan_workers or int(os.environ.get('MONITOR_SCAN_WORKERS', 4))
+        scan_processes = scan_processes if scan_processes is not None else int(
+            os.environ.get('MONITOR_SCAN_PROCESSES', 0))
+        self.__scan_pool: ThreadPoolExecutor | None = None  # Started by the first check
+        self.__scan_poolLock = Lock()
+
+        # Last PID, log time and errors by log file, only new bytes are parsed on next check
+        self.__scan_index = ScanIndex(LogExtractor([TIME_FIELD, PID_FIELD, ERRORS_FIELD]), index_path,
+                                      processes=scan_processes)
+        self.__time_extractor = LogExtractor([TIME_FIELD])  # Log tails are read only for time
+
+        # All live processes are got once per check, last seen process by service name
+        self.__process_table = ProcessTable()
+        self.__service_processes: dict[str, ProcessInfo] = dict()
+
+        # Unnecessary files in Lyrix logs directory, they are not services
+        self.__ignored_files = {'kernelDiag', 'default', 'console'}
+
+        # Lyrix log files by service name, rebuilt only when directory is changed
+        self.__lyrixLogs_index: dict[str, list[tuple[Path, float, int]]] = dict()
+        self.__lyrixLogs_mtime = None
+
+        # Set with Lyrix service names on specific server, filled by first check
+        self.lyrix_services: set[str] = set()
+
+        # Services state from logs, dicts are replaced on change - readers get whole snapshot
+        self.__lyrix_snapshots: dict[str, LyrixSnapshot] = dict()
+        self.__ostel_snapshots: dict[str, datetime] = dict()  # Last log time by service
+        self.__lyrix_lock, self.__ostel_lock = Lock(), Lock()  # One scan of every logs directory at a time
+
+        # Watcher updates snapshots on logs change, status is got without logs scan
+        self.__watcher: LogWatcher | None = None
+        self.__watch_errors: dict[str, Exception] = dict()  # Last refresh error by logs directory
+
+    def __get_lastLogTime(self, log_path: Path, on_read: Callable[[int], None] | None = None) -> datetime:
+        """Get last log time from log, read log blocks from the end until first time match"""
+
+        for block in reverse_blocks(log_path, use_mmap=self.use_mmap, on_read=on_read):
+            while block:
+                log_time = self.__time_extractor.extract(block)[TIME_FIELD.name]
+                if log_time is None:
+                    break
+
+                # Convert last log time in file to datetime object
+                try:
+                    return datetime.strptime(log_time, self.__logTime_format)
+                except ValueError:  # Last line is partially written right now - check lines before it
+                    block = block[:block.rstrip(b'\r\n').rfind(b'\n') + 1]
+
+        raise ValueError(f"There is no log time in {log_path}")
+
+    def __get_serviceName(self, log_name: str) -> str | None:
+        """Lyrix service name is the first word of log name, None for not service files"""
+
+        service_name = re.search(r'\w+', Path(log_name).stem)
+
+        if service_name is None or service_name.group() in self.__ignored_files:
+            return None
 
-        # List with Lyrix service names on specific server
-        self.lyrix_services: list[str] = [re.search(r'\w+', log.stem).group()
-                                          for log in self.__LyrixLogs_path.iterdir()]
+        return service_name.group()
 
-        # Remove dublicates from secrvices list
-        self.lyrix_services: set[str] = set(self.lyrix_services)
+    def __index_lyrixLogs(self) -> dict[str, list[tuple[Path, float, int]]]:
+        """Group Lyrix logs by service name in one directory pass
 
-        # Remove unnecessary files from services list
-        if 'kernelDiag' in self.lyrix_services:
-            self.lyrix_services.remove('kernelDiag')
-        if 'default' in self.lyrix_services:
-            self.lyrix_services.remove('default')
-        if 'console' in self.lyrix_services:
-            self.lyrix_services.remove('console')
+        Directory modification time changes only when logs are created, removed
+        or renamed, so the index is rebuilt only after log rotation or when new
+        service appears. Log modification times and sizes are from this pass
+        """
 
-    def __get_lastLogTime(self, log_path: Path) -> datetime:
-        """Get last log time from log"""
+        directory_mtime = stat(self.lyrixLogs_path).st_mtime_ns
+        if directory_mtime == self.__lyrixLogs_mtime:
+            return self.__lyrixLogs_index
 
-        # Opens log with 'cp866' encoding for Russian symbols support
-        with open(log_path, mode='r', encoding='cp866') as log:
-            for line in log:  # Check for last log time, rewrite until last occurrence
-                log_timeMatch = re.match(self.__lastLogTime_pattern, line)
-                if log_timeMatch is not None:
-                    last_logTime = log_timeMatch.group()
+        lyrixLogs_index: dict[str, list[tuple[Path, float, int]]] = dict()
 
-            # Convert last log time string in file to datetime object
-            last_logTime: datetime = datetime.strptime(
-                last_logTime, self.__logTime_format)
+        # Stat results are cached by DirEntry - no extra system call for every log
+        with scandir(self.lyrixLogs_path) as directory:
+            for entry in directory:
+                service_name = self.__get_serviceName(entry.name)
+                if service_name is None:
+                    continue
 
-            return last_logTime
+                entry_stat = entry.stat()
+                lyrixLogs_index.setdefault(service_name, []).append(
+                    (Path(entry.path), entry_stat.st_mtime, entry_stat.st_size))
+
+        # Sort logs by modification date in reverse order
+        for service_logs in lyrixLogs_index.values():
+            service_logs.sort(key=itemgetter(1), reverse=True)
+
+        self.__lyrixLogs_index, self.__lyrixLogs_mtime = lyrixLogs_index, directory_mtime
+        self.lyrix_services = set(lyrixLogs_index)
+
+        return lyrixLogs_index
 
     def __generate_currentLyrixLogs(self) -> dict[str, list[Path]]:
         """Generate current Lyrix service log paths in directory - they can change by time"""
 
-        # Dict with service names and empty lists of log paths
-        lyrix_logs = {service_name: [] for service_name in self.lyrix_services}
+        return {service_name: [log_path for log_path, _, _ in service_logs]
+                for service_name, service_logs in self.__index_lyrixLogs().items()}
 
-        # Fill list of log paths with paths currently presents in directory
-        for service_name in self.lyrix_services:
-            for log_path in self.__LyrixLogs_path.iterdir():
-                if service_name in log_path.stem and log_path.stem != 'kernelDiag':
-                    lyrix_logs[service_name].append(log_path)
+    def __get_processStatus(self, service_name: str, pid: int, log_time: str | None,
+                            processes: dict[int, ProcessInfo]) -> str:
+        """Check if process with PID from log is alive and it is still the service process"""
 
-        # Sort logs paths by modification date in reverse order
-        for logs_pathsList in lyrix_logs.values():
-            logs_pathsList.sort(key=modification_date, reverse=True)
+        process = processes.get(pid)
+        if process is None:
+            return 'Down'
 
-        return lyrix_logs
+        # Same PID, but other name or start time - PID is reused by other process
+        known_process = self.__service_processes.get(service_name)
+        if known_process is not None and known_process.pid == pid and known_process != process:
+            return 'Down'
 
-    def get_lyrixServices_status(self) -> dict[str, tuple[str]]:
-        """Get current lyrix service statuses by check process activity and last log time"""
+        # Process started after last log with this PID was written - it is not a service process
+        if log_time is not None and process.start_time is not None:
+            if process.start_time > datetime.strptime(log_time, self.__logTime_format) + timedelta(minutes=1):
+                return 'Down'
 
-        lyrixServices_status: dict[str, tuple] = dict()  # Result variable
+        self.__service_processes[service_name] = process
 
-        # Iterate over services in modification date order, check logs for PID pattern
-        for service_name, logs_pathsList in self.__generate_currentLyrixLogs().items():
-            pid = None
+        return 'Up'
 
-            for log_path in logs_pathsList:
+    def __scan_lyrixService(self, service_name: str, logs_pathsList: list[Path]) -> LyrixSnapshot:
+        """Get last PID and log times of one service from its logs, newest log first"""
 
-                # Check last modificated log and get last log time
-                if logs_pathsList.index(log_path) == 0:
-                    last_logTime = self.__get_lastLogTime(log_path)
-                    last_logTime = last_logTime.strftime(self.__logTime_format)
+        started, indexBytes_before, tail_bytes = perf_counter(), self.__scan_index.bytes_read, Counter()
+        pid, log_time = None, None
 
-                # Open log and check for PID, example: PID 13813
-                with open(log_path, mode='r') as log:
-                    for line in log:  # Rewrite pid by last occurrence in log
-                        pid_match = re.search(self.__pid_pattern, line)
-                        if pid_match is not None:
-                            pid: str = pid_match.group().split()[1]
+        for log_path in logs_pathsList:
 
-                # Check if pid found and find process, move to next log otherwise. Write status result
-                if pid is None:
-                    lyrixServices_status[service_name] = 'pid not found', last_logTime
+            # Get last PID from log, example: PID 13813. Log is parsed from last scan offset
+            log_fields = self.__scan_index.scan(log_path)
+            pid, log_time = log_fields[PID_FIELD.name], log_fields[TIME_FIELD.name]
+
+            # Check last modificated log and get last log time
+            if log_path == logs_pathsList[0]:
+                errors = log_fields[ERRORS_FIELD.name]
+                log_errors.labels(service_name).set(errors)
+                if log_time is None:  # No complete line with time yet - check log tail
+                    last_logTime = self.__get_lastLogTime(log_path, tail_bytes.inc)
+                    last_logTime = last_logTime.strftime(self.__logTime_format)
                 else:
-                    # Run cmd process check and support Russian language
-                    process_check: str = popen(
-                        f'tasklist /fi "pid eq {pid}"').read()
-                    process_check: str = process_check.encode(
-                        'cp1251').decode('cp866')
+                    last_logTime = log_time
 
-                    # Determinate status by cmd response
-                    process_status = 'Up' if re.search(
-                        '=+', process_check) else 'Down'
+            # Move to next log if pid is not found
+            if pid is not None:
+                break
 
-                    lyrixServices_status[service_name] = process_status, last_logTime
-                    break
+        check_seconds.labels('log_scan', service_name).observe(perf_counter() - started)
+        scan_bytes.labels(service_name).observe(
+            self.__scan_index.bytes_read - indexBytes_before + tail_bytes.value)
+
+        return LyrixSnapshot(logs_pathsList[0], pid, log_time, last_logTime, errors)
+
+    def __scan_services(self, scan: Callable[[str, Any], Any], services: list[tuple[str, Any]]) -> list:
+        """Scan every service in thread pool, results are in services order and the first error is raised"""
+
+        if self.scan_workers <= 1 or len(services) <= 1:
+            return [scan(service_name, logs) for service_name, logs in services]
+
+        with self.__scan_poolLock:
+            if self.__scan_pool is None:
+                self.__scan_pool = ThreadPoolExecutor(self.scan_workers, thread_name_prefix='log_scan')
+
+        return list(self.__scan_pool.map(lambda service: scan(*service), services))
+
+    def __refresh_lyrixSnapshots(self, services: set[str] | None = None) -> None:
+        """Scan logs of given services or all services, only new bytes of logs are parsed"""
+
+        with self.__lyrix_lock:
+            lyrix_logs = self.__generate_currentLyrixLogs()
+            old_snapshots = self.__lyrix_snapshots
+
+            changed_services = [(service_name, logs_pathsList) for service_name, logs_pathsList in lyrix_logs.items()
+                                if services is None or service_name in services or service_name not in old_snapshots]
+            snapshots = dict(zip([service_name for service_name, _ in changed_services],
+                                 self.__scan_services(self.__scan_lyrixService, changed_services)))
+
+            # Services are kept in directory order, not changed services keep old snapshot
+            self.__lyrix_snapshots = {service_name: snapshots.get(service_name) or old_snapshots[service_name]
+                                      for service_name in lyrix_logs}
+
+            for service_name in old_snapshots.keys() - self.__lyrix_snapshots.keys():
+                log_errors.remove(service_name)
+
+            # Forget rotated away logs and keep index on disk for agent restarts
+            self.__scan_index.prune([log_path for logs_pathsList in lyrix_logs.values()
+                                     for log_path in logs_pathsList])
+            self.__scan_index.save()
+
+    def get_lyrixServices_status(self) -> dict[str, tuple[str]] | str:
+        """Get current lyrix service statuses by check process activity and last log time"""
+
+        if not self.lyrixLogs_path.exists():
+            return 'Lyrix services does not exist on this server'
+
+        # Watcher keeps snapshots up to date, without it logs are scanned now
+        if self.__watcher is None:
+            self.__refresh_lyrixSnapshots()
+        elif 'lyrix' in self.__watch_errors:
+            raise self.__watch_errors['lyrix']
+
+        lyrixServices_status: dict[str, tuple] = dict()  # Result variable
+        processes = self.__process_table.snapshot()  # One process table call for all services
+
+        # Write status result, process of service is found by the last PID from logs
+        for service_name, snapshot in self.__lyrix_snapshots.items():
+            if snapshot.pid is None:
+                lyrixServices_status[service_name] = 'pid not found', snapshot.last_logTime
+            else:
+                process_status = self.__get_processStatus(
+                    service_name, int(snapshot.pid), snapshot.pid_logTime, processes)
+                lyrixServices_status[service_name] = process_status, snapshot.last_logTime
 
         return lyrixServices_status
 
+    def __scan_ostelService(self, service_name: str, log_path: Path) -> datetime:
+        started, tail_bytes = perf_counter(), Counter()
+        last_logTime = self.__get_lastLogTime(log_path, tail_bytes.inc)
+        check_seconds.labels('log_scan', service_name).observe(perf_counter() - started)
+        scan_bytes.labels(service_name).observe(tail_bytes.value)
+
+        return last_logTime
+
+    def __refresh_ostelSnapshots(self, log_names: set[str] | None = None) -> None:
+        """Get last log time from given logs or all logs"""
+
+        with self.__ostel_lock:
+            if log_names is None:
+                # Generate current ostel service log paths in directory - they can change by time
+                ostel_logs = [(log_path.stem, log_path) for log_path in self.ostelLogs_path.iterdir()
+                              if log_path.suffix == '.log']
+                ostel_snapshots = dict()
+            else:
+                ostel_logs = []
+                ostel_snapshots = dict(self.__ostel_snapshots)
+
+                for log_path in (self.ostelLogs_path / log_name for log_name in log_names):
+                    if log_path.suffix != '.log':
+                        continue
+
+                    if log_path.is_file():
+                        ostel_logs.append((log_path.stem, log_path))
+                    else:  # Log was removed or renamed
+                        ostel_snapshots.pop(log_path.stem, None)
+
+            ostel_snapshots.update(zip([service_name for service_name, _ in ostel_logs],
+                                       self.__scan_services(self.__scan_ostelService, ostel_logs)))
+            self.__ostel_snapshots = ostel_snapshots
+
     def get_ostelServices_status(self) -> dict[str, tuple[str]] | str:
         """Get current ostel service statuses by check last log time"""
 
@@ -115,14 +315,15 @@ class ServicesChecker:
         timedelta_30m = timedelta(minutes=30)
         timedelta_180m = timedelta(minutes=120)
 
-        if self.__OstelLogs_path.exists():
+        if self.ostelLogs_path.exists():
 
-            # Generate current ostel service log paths in directory - they can change by time
-            ostel_logs = {
-                log_path.stem: log_path for log_path in self.__OstelLogs_path.iterdir() if log_path.suffix == '.log'}
+            # Watcher keeps snapshots up to date, without it logs are scanned now
+            if self.__watcher is None:
+                self.__refresh_ostelSnapshots()
+            elif 'ostel' in self.__watch_errors:
+                raise self.__watch_errors['ostel']
 
-            for service_name, log_path in ostel_logs.items():
-                last_logTime = self.__get_lastLogTime(log_path)
+            for service_name, last_logTime in self.__ostel_snapshots.items():
                 last_logTime_str = last_logTime.strftime(self.__logTime_format)
 
                 # Check if last log was less than 30 minutes ago
@@ -140,5 +341,49 @@ class ServicesChecker:
         else:
             return 'Ostel services does not exist on this server'
 
+    @property
+    def is_watching(self) -> bool:
+        return self.__watcher is not None
+
+    def watch(self, poll_interval: float = 2.0) -> None:
+        """Keep services snapshots up to date by logs changes, statuses are got without logs scan"""
+
+        if self.__watcher is not None:
+            return
+
+        # Snapshots are filled before the first watcher event - statuses are never empty after watch
+        for logs_path in (self.lyrixLogs_path, self.ostelLogs_path):
+            if logs_path.exists():
+                self.__on_logsChange(logs_path, None)
+
+        self.__watcher = LogWatcher([self.lyrixLogs_path, self.ostelLogs_path],
+                                    self.__on_logsChange, poll_interval)
+        self.__watcher.start()
+
+    def unwatch(self) -> None:
+        """Stop watcher, logs are scanned by every status request again"""
+
+        if self.__watcher is not None:
+            self.__watcher.stop()
+            self.__watcher = None
+            self.__watch_errors.clear()
+
+    def __on_logsChange(self, directory: Path, names: set[str] | None) -> None:
+        """Refresh snapshots of changed services, None names - all services of directory"""
+
+        try:
+            if directory == self.lyrixLogs_path:
+                kind = 'lyrix'
+                services = None if names is None else {
+                    service_name for service_name in map(self.__get_serviceName, names) if service_name is not None}
+                self.__refresh_lyrixSnapshots(services)
+            else:
+                kind = 'ostel'
+                self.__refresh_ostelSnapshots(names)
+        except Exception as error:  # Any error is raised by next status request - snapshots are not silently stale
+            self.__watch_errors[kind] = error
+        else:
+            self.__watch_errors.pop(kind, None)
+
 
 services_checker = ServicesChecker()
@@ -0,0 +1,344 @@
+from collections.abc import Callable
+from threading import Thread, Lock
+from datetime import datetime
+from itertools import count
+from time import monotonic
+import asyncio
+import os
+
+from metrics import metrics
+from timers import TimerWheel
+import protocol
+
+
+agent_rtt = metrics.histogram('agent_rtt_seconds', "Agent request round trip time with agent check")
+heartbeat_timeouts = metrics.counter('agent_heartbeat_timeouts_total', "Agents lost without heartbeats", ('agent',))
+
+
+class Agent:
+    """Connected agent, requests are matched with responses by request id"""
+
+    def __init__(self, hostname: str, reader: asyncio.StreamReader,
+                 writer: asyncio.StreamWriter) -> None:
+        self.hostname = hostname
+        self.reader = reader
+        self.writer = writer
+        self.address = '{}:{}'.format(*writer.get_extra_info('peername')[:2])
+        self.connected_at = datetime.now()
+        self.last_reply: datetime | None = None
+
+        self.requests: dict[int, asyncio.Future] = dict()  # Requests waiting for response
+        self.sent_at: dict[int, float] = dict()  # Monotonic send time by request id
+        self.pending: dict[str, asyncio.Future] = dict()  # Request in progress by command
+        self.__request_ids = count(1)
+
+        # Statuses built from agent pushes and sequence of the last applied push
+        self.state: dict = dict()
+        self.push_seq = 0
+        self.push_interval: float | None = None
+        self.last_push: float | None = None
+
+        # Agent which sends heartbeats is lost if it is silent until deadline
+        self.heartbeat_interval: float | None = None
+        self.deadline: float | None = None
+
+    @property
+    def is_pushing(self) -> bool:
+        """Agent works in push mode and its statuses are fresh"""
+
+        return (self.last_push is not None and self.push_interval is not None
+                and monotonic() - self.last_push < self.push_interval * 3)
+
+    def request(self, command: str, binary: bool = False) -> asyncio.Future:
+        """Send command or join the same command which is still waiting for response"""
+
+        future = self.pending.get(command)
+        if future is not None and not future.done():
+            return future
+
+        request_id = next(self.__request_ids) & 0xFFFFFFFF
+        future = asyncio.get_running_loop().create_future()
+        self.requests[request_id] = self.pending[command] = future
+        self.sent_at[request_id] = monotonic()
+
+        self.writer.write(protocol.encode_frame(
+            protocol.REQUEST, request_id, command, binary=binary))
+
+        return future
+
+    def handle_frame(self, frame: protocol.Frame) -> None:
+        """Complete request by its response frame or apply push"""
+
+        self.last_reply = datetime.now()
+
+        if frame.type == protocol.HEARTBEAT:
+            self.heartbeat_interval = frame.body
+            return
+
+        if frame.type == protocol.PUSH:
+            self.__apply_push(frame)
+            return
+
+        future = self.requests.pop(frame.request_id, None)
+        sent_at = self.sent_at.pop(frame.request_id, None)
+
+        if sent_at is not None:
+            agent_rtt.labels().observe(monotonic() - sent_at)
+
+        if future is not None and not future.done():
+            # Error response is reported as missing result
+            future.set_result(frame.body if frame.type == protocol.RESPONSE else None)
+
+    def __apply_push(self, frame: protocol.Frame) -> None:
+        """Apply statuses delta if it is based on current statuses, ask for full statuses otherwise"""
+
+        push = frame.body
+
+        if push['full']:
+            self.state = protocol.apply_delta(dict(), push['delta'])
+        elif push['base'] == self.push_seq:
+            self.state = protocol.apply_delta(self.state, push['delta'])
+        else:  # Server missed some push or was restarted
+            self.writer.write(protocol.encode_frame(protocol.ACK, frame.request_id, protocol.RESYNC))
+            return
+
+        self.push_seq, self.push_interval, self.last_push = frame.request_id, push['interval'], monotonic()
+        self.writer.write(protocol.encode_frame(protocol.ACK, frame.request_id, None))
+
+    def disconnect(self) -> None:
+        """Complete all requests without result"""
+
+        for future in self.requests.values():
+            if not future.done():
+                future.set_result(None)
+        self.requests.clear()
+        self.sent_at.clear()
+
+
+class AgentServer:
+    """Asyncio listener for agents, one event loop thread for all connections"""
+
+    def __init__(self, host: str = '0.0.0.0', port: int = 9186, poll_deadline: float = 30,
+                 hello_timeout: float = 10, binary: bool = False,
+                 heartbeat_interval: float = 5, heartbeat_misses: int = 3,
+                 lost_expiry: float = 24 * 3600) -> None:
+        self.host = host
+        self.port = port
+        self.poll_deadline = poll_deadline  # Seconds to wait for every agent reply
+        self.hello_timeout = hello_timeout  # Seconds to wait for agent host name
+        self.binary = binary  # Ask agents for compact binary responses instead of JSON
+
+        # Heartbeats are sent to agents every interval, agent is lost after missed heartbeats
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_misses = heartbeat_misses
+        # Lost agent is reported without reply for lost_expiry seconds, then decommissioned host is forgotten
+        self.lost_expiry = lost_expiry
+        self.on_lost: Callable[[str, float], None] | None = None  # Gets host name and silence seconds
+
+        self.__agents: dict[str, Agent] = dict()  # Connected agents by host name
+        self.__lost: dict[str, float] = dict()  # Monotonic loss time of agents lost without heartbeats
+        self.__wheel = TimerWheel(tick=min(1.0, heartbeat_interval))  # Agents deadlines, used only in event loop
+        self.__started_at = None
+        self.__loop = None
+        self.__server = None
+        self.__heartbeats = None  # Heartbeats task, cancelled by stop
+        self.__lock = Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return self.__server is not None
+
+    @property
+    def started_at(self) -> datetime | None:
+        return self.__started_at
+
+    def start(self) -> None:
+        """Start event loop thread and listen for agents"""
+
+        with self.__lock:
+            if self.__server is not None:
+                return
+
+            self.__loop = asyncio.new_event_loop()
+            Thread(target=self.__loop.run_forever, name='agent_server', daemon=True).start()
+
+            try:
+                self.__server = self.__call(asyncio.start_server(
+                    self.__handle_agent, self.host, self.port))
+            except OSError:  # Port is already in use
+                self.__loop.call_soon_threadsafe(self.__loop.stop)
+                self.__loop = None
+                raise
+
+            self.__started_at = datetime.now()
+            self.__heartbeats = asyncio.run_coroutine_threadsafe(self.__watch_heartbeats(), self.__loop)
+
+    def stop(self) -> None:
+        """Close listener and all agent connections"""
+
+        with self.__lock:
+            if self.__server is None:
+                return
+
+            self.__heartbeats.cancel()
+            self.__call(self.__close())
+            self.__loop.call_soon_threadsafe(self.__loop.stop)
+            self.__server = self.__loop = self.__started_at = self.__heartbeats = None
+
+    def clients(self) -> list[Agent]:
+        """Get connected agents"""
+
+        if self.__server is None:
+            return []
+
+        return self.__call(self.__get_agents())
+
+    def poll_all(self, deadline: float | None = None) -> dict[str, tuple | None]:
+        """Request services statuses from all agents in parallel
+
+        Every agent has deadline seconds to reply. Agents which do not reply in
+        time have None result, so slow agents do not delay others
+        """
+
+        if self.__server is None:
+            return dict()
+
+        return self.__call(self.__poll_all(deadline or self.poll_deadline))
+
+    def __call(self, coroutine):
+        """Run coroutine in agent server loop and wait for result"""
+
+        return asyncio.run_coroutine_threadsafe(coroutine, self.__loop).result()
+
+    async def __get_agents(self) -> list[Agent]:
+        return list(self.__agents.values())
+
+    async def __close(self) -> None:
+        self.__server.close()
+        for agent in list(self.__agents.values()):
+            agent.writer.close()
+        await self.__server.wait_closed()
+
+    async def __poll_all(self, deadline: float) -> dict[str, tuple | None]:
+        # Agents in push mode already sent their statuses - request only others
+        pushed = {agent.hostname: (agent.state.get('lyrix', dict()), agent.state.get('ostel', dict()))
+                  for agent in self.__agents.values() if agent.is_pushing}
+        requests = {agent.hostname: agent.request('services_statuses', self.binary)
+                    for agent in self.__agents.values() if not agent.is_pushing}
+
+        if requests:
+            await asyncio.wait(requests.values(), timeout=deadline)
+
+        # Lost agents have no reply until they connect again or their loss expires
+        now = monotonic()
+        for hostname, lost_at in list(self.__lost.items()):
+            if now - lost_at >= self.lost_expiry:
+                del self.__lost[hostname]
+
+        # Done requests have statuses, requests in progress stay pending for late replies
+        return dict.fromkeys(self.__lost) | pushed | {
+            hostname: tuple(request.result()) if request.done() and request.result() else None
+            for hostname, request in requests.items()}
+
+    async def __watch_heartbeats(self) -> None:
+        """Send heartbeats to agents and find agents which missed their deadlines"""
+
+        next_heartbeat = last_tick = monotonic()
+
+        while True:
+            await asyncio.sleep(self.__wheel.tick)
+            now = monotonic()
+
+            # Server itself was paused - agents frames can still wait in sockets
+            stalled = now - last_tick > self.__wheel.tick * 2
+            last_tick = now
+
+            if now >= next_heartbeat:  # One frame for all agents
+                heartbeat = protocol.encode_frame(protocol.HEARTBEAT, 0, self.heartbeat_interval)
+                for agent in self.__agents.values():
+                    agent.writer.write(heartbeat)
+                next_heartbeat = now + self.heartbeat_interval
+
+            for agent in self.__wheel.advance(now):
+                if agent.deadline > now:  # Agent sent frames after timer was set
+                    self.__wheel.schedule(agent, agent.deadline)
+                elif stalled:
+                    self.__wheel.schedule(agent, now + agent.heartbeat_interval * self.heartbeat_misses)
+                elif self.__agents.get(agent.hostname) is agent:
+                    self.__lose_agent(agent, now)
+                else:  # Agent already reconnected
+                    agent.writer.close()
+
+    def __touch(self, agent: Agent) -> None:
+        """Move deadline of agent which sends heartbeats, timer is moved only when it expires"""
+
+        if agent.heartbeat_interval is None:  # Agent of old version - it is found by TCP only
+            return
+
+        agent.deadline = monotonic() + agent.heartbeat_interval * self.heartbeat_misses
+        if agent not in self.__wheel:
+            self.__wheel.schedule(agent, agent.deadline)
+
+    def __lose_agent(self, agent: Agent, now: float) -> None:
+        """Close connection of silent agent, it is reported without reply until it connects again
+
+        on_lost prints and writes logs - it runs in executor thread, so other agents are not delayed
+        """
+
+        silence = now - agent.deadline + agent.heartbeat_interval * self.heartbeat_misses
+        heartbeat_timeouts.labels(agent.hostname).inc()
+        self.__lost[agent.hostname] = now
+        agent.writer.close()
+
+        if self.on_lost is not None:
+            asyncio.get_running_loop().run_in_executor(None, self.on_lost, agent.hostname, silence)
+
+    async def __handle_agent(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Register agent by host name from HELLO frame and read its responses"""
+
+        decoder = protocol.FrameDecoder()
+        frames = []
+
+        try:  # First frame from agent is its host name
+            while not frames:
+                data = await asyncio.wait_for(reader.read(65536), self.hello_timeout)
+                if not data:
+                    break
+                frames = decoder.feed(data)
+        except (asyncio.TimeoutError, ConnectionError, protocol.ProtocolError):
+            frames = []
+
+        if not frames or frames[0].type != protocol.HELLO:
+            writer.close()
+            return
+
+        agent = Agent(str(frames[0].body), reader, writer)
+        self.__lost.pop(agent.hostname, None)
+
+        # Agent reconnected - close previous connection
+        previous_agent = self.__agents.get(agent.hostname)
+        if previous_agent is not None:
+            previous_agent.writer.close()
+        self.__agents[agent.hostname] = agent
+
+        try:
+            for frame in frames[1:]:
+                agent.handle_frame(frame)
+            self.__touch(agent)
+
+            while data := await reader.read(65536):
+                for frame in decoder.feed(data):
+                    agent.handle_frame(frame)
+                self.__touch(agent)
+
+        except (ConnectionError, protocol.ProtocolError, KeyError, TypeError):
+            pass
+        finally:
+            writer.close()
+            agent.disconnect()
+            self.__wheel.cancel(agent)
+            if self.__agents.get(agent.hostname) is agent:
+                del self.__agents[agent.hostname]
+
+
+agent_server = AgentServer(lost_expiry=float(os.environ.get('MONITOR_AGENT_LOST_EXPIRY', 24 * 3600)))
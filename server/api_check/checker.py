@@ -1,53 +1,107 @@
-from urllib.request import urlopen
-from urllib.error import HTTPError, URLError
-from time import time
+import os
+
+from api_check.engine import HTTPEngine, HTTPResult, ReadTimeout
+from inventory import Inventory, InventoryDiff
+from metrics import metrics
+
+
+check_seconds = metrics.histogram('check_duration_seconds', "Duration of one target check", ('checker',))
+check_failures = metrics.counter('check_failures_total', "Checks with down result", ('checker',))
 
 
 class APIChecker:
     """Class for check http response status"""
 
-    def __init__(self) -> None:
-        self.__api = dict()
-        self.__api_status = dict()
-
-        # Create api:desription dict by parsing api.txt
-        with open(r'api_check\api.txt', 'r', encoding='utf-8') as file:
-            for line in file.readlines():
-                api = line.split()[0]
-                description = ' '.join(line.split()[1:])
-                self.__api[api] = description.strip()
-
-    def http_request(self) -> dict:
-        """Send http request for all servers and get http status codes"""
-
-        # iterate over api list and check http status code
-        for api_url, desc in self.__api.items():
-            try:
-                start_time = time()
-                # send http request and get response
-                with urlopen(api_url) as response:
-
-                    # check open time
-                    end_time = time()
-                    open_time = f"{(end_time - start_time):0.3f}"
-
-                    # Fill dictionary with result tuple
-                    if response.status == 200:
-                        self.__api_status[desc] = 'up', f"response time is {
-                            open_time} sec"
-                    else:
-                        self.__api_status[desc] = 'down', f"response time is {
-                            open_time} sec"
+    def __init__(self, api_path: str | None = None, **engine_options) -> None:
+        # api.txt is read on first use, so import does not fail on missing file
+        self.inventory = Inventory(
+            api_path or os.environ.get('MONITOR_API_PATH', r'api_check\api.txt'), self.__parse_line)
+        self.response_times: dict[str, float] = dict()  # Last response time in seconds by description
+
+        # Asyncio engine with connection pool, timeouts and concurrency limit
+        self.engine = HTTPEngine(**engine_options)
+
+    @staticmethod
+    def __parse_line(line: str) -> tuple[str, str]:
+        """api.txt line is url and description after it"""
+
+        api = line.split()[0]
+        description = ' '.join(line.split()[1:])
+        return api, description.strip()
+
+    def reload(self) -> InventoryDiff | None:
+        """Apply api.txt changes, results of removed api and old descriptions are forgotten"""
+
+        diff = self.inventory.reload()
+
+        if diff is not None:
+            old_descriptions = [*diff.removed.values(), *(old for old, _ in diff.changed.values())]
+            current_descriptions = set(self.inventory.targets.values())
+
+            for desc in old_descriptions:
+                if desc not in current_descriptions:  # Other url can have the same description
+                    self.response_times.pop(desc, None)
+
+        return diff
+
+    @property
+    def apis(self) -> dict[str, str]:
+        """Api urls with descriptions from api.txt"""
+
+        return dict(self.inventory.targets)
+
+    def http_request(self, apis: list[str] | None = None) -> dict:
+        """Send http request for all servers or only given urls and get http status codes"""
+
+        all_apis = self.inventory.targets
+        if apis is None:
+            apis = list(all_apis)
+        apis = [api_url for api_url in apis if api_url in all_apis]
+
+        # Check all api in parallel, one hung api does not stall others
+        responses = self.engine.run(apis)
+        api_status, response_times = dict(), dict()  # Results of this cycle, None - time is unknown
+
+        for api_url, response in responses.items():
+            desc = all_apis[api_url]
+
+            # Fill dictionary with result tuple
+            if isinstance(response, HTTPResult):
+                open_time = f"{response.elapsed:0.3f}"
+                response_times[desc] = response.elapsed
+                check_seconds.labels('http').observe(response.elapsed)
+
+                if response.status == 200:
+                    api_status[desc] = 'up', f"response time is {open_time} sec"
+                elif response.status >= 400:
+                    api_status[desc] = 'down', response.reason
+                else:
+                    api_status[desc] = 'down', f"response time is {open_time} sec"
 
             # Error handlers
-            except HTTPError as error:
-                self.__api_status[desc] = 'down', error.reason
-            except URLError as error:
-                self.__api_status[desc] = 'down', error.reason
-            except TimeoutError as error:
-                self.__api_status[desc] = 'up', 'long delay'
-
-        return self.__api_status
+            elif isinstance(response, ReadTimeout):
+                response_times[desc] = self.engine.read_timeout
+                check_seconds.labels('http').observe(self.engine.read_timeout)
+                api_status[desc] = 'up', 'long delay'
+            else:
+                response_times[desc] = None
+                api_status[desc] = 'down', str(response)
+
+        for api_url in apis:
+            if api_status[all_apis[api_url]][0] == 'down':
+                check_failures.labels('http').inc()
+
+        # Api removed by reload during this cycle are not kept
+        current_descriptions = set(self.inventory.targets.values())
+        for desc, response_time in response_times.items():
+            if desc not in current_descriptions:
+                continue
+            if response_time is None:
+                self.response_times.pop(desc, None)
+            else:
+                self.response_times[desc] = response_time
+
+        return {all_apis[api_url]: api_status[all_apis[api_url]] for api_url in apis}
 
 
 api_checker = APIChecker()
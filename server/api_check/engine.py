@@ -0,0 +1,267 @@
+from urllib.parse import urlsplit, urljoin
+from threading import Thread, Lock
+from time import monotonic
+from typing import NamedTuple
+import asyncio
+import ssl
+
+
+class HTTPResult(NamedTuple):
+    """Final response of one http check"""
+
+    url: str  # Url after redirects
+    status: int
+    reason: str
+    elapsed: float  # Seconds from first connect to response headers
+
+
+class ConnectTimeout(TimeoutError):
+    """Server does not accept connection in connect_timeout"""
+
+
+class ReadTimeout(TimeoutError):
+    """Server does not send response in read_timeout"""
+
+
+class HTTPEngine:
+    """Asyncio http client with keep-alive connection pool per host"""
+
+    REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+    def __init__(self, max_concurrency: int = 50, connect_timeout: float = 5,
+                 read_timeout: float = 10, method: str = 'GET', headers_only: bool = False,
+                 max_redirects: int = 5, max_idle_perHost: int = 4,
+                 keepalive_timeout: float = 30, max_drain: int = 1024 * 1024) -> None:
+        self.max_concurrency = max_concurrency  # Global limit of parallel requests
+        self.connect_timeout = connect_timeout  # Seconds for TCP and TLS handshake
+        self.read_timeout = read_timeout  # Seconds for every read from server
+        self.method = method  # 'GET' or 'HEAD'
+        self.headers_only = headers_only  # Read only status line and headers
+        self.max_redirects = max_redirects
+        self.max_idle_perHost = max_idle_perHost  # Idle connections kept for one host
+        self.keepalive_timeout = keepalive_timeout  # Seconds to keep idle connection
+        self.max_drain = max_drain  # Bigger bodies are not read, connection is closed
+
+        # Idle connections by (scheme, host, port) - (reader, writer, idle since)
+        self.__pool: dict[tuple, list[tuple]] = dict()
+        self.__ssl_context = ssl.create_default_context()
+
+        # Own event loop in background thread, pool lives between checks
+        self.__loop = None
+        self.__loop_lock = Lock()
+
+    def run(self, urls: list[str]) -> dict[str, HTTPResult | Exception]:
+        """Check all urls from synchronous code, waits for results"""
+
+        future = asyncio.run_coroutine_threadsafe(
+            self.check_all(urls), self.__get_loop())
+
+        return future.result()
+
+    def close(self) -> None:
+        """Close idle connections and stop event loop"""
+
+        with self.__loop_lock:
+            if self.__loop is None:
+                return
+
+            asyncio.run_coroutine_threadsafe(
+                self.__close_pool(), self.__loop).result()
+            self.__loop.call_soon_threadsafe(self.__loop.stop)
+            self.__loop = None
+
+    async def check_all(self, urls: list[str]) -> dict[str, HTTPResult | Exception]:
+        """Check urls in parallel under global concurrency limit"""
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def check(url: str) -> HTTPResult | Exception:
+            async with semaphore:
+                try:
+                    return await self.request(url)
+                except (OSError, ValueError, asyncio.IncompleteReadError) as error:
+                    return error
+
+        results = await asyncio.gather(*(check(url) for url in urls))
+
+        return dict(zip(urls, results))
+
+    async def request(self, url: str) -> HTTPResult:
+        """Send request, follow redirects and return final status"""
+
+        start_time = monotonic()
+
+        for _ in range(self.max_redirects + 1):
+            status, reason, headers = await self.__send(url)
+
+            location = headers.get('location')
+            if status not in self.REDIRECT_CODES or location is None:
+                break
+
+            url = urljoin(url, location)
+
+        return HTTPResult(url, status, reason, monotonic() - start_time)
+
+    def __get_loop(self) -> asyncio.AbstractEventLoop:
+        """Start event loop thread on first use"""
+
+        with self.__loop_lock:
+            if self.__loop is None:
+                self.__loop = asyncio.new_event_loop()
+                Thread(target=self.__loop.run_forever,
+                       name='http_engine', daemon=True).start()
+
+            return self.__loop
+
+    async def __close_pool(self) -> None:
+        for connections in self.__pool.values():
+            for _, writer, _ in connections:
+                writer.close()
+        self.__pool.clear()
+
+    async def __acquire(self, key: tuple) -> tuple:
+        """Get idle connection from pool or open new one, flag shows reused connection"""
+
+        connections = self.__pool.get(key, [])
+
+        while connections:
+            reader, writer, idle_since = connections.pop()
+
+            # Skip connections closed by server or idle for too long
+            if reader.at_eof() or monotonic() - idle_since > self.keepalive_timeout:
+                writer.close()
+                continue
+
+            return reader, writer, True
+
+        scheme, host, port = key
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(
+                host, port, ssl=self.__ssl_context if scheme == 'https' else None,
+                server_hostname=host if scheme == 'https' else None), self.connect_timeout)
+        except asyncio.TimeoutError:
+            raise ConnectTimeout(f"connect timeout {self.connect_timeout} sec") from None
+
+        return reader, writer, False
+
+    def __release(self, key: tuple, reader, writer) -> None:
+        """Return connection to pool for next requests on this host"""
+
+        connections = self.__pool.setdefault(key, [])
+
+        if len(connections) < self.max_idle_perHost:
+            connections.append((reader, writer, monotonic()))
+        else:
+            writer.close()
+
+    async def __read(self, coroutine):
+        try:
+            return await asyncio.wait_for(coroutine, self.read_timeout)
+        except asyncio.TimeoutError:
+            raise ReadTimeout(f"read timeout {self.read_timeout} sec") from None
+
+    async def __send(self, url: str) -> tuple[int, str, dict[str, str]]:
+        """Send one request and read response on pooled connection"""
+
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f"unsupported url {url}")
+
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        key = parts.scheme, parts.hostname, port
+        target = parts.path or '/'
+        if parts.query:
+            target += '?' + parts.query
+
+        host = parts.hostname if parts.port is None else f"{parts.hostname}:{port}"
+        request = (f"{self.method} {target} HTTP/1.1\r\n"
+                   f"Host: {host}\r\n"
+                   "User-Agent: skud_monitoring\r\n"
+                   "Accept: */*\r\n"
+                   "Connection: keep-alive\r\n\r\n")
+
+        while True:
+            reader, writer, reused = await self.__acquire(key)
+
+            try:
+                writer.write(request.encode('latin-1'))
+                await self.__read(writer.drain())
+
+                status, reason, headers = await self.__read(self.__read_head(reader))
+                reusable = await self.__read(self.__read_body(reader, status, headers))
+                break
+
+            # Server could close idle connection at any moment - retry on new one
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                if not reused:
+                    raise
+            except BaseException:
+                writer.close()
+                raise
+
+        if reusable:
+            self.__release(key, reader, writer)
+        else:
+            writer.close()
+
+        return status, reason, headers
+
+    @staticmethod
+    async def __read_head(reader: asyncio.StreamReader) -> tuple[int, str, dict[str, str]]:
+        """Read status line and headers"""
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed by server")
+
+        _, status, *reason = status_line.decode('latin-1').split(maxsplit=2)
+        reason = reason[0].strip() if reason else ''
+
+        headers = dict()
+        while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        return int(status), reason, headers
+
+    async def __read_body(self, reader: asyncio.StreamReader, status: int,
+                          headers: dict[str, str]) -> bool:
+        """Drain response body if allowed, return True if connection can be reused"""
+
+        if headers.get('connection', '').lower() == 'close':
+            return False
+
+        # No body for HEAD requests and bodyless statuses
+        if self.method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            return True
+
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            if self.headers_only:
+                return False
+
+            drained = 0
+            while (size := int((await reader.readline()).split(b';')[0], 16)) > 0:
+                drained += size
+                if drained > self.max_drain:
+                    return False
+                await reader.readexactly(size + 2)
+
+            # Skip trailers
+            while await reader.readline() not in (b'\r\n', b'\n', b''):
+                pass
+
+            return True
+
+        if 'content-length' in headers:
+            length = int(headers['content-length'])
+            if length == 0:
+                return True
+            if self.headers_only or length > self.max_drain:
+                return False
+
+            await reader.readexactly(length)
+            return True
+
+        # Body until connection close
+        return False
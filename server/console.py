@@ -1,7 +1,12 @@
+from time import perf_counter
+started = perf_counter()  # Startup time is measured from here to the first prompt
+
 from threading import Thread
 
 # Import application modules
 from monitor import monitor
+from agents import agent_server
+from metrics import metrics, metrics_exporter
 from pretifier import rich
 from logger import logger
 
@@ -18,9 +23,15 @@ class Console:
             'status': "Show current monitor status",
             'delay': "Show system monitoring delay",
             'delay |minutes|': "Change system monitoring delay to (minutes)",
+            'interval |target| |minutes|': "Change check interval of one target to (minutes)",
+
+            'dashboard': "Show live table of all targets, Enter returns to console",
+            'history |target| |hours|': "Show target availability and response time for n hours (24 by default)",
 
             'server': "Show current server status",
             'clients': 'Show current connected clients',
+            'metrics': "Show the slowest checkers, agents round trip and check counters",
+            'shards |processes|': "Check servers and api in n processes (0 - in this process)",
         }
 
     def show_commands(self) -> None:
@@ -85,8 +96,36 @@ class Console:
                         # Command argument is empty
                         else:
                             monitor.show_delay()
+                    case 'interval':
+                        interval_args = self.__command.split()[1:]
+                        if len(interval_args) >= 2 and interval_args[-1].isdigit():
+                            monitor.change_interval(' '.join(interval_args[:-1]), int(interval_args[-1]))
+                        else:
+                            print('\n')
+                            rich.show("Interval has to be: interval |target| |minutes|", lvl='warning')
+                            print('\n')
+                    case 'dashboard': monitor.show_dashboard()
+                    case 'history':
+                        # Target can contain spaces, last argument is hours if it is integer
+                        history_args = self.__command.split()[1:]
+                        if len(history_args) >= 2 and history_args[-1].isdigit():
+                            monitor.show_history(' '.join(history_args[:-1]), int(history_args[-1]))
+                        elif history_args:
+                            monitor.show_history(' '.join(history_args))
+                        else:
+                            print('\n')
+                            rich.show("History target is not specified", lvl='warning')
+                            print('\n')
                     case 'server': monitor.server_status()
                     case 'clients': monitor.server_clients()
+                    case 'metrics': monitor.show_metrics()
+                    case 'shards':
+                        if command_arg is not None and command_arg.isdigit():
+                            monitor.enable_shards(int(command_arg))
+                        else:
+                            print('\n')
+                            rich.show("Shards processes count has to be integer", lvl='warning')
+                            print('\n')
 
             except KeyboardInterrupt:
                 self.__command = 'exit'
@@ -99,7 +138,27 @@ if __name__ == '__main__':
     admin_console = Console()
     logger.log.debug("Proram was started")
 
+    try:  # Listen for agents connections in background
+        agent_server.start()
+        logger.log.debug(f"Server is listening on {agent_server.host}:{agent_server.port}")
+    except OSError as error:
+        rich.show(f"Server can't listen on {agent_server.host}:{agent_server.port} - {error}", lvl='error')
+        logger.log.error(f"Server can't listen on {agent_server.host}:{agent_server.port} - {error}")
+
+    try:  # Prometheus endpoint
+        metrics_exporter.start()
+        logger.log.debug(f"Metrics are exported on {metrics_exporter.host}:{metrics_exporter.port}/metrics")
+    except OSError as error:
+        rich.show(f"Metrics can't be exported on {metrics_exporter.host}:{metrics_exporter.port} - {error}",
+                  lvl='error')
+        logger.log.error(f"Metrics can't be exported on {metrics_exporter.host}:{metrics_exporter.port} - {error}")
+
     print('\n')
     rich.show("Available commands:", lvl='system')
     admin_console.show_commands()
+
+    startup_time = perf_counter() - started
+    metrics.gauge('startup_seconds', "Time from program start to the first prompt").labels().set(startup_time)
+    logger.log.debug(f"Program was started in {startup_time * 1000:0.0f} ms")
+
     admin_console.commands_handler()
@@ -0,0 +1,83 @@
+from collections.abc import Callable
+from typing import NamedTuple
+from threading import Lock
+import os
+
+
+class InventoryDiff(NamedTuple):
+    added: dict[str, str]  # Target: description
+    removed: dict[str, str]
+    changed: dict[str, tuple[str, str]]  # Target: (old description, new description)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+
+class Inventory:
+    """Targets file like servers.txt or api.txt, it is read again only after it changes
+
+    File change is found by one stat call - modification time, size and inode.
+    Changed file is parsed into a new dict, so readers of the old one are not
+    disturbed, and only added, removed and changed targets are reported
+    """
+
+    def __init__(self, path: str, parse_line: Callable[[str], tuple[str, str]]) -> None:
+        self.path = path
+        self.parse_line = parse_line  # Line to (target, description)
+
+        self.__targets: dict[str, str] | None = None  # Read on first use
+        self.__signature = None
+        self.__lock = Lock()
+
+    @property
+    def targets(self) -> dict[str, str]:
+        """Targets with descriptions in file order, dict is never changed after read"""
+
+        with self.__lock:
+            if self.__targets is None:
+                self.__signature = self.__get_signature()
+                self.__targets = self.__read()
+
+            return self.__targets
+
+    def reload(self) -> InventoryDiff | None:
+        """Read file again if it was changed, None if it was not changed
+
+        File which was missing or broken before is read now - all its targets are added
+        """
+
+        with self.__lock:
+            signature = self.__get_signature()
+            if self.__targets is not None and signature == self.__signature:
+                return None
+
+            targets = self.__read()  # Broken file raises and old targets stay
+            old_targets, self.__targets, self.__signature = self.__targets or dict(), targets, signature
+
+        return InventoryDiff(
+            {target: targets[target] for target in targets.keys() - old_targets.keys()},
+            {target: old_targets[target] for target in old_targets.keys() - targets.keys()},
+            {target: (old_targets[target], targets[target]) for target in targets.keys() & old_targets.keys()
+             if old_targets[target] != targets[target]})
+
+    def __get_signature(self) -> tuple[int, int, int]:
+        file_stat = os.stat(self.path)
+        return file_stat.st_mtime_ns, file_stat.st_size, file_stat.st_ino
+
+    def __read(self) -> dict[str, str]:
+        targets = dict()
+
+        with open(self.path, 'r', encoding='utf-8') as file:
+            for line_number, line in enumerate(file, 1):
+                if not line.strip():
+                    continue
+
+                try:
+                    target, description = self.parse_line(line)
+                except (ValueError, IndexError):
+                    raise ValueError(f"{self.path} line {line_number} is broken: {line.strip()}") from None
+
+                targets[target] = description
+
+        return targets
@@ -1,21 +1,148 @@
+from logging.handlers import QueueHandler
+from threading import Thread, Event
+from datetime import datetime
+from queue import Queue, Empty
+from time import time
 import logging
+import atexit
+import json
+import sys
+import os
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line for machine parsing"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps({
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'message': record.getMessage(),
+            'thread': record.threadName,
+        }, ensure_ascii=False)
+
+
+class BatchWriter:
+    """Background writer - takes records from queue, writes them by batches and rotates file
+
+    File is rotated when it is bigger than max_bytes or older than rotate_interval
+    seconds, backup_count old files are kept as logs.log.1, logs.log.2 ...
+    """
+
+    def __init__(self, queue: Queue, filename: str, formatter: logging.Formatter,
+                 max_bytes: int = 10 * 1024 * 1024, rotate_interval: float = 24 * 3600,
+                 backup_count: int = 7, batch_size: int = 512, flush_interval: float = 1.0) -> None:
+        self.queue = queue
+        self.filename = filename
+        self.formatter = formatter
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self.batch_size = batch_size  # Max records in one write
+        self.flush_interval = flush_interval  # Max seconds record waits in queue
+
+        self.__stop = Event()
+        self.__file = None
+        self.__opened_at = None
+        self.__thread = Thread(target=self.__write_loop, name='log_writer', daemon=True)
+
+    def start(self) -> None:
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """Write all queued records and close file"""
+
+        self.__stop.set()
+        self.__thread.join()
+
+    def __write_loop(self) -> None:
+        while not self.__stop.is_set() or not self.queue.empty():
+            try:  # Wait for first record of batch
+                batch = [self.queue.get(timeout=self.flush_interval)]
+            except Empty:
+                continue
+
+            # Take all records which are already in queue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except Empty:
+                    break
+
+            self.__write(batch)
+
+        self.__close()
+
+    def __write(self, batch: list[logging.LogRecord]) -> None:
+        lines = []
+        for record in batch:
+            try:
+                lines.append(self.formatter.format(record) + '\n')
+            except (TypeError, ValueError):  # Broken message arguments - skip record
+                continue
+
+        try:
+            if self.__file is None or self.__should_rotate():
+                self.__rotate()
+
+            self.__file.write(''.join(lines))
+            self.__file.flush()
+        except OSError as error:  # Disk problems should not stop monitoring, file is opened again by next batch
+            print(f"{len(lines)} log records were not written to {self.filename} - {error}", file=sys.stderr)
+            self.__close()
+
+    def __close(self) -> None:
+        if self.__file is not None:
+            try:
+                self.__file.close()
+            except OSError:  # Buffered records can't be flushed to broken file
+                pass
+            self.__file = None
+
+    def __should_rotate(self) -> bool:
+        return (self.__file.tell() >= self.max_bytes
+                or time() - self.__opened_at >= self.rotate_interval)
+
+    def __rotate(self) -> None:
+        """Move logs.log to logs.log.1, logs.log.1 to logs.log.2 ... and open new file"""
+
+        if self.__file is not None:
+            self.__close()
+
+            for number in range(self.backup_count - 1, 0, -1):
+                if os.path.exists(f"{self.filename}.{number}"):
+                    os.replace(f"{self.filename}.{number}", f"{self.filename}.{number + 1}")
+            if self.backup_count > 0:
+                os.replace(self.filename, f"{self.filename}.1")
+
+        self.__file = open(self.filename, mode='a', encoding='utf-8')
+        self.__opened_at = time()
 
 
 class Logger:
-    def __init__(self) -> None:
+    def __init__(self, json_lines: bool | None = None) -> None:
         self.log = logging.getLogger('__logger__')
         self.log.setLevel(logging.DEBUG)
 
-        # Create a file for logger handling
-        handler = logging.FileHandler('logs.log', mode='a', encoding='utf-8')
-        # Set a format for log message
-        formatter = logging.Formatter(
-            '%(asctime)s\t%(levelname)s\t%(message)s', '%d-%m-%Y %H:%M:%S')
+        # JSON lines are switched on for running server by MONITOR_LOG_JSON=1
+        if json_lines is None:
+            json_lines = os.environ.get('MONITOR_LOG_JSON', '').lower() in ('1', 'true', 'yes')
+
+        # Set a format for log message, JSON lines for machine parsing
+        if json_lines:
+            formatter = JSONFormatter()
+        else:
+            formatter = logging.Formatter(
+                '%(asctime)s\t%(levelname)s\t%(message)s', '%d-%m-%Y %H:%M:%S')
+
+        # Monitoring threads only put records to queue, background writer writes them to file
+        queue = Queue()
+        self.writer = BatchWriter(queue, 'logs.log', formatter)
+        self.writer.start()
+        atexit.register(self.writer.stop)  # Write queued records before program exit
 
-        # Add formatter to handler
-        handler.setFormatter(formatter)
-        # Add handler to logger
-        self.log.addHandler(handler)
+        # Add queue handler to logger
+        self.log.addHandler(QueueHandler(queue))
 
 
 logger = Logger()
@@ -0,0 +1,274 @@
+"""Counters, gauges and histograms of hot paths with Prometheus text export
+
+Recording is a bucket search and a few additions under a lock of one series,
+so instrumentation stays on in production. Server series are labelled by
+checker only - servers and api can be tens of thousands, their per target
+history is kept in result store. Agent series are labelled by service, the
+slowest ones show what delays services check.
+
+The same module is used by agent (client) and server, keep both copies equal
+"""
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import NamedTuple
+from threading import Thread, Lock
+from time import perf_counter
+from bisect import bisect_left
+import os
+
+
+# Seconds from 1 ms to 1 minute
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Bytes from 1 KiB to 1 GiB
+SIZE_BUCKETS = tuple(1024 * 4 ** power for power in range(11))
+
+
+class Counter:
+    def __init__(self) -> None:
+        self.value = 0.0
+        self.__lock = Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self.__lock:
+            self.value += amount
+
+
+class Gauge:
+    def __init__(self) -> None:
+        self.value = 0.0
+        self.function: Callable[[], float] | None = None  # Value is got on export if set
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def get(self) -> float:
+        return self.value if self.function is None else self.function()
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.__lock = Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+
+        with self.__lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe duration of with block in seconds"""
+
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - started)
+
+    def quantile(self, quantile: float) -> float | None:
+        """Upper bound of bucket with quantile, the last bucket bound for +Inf"""
+
+        if self.count == 0:
+            return None
+
+        rank = quantile * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+
+        return self.buckets[-1]
+
+
+class Metric:
+    """Family of series with the same name and different label values"""
+
+    def __init__(self, name: str, description: str, kind: str, label_names: tuple[str, ...],
+                 factory: Callable[[], Counter | Gauge | Histogram]) -> None:
+        self.name = name
+        self.description = description
+        self.kind = kind  # Prometheus type - counter, gauge or histogram
+        self.label_names = label_names
+        self.series: dict[tuple[str, ...], Counter | Gauge | Histogram] = dict()
+        self.__factory = factory
+        self.__lock = Lock()
+
+    def labels(self, *values) -> Counter | Gauge | Histogram:
+        """Series of label values, it is created on first use"""
+
+        values = tuple(str(value) for value in values)
+        series = self.series.get(values)
+
+        if series is None:
+            with self.__lock:
+                series = self.series.setdefault(values, self.__factory())
+
+        return series
+
+    def remove(self, *values) -> None:
+        """Forget series of removed target"""
+
+        with self.__lock:
+            self.series.pop(tuple(str(value) for value in values), None)
+
+
+class SeriesSummary(NamedTuple):
+    name: str
+    labels: str
+    count: int
+    total: float
+    avg: float
+    p95: float | None
+
+
+class Registry:
+    """All metrics of the process"""
+
+    def __init__(self) -> None:
+        self.__metrics: dict[str, Metric] = dict()
+        self.__lock = Lock()
+
+    def counter(self, name: str, description: str, label_names: tuple[str, ...] = ()) -> Metric:
+        return self.__register(name, description, 'counter', label_names, Counter)
+
+    def gauge(self, name: str, description: str, label_names: tuple[str, ...] = ()) -> Metric:
+        return self.__register(name, description, 'gauge', label_names, Gauge)
+
+    def histogram(self, name: str, description: str, label_names: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = TIME_BUCKETS) -> Metric:
+        return self.__register(name, description, 'histogram', label_names, lambda: Histogram(buckets))
+
+    def __register(self, name: str, description: str, kind: str, label_names: tuple[str, ...],
+                   factory: Callable[[], Counter | Gauge | Histogram]) -> Metric:
+        """Get metric with this name, it is created by the first module which uses it"""
+
+        with self.__lock:
+            metric = self.__metrics.get(name)
+            if metric is None:
+                metric = self.__metrics[name] = Metric(name, description, kind, label_names, factory)
+
+        return metric
+
+    def render(self) -> str:
+        """All metrics in Prometheus text format"""
+
+        lines = []
+        with self.__lock:
+            metrics = list(self.__metrics.values())
+
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+
+            for values, series in list(metric.series.items()):
+                labels = [f'{name}="{escape(value)}"' for name, value in zip(metric.label_names, values)]
+
+                if isinstance(series, Histogram):
+                    cumulative = 0
+                    for bound, count in zip((*series.buckets, '+Inf'), series.counts):
+                        cumulative += count
+                        bucket_labels = format_labels([*labels, f'le="{bound}"'])
+                        lines.append(f"{metric.name}_bucket{bucket_labels} {cumulative}")
+                    lines.append(f"{metric.name}_sum{format_labels(labels)} {series.sum}")
+                    lines.append(f"{metric.name}_count{format_labels(labels)} {series.count}")
+                elif isinstance(series, Gauge):
+                    lines.append(f"{metric.name}{format_labels(labels)} {series.get()}")
+                else:
+                    lines.append(f"{metric.name}{format_labels(labels)} {series.value}")
+
+        return '\n'.join(lines) + '\n'
+
+    def summary(self, suffix: str = '_seconds', limit: int = 20) -> list[SeriesSummary]:
+        """Histogram series with the biggest total - what takes most of the cycle time
+
+        Only histograms which names end with suffix are compared, they have the same unit
+        """
+
+        summaries = []
+        with self.__lock:
+            metrics = [metric for metric in self.__metrics.values()
+                       if metric.kind == 'histogram' and metric.name.endswith(suffix)]
+
+        for metric in metrics:
+            for values, series in list(metric.series.items()):
+                if series.count:
+                    summaries.append(SeriesSummary(
+                        metric.name, ' '.join(values), series.count, series.sum,
+                        series.sum / series.count, series.quantile(0.95)))
+
+        return sorted(summaries, key=lambda summary: summary.total, reverse=True)[:limit]
+
+    def values(self) -> list[tuple[str, str, float]]:
+        """Counters and gauges as (name, labels, value)"""
+
+        with self.__lock:
+            metrics = [metric for metric in self.__metrics.values() if metric.kind != 'histogram']
+
+        return [(metric.name, ' '.join(values), series.get() if isinstance(series, Gauge) else series.value)
+                for metric in metrics for values, series in list(metric.series.items())]
+
+
+def escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels: list[str]) -> str:
+    return f"{{{','.join(labels)}}}" if labels else ''
+
+
+class MetricsExporter:
+    """HTTP endpoint /metrics for Prometheus scraper"""
+
+    def __init__(self, registry: Registry, host: str = '127.0.0.1', port: int = 9187) -> None:
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.__server = None
+
+    @property
+    def is_running(self) -> bool:
+        return self.__server is not None
+
+    def start(self) -> None:
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self.__server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.__server.daemon_threads = True
+        Thread(target=self.__server.serve_forever, name='metrics_exporter', daemon=True).start()
+
+    def stop(self) -> None:
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__server = None
+
+
+metrics = Registry()
+# Endpoint has no auth - it is local by default, MONITOR_METRICS_HOST=0.0.0.0 opens it for scraper
+metrics_exporter = MetricsExporter(metrics, os.environ.get('MONITOR_METRICS_HOST', '127.0.0.1'),
+                                   int(os.environ.get('MONITOR_METRICS_PORT', 9187)))
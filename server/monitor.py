@@ -1,23 +1,127 @@
-from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Callable
 from threading import Thread, Event
+from time import time, monotonic, strftime, localtime
+import math
 
 # Import application modules
 from servers_check.checker import servers_checker
 from api_check.checker import api_checker
+from agents import agent_server
+from store import result_store, UP, DOWN, DEGRADED
+from scheduler import Scheduler
+from executor import CheckerExecutor, CheckerTimeout
+from inventory import InventoryDiff
+from shards import ShardPool
+from metrics import metrics
 from pretifier import rich
 from logger import logger
 
 
+checker_seconds = metrics.histogram('checker_duration_seconds', "Duration of checker run for due targets", ('checker',))
+checker_timeouts = metrics.counter('checker_timeouts_total', "Checker runs which did not finish in deadline", ('checker',))
+cycle_seconds = metrics.histogram('monitor_cycle_seconds', "Duration of check of all due targets")
+cycle_overruns = metrics.counter('monitor_cycle_overruns_total', "Checks which ended after the next check was due")
+queue_depth = metrics.gauge('checker_queue_depth', "Checks which wait for free executor thread")
+cycle_overruns.labels()  # Zero is exported before the first overrun
+
+
+def format_ms(value: float) -> str:
+    """Milliseconds of history, targets without latency like agents have NaN"""
+
+    return '-' if math.isnan(value) else f"{value:0.1f} ms"
+
+
 class Monitor:
     """Get and show data from checkers"""
 
-    def __init__(self) -> None:
+    PROGRESS_MIN_WAIT = 10  # Seconds, shorter waits are shown without progress bar
+    INVENTORY_CHECK_INTERVAL = 10  # Seconds between servers.txt and api.txt change checks
+    HISTORY_KINDS = ('server', 'api', 'agent', 'service')  # Prefixes of result store keys
+
+    def __init__(self, max_workers: int = 4) -> None:
         self.__isActive = None
         self.__delay = None
         self.__event = Event()
+        self.__inventory_event = Event()  # Set on stop - inventory watcher ends
+        self.__scheduler = Scheduler()
+        self.__intervals: dict[tuple[str, str], int] = dict()  # Own target intervals in seconds
+
+        # Long-lived threads for checkers, kind: (targets, report) of every registered checker
+        self.__executor = CheckerExecutor(max_workers)
+        queue_depth.labels().function = lambda: self.__executor.queue_depth
+        self.__checkers: dict[str, tuple[Callable[[], list[str]], Callable[[list[str], dict], dict]]] = dict()
+        self.__reloaders: dict[str, Callable[[], InventoryDiff | None]] = dict()
+        self.__shards: ShardPool | None = None  # Worker processes for very large inventories
+
+        self.register_checker('server', servers_checker.ping,
+                              lambda: list(servers_checker.servers), self.__show_servers,
+                              reload=self.__reload_servers)
+        self.register_checker('api', api_checker.http_request,
+                              lambda: list(api_checker.apis), self.__show_apis,
+                              reload=self.__reload_apis)
+        self.register_checker('agents', lambda targets: agent_server.poll_all(),
+                              lambda: ['*'], self.__show_agents, deadline=agent_server.poll_deadline * 2)
+        agent_server.on_lost = self.__on_agentLost
+
+    def register_checker(self, kind: str, check: Callable[[list[str]], dict],
+                         targets: Callable[[], list[str]], report: Callable[[list[str], dict], dict],
+                         deadline: float | None = None,
+                         reload: Callable[[], InventoryDiff | None] | None = None) -> None:
+        """Add new check type
+
+        check gets list of due targets and returns results, report shows results and
+        returns target: success dict for scheduler. reload applies targets file changes
+        while monitor works, without it new targets are scheduled on next start
+        """
+
+        self.__executor.register(kind, check, deadline)
+        self.__checkers[kind] = targets, report
+        if reload is not None:
+            self.__reloaders[kind] = reload
+
+    def enable_shards(self, processes: int) -> None:
+        """Check servers and api in n worker processes, 0 checks them in this process again"""
+
+        print('\n')
+
+        if self.__shards is not None:
+            self.__shards.stop()
+            self.__shards = None
+
+        if processes > 0:
+            self.__shards = ShardPool(processes)
+            try:
+                self.__shards.start()
+            except OSError as error:  # Workers can't be started - targets are checked in this process
+                rich.show(f"Shard workers can't be started - {error}", lvl='error')
+                logger.log.error(f"Shard workers can't be started - {error}")
+                self.__shards, processes = None, 0
+
+        if processes > 0:
+            self.register_checker('server', self.__shards.ping,
+                                  lambda: list(servers_checker.servers), self.__show_servers,
+                                  reload=self.__reload_servers)
+            self.register_checker('api', self.__shards.http_request,
+                                  lambda: list(api_checker.apis), self.__show_apis,
+                                  reload=self.__reload_apis)
+
+            rich.show(f"Servers and api are checked in {processes} processes")
+            logger.log.debug(f"Servers and api are checked in {processes} processes")
+        else:
+            self.register_checker('server', servers_checker.ping,
+                                  lambda: list(servers_checker.servers), self.__show_servers,
+                                  reload=self.__reload_servers)
+            self.register_checker('api', api_checker.http_request,
+                                  lambda: list(api_checker.apis), self.__show_apis,
+                                  reload=self.__reload_apis)
+
+            rich.show("Servers and api are checked in this process")
+            logger.log.debug("Servers and api are checked in this process")
+
+        print('\n')
 
     def start(self, delay: int = 15) -> None:
-        """Get dada from checkers every n minutes"""
+        """Get dada from checkers, every target is checked every n minutes by its own schedule"""
 
         if self.__isActive:  # Check if monitor is already working
             print('\n')
@@ -34,76 +138,262 @@ class Monitor:
             logger.log.debug(
                 f"System monitoring has been started with {delay} minutes delay")
 
-            while self.__isActive:  # Start monitoring loop
+            # Schedule all targets with default delay or own interval, first check is immediate
+            self.__scheduler = Scheduler(self.__delay)
+            for key in self.__get_targets():
+                self.__scheduler.add(key, self.__intervals.get(key))
 
-                # Create a threads pool for get checkers data and parallel execution
-                with ThreadPoolExecutor(2) as pull:
+            # Targets files are watched while monitor works
+            self.__inventory_event.clear()
+            Thread(target=self.__watch_inventories, name='inventory_watcher', daemon=True).start()
 
-                    # Start threads
-                    servers_status_thread = pull.submit(servers_checker.ping)
-                    api_status_thread = pull.submit(api_checker.http_request)
+            try:
+                while self.__isActive:  # Start monitoring loop
 
-                    # Create logs for starting threads
-                    logger.log.debug("Checker threads has been started")
+                    # Check only targets which check time has come
+                    due_targets = self.__scheduler.pop_due()
+                    if due_targets:
+                        self.__check(due_targets)
 
-                    # getting results from threads
-                    servers_status = servers_status_thread.result()
-                    api_status = api_status_thread.result()
+                    next_due = self.__scheduler.next_due()
+                    wait = self.__delay if next_due is None else max(0.0, next_due - monotonic())
 
-                    # Create log for ending threads
-                    logger.log.debug("Checker threads has been ended")
+                    if wait > 0:
+                        progressBar_thread = None
 
-                print('\n')
-                rich.show("Servers status:\n")
-
-                # Print results from servers_checker
-                for server, status in servers_status.items():
-
-                    if status[0] == 'down':  # Check if one of servers is down
-                        rich.show(
-                            f"{server.ljust(45)}{status[0].ljust(40)}{status[1]}", lvl='error')
-                        logger.log.error(f"{server} is down - ping check")
-                    elif 'up (package loss' in status[0]:  # Loss 1 - 99%
-                        rich.show(
-                            f"{server.ljust(45)}{status[0].ljust(40)}{status[1]}", lvl='warning')
-                        logger.log.warning(
-                            f"{server} is {status[0]} - ping check")
-                    else:
-                        rich.show(
-                            f"{server.ljust(45)}{status[0].ljust(40)}{status[1]}", lvl='info')
-                        logger.log.info(f"{server} is up - ping check")
+                        # Show progress bar only for long waits, short waits are between spread checks
+                        # Dashboard has its own countdown
+                        if wait >= self.PROGRESS_MIN_WAIT and not rich.dashboard.is_active:
+                            progressBar_thread = Thread(
+                                target=rich.progress_bar, args=(wait,), daemon=True)
+
+                            logger.log.debug("Progress bar thread has been started")
+                            progressBar_thread.start()  # Start progress bar thread
+
+                        # Wait for next check or event - loop can stop immediately
+                        self.__event.wait(wait)
+
+                        if progressBar_thread is not None:
+                            progressBar_thread.join()  # Wait until progress bar end
+                        self.__event.clear()  # Set the event to False
+
+            except Exception as error:  # Monitor is not shown as working if its loop died
+                rich.show(f"System monitoring has been stopped by error - {error}", lvl='error')
+                logger.log.exception("System monitoring has been stopped by error")
+            finally:
+                self.__isActive = False
+                self.__inventory_event.set()
+
+            logger.log.debug("System monitoring has been stopped")
+
+    def __get_targets(self) -> list[tuple[str, str]]:
+        """Scheduler keys of all targets of registered checkers"""
 
+        target_keys = []
+
+        for kind, (targets, _) in self.__checkers.items():
+            try:  # Config files are read on first use
+                target_keys += [(kind, target) for target in targets()]
+            except (OSError, ValueError) as error:  # Missing or broken config - other checkers still work
+                rich.show(f"{kind} targets can't be loaded - {error}", lvl='error')
+                logger.log.error(f"{kind} targets can't be loaded - {error}")
+
+        return target_keys
+
+    def __watch_inventories(self) -> None:
+        """Apply targets files changes until monitor stops"""
+
+        while not self.__inventory_event.wait(self.INVENTORY_CHECK_INTERVAL):
+            self.__reload_inventories()
+
+    def __reload_inventories(self) -> None:
+        """Schedule added targets and forget removed ones, other targets keep their schedule"""
+
+        for kind, reload in self.__reloaders.items():
+            try:
+                diff = reload()
+            except (OSError, ValueError) as error:  # File is being written or broken - keep old targets
+                logger.log.error(f"{kind} targets can't be reloaded - {error}")
+                continue
+
+            if diff is None or diff.is_empty:
+                continue
+
+            for target in diff.removed:
+                self.__scheduler.remove((kind, target))
+                self.__intervals.pop((kind, target), None)
+            for target in diff.added:
+                self.__scheduler.add((kind, target), self.__intervals.get((kind, target)))
+
+            message = (f"{kind} targets have been reloaded: {len(diff.added)} added, "
+                       f"{len(diff.removed)} removed, {len(diff.changed)} changed")
+            logger.log.debug(message)
+            if not rich.dashboard.is_active:
                 print('\n')
-                rich.show("API's status:\n")
+                rich.show(message)
+
+            if diff.added:  # New targets are checked immediately
+                rich.progressBar_status = False
+                self.__event.set()
+
+    def __reload_servers(self) -> InventoryDiff | None:
+        diff = servers_checker.reload()
+
+        if diff is not None:
+            for server in diff.removed:
+                rich.dashboard.remove('Servers', server)
+
+        return diff
+
+    def __reload_apis(self) -> InventoryDiff | None:
+        diff = api_checker.reload()
+
+        if diff is not None:
+            for desc in [*diff.removed.values(), *(old for old, _ in diff.changed.values())]:
+                rich.dashboard.remove("API's", desc)
+
+        return diff
+
+    def __check(self, due_targets: list[tuple[str, str]]) -> None:
+        """Run checkers for due targets in parallel, show results and schedule next checks"""
+
+        calls: dict[str, list[str]] = dict()
+        for kind, target in due_targets:
+            calls.setdefault(kind, []).append(target)
+
+        logger.log.debug("Checker threads has been started")
+        started = monotonic()
+
+        # Results are shown as soon as every checker finishes, hung checker does not block others
+        for kind, results in self.__executor.run({kind: (targets,) for kind, targets in calls.items()}):
+
+            checker_seconds.labels(kind).observe(monotonic() - started)
+
+            if isinstance(results, Exception):
+                if isinstance(results, CheckerTimeout):
+                    checker_timeouts.labels(kind).inc()
+
+                rich.show_section("Checkers status")
+                rich.show_row('Checkers', kind, 'failed', str(results), lvl='error')
+                logger.log.error(f"{kind} checker failed - {results}")
+                successes = dict()
+            else:
+                rich.dashboard.remove('Checkers', kind)
+                successes = self.__checkers[kind][1](calls[kind], results)
+
+            # Failed targets are rechecked soon, others after their interval
+            for target in calls[kind]:
+                self.__scheduler.report((kind, target), successes.get(target, False))
+
+        logger.log.debug("Checker threads has been ended")
+
+        # Check was longer than time to the next due target - schedule slips
+        cycle_seconds.labels().observe(monotonic() - started)
+        next_due = self.__scheduler.next_due()
+        if next_due is not None and next_due < monotonic():
+            cycle_overruns.labels().inc()
+
+    def __show_servers(self, servers: list[str], servers_status: dict) -> dict[str, bool]:
+        rich.show_section("Servers status")
+
+        # Print results from servers_checker
+        for server, status in servers_status.items():
+            probe_result = servers_checker.probe_stats.get(server)
+            rtt = probe_result.rtt_avg if probe_result is not None else None
+
+            if status[0] == 'down':  # Check if one of servers is down
+                rich.show_row('Servers', server, status[0], status[1], lvl='error')
+                logger.log.error(f"{server} is down - ping check")
+                result_store.record(f"server:{server}", DOWN, rtt)
+            elif 'up (package loss' in status[0]:  # Loss 1 - 99%
+                rich.show_row('Servers', server, status[0], status[1], lvl='warning')
+                logger.log.warning(
+                    f"{server} is {status[0]} - ping check")
+                result_store.record(f"server:{server}", DEGRADED, rtt)
+            else:
+                rich.show_row('Servers', server, status[0], status[1], lvl='info')
+                logger.log.info(f"{server} is up - ping check")
+                result_store.record(f"server:{server}", UP, rtt)
+
+        return {server: status[0] != 'down' for server, status in servers_status.items()}
+
+    def __show_apis(self, apis: list[str], api_status: dict) -> dict[str, bool]:
+        rich.show_section("API's status")
+
+        # Pring results from api_checker
+        for api, status in api_status.items():
+            response_time = api_checker.response_times.get(api)
+            response_time = response_time * 1000 if response_time is not None else None
+
+            if status[0] == 'down':  # Check if one of API's is down
+                rich.show_row("API's", api, status[0], status[1], lvl='critical')
+                logger.log.critical(
+                    f"{api} is down - http status check ({status[1]})")
+                result_store.record(f"api:{api}", DOWN, response_time)
+            else:
+                rich.show_row("API's", api, status[0], status[1], lvl='info')
+                logger.log.info(
+                    f"{api} is up - http status check ({status[1]})")
+                result_store.record(
+                    f"api:{api}", DEGRADED if status[1] == 'long delay' else UP, response_time)
+
+        # Statuses are by description, scheduler targets are urls
+        descriptions = api_checker.apis
+        return {api_url: api_status[descriptions[api_url]][0] != 'down'
+                for api_url in apis if descriptions.get(api_url) in api_status}
+
+    def __on_agentLost(self, hostname: str, silence: float) -> None:
+        """Agent missed its heartbeats - it is down before the next agents check"""
+
+        logger.log.error(f"{hostname} sent no heartbeat for {silence:0.0f} seconds - agent check")
+        result_store.record(f"agent:{hostname}", DOWN)
 
-                # Pring results from api_checker
-                for api, status in api_status.items():
+        if self.__isActive:
+            rich.show_row('Agents', hostname, 'lost', f"no heartbeat for {silence:0.0f} sec", lvl='error')
 
-                    if status[0] == 'down':  # Check if one of API's is down
-                        rich.show(
-                            f"{api.ljust(45)}{status[0].ljust(40)}{status[1]}", lvl='critical')
-                        logger.log.critical(
-                            f"{api} is down - http status check ({status[1]})")
-                    else:
-                        rich.show(
-                            f"{api.ljust(45)}{status[0].ljust(40)}{status[1]}", lvl='info')
-                        logger.log.info(
-                            f"{api} is up - http status check ({status[1]})")
+    def __show_agents(self, targets: list[str], agents_status: dict) -> dict[str, bool]:
+        if not agents_status:  # There are no connected agents
+            return {'*': True}
 
-                # Show progress bar and wait for delay passing
-                progressBar_thread = Thread(
-                    target=rich.progress_bar, args=(self.__delay,), daemon=True)
+        rich.show_section("Agents services status")
 
-                logger.log.debug("Progress bar thread has been started")
-                progressBar_thread.start()  # Start progress bar thread
+        # Print results from connected agents
+        for client, services_statuses in agents_status.items():
 
-                # Wait for delay pass or event - loop can stop immediately
-                self.__event.wait(self.__delay)
+            if services_statuses is None:  # Agent did not reply in deadline
+                rich.show_row('Agents', client, 'no reply', '', lvl='error')
+                logger.log.error(f"{client} did not reply - agent check")
+                result_store.record(f"agent:{client}", DOWN)
+                continue
 
-                progressBar_thread.join()  # Wait until progress bar end
-                self.__event.clear()  # Set the event to False
+            rich.dashboard.remove('Agents', client)  # Agent replies again
+            result_store.record(f"agent:{client}", UP)
 
-            logger.log.debug("System monitoring has been stopped")
+            for services_status in services_statuses:
+
+                if isinstance(services_status, str):  # Ostel services does not exist
+                    continue
+
+                for service, status in services_status.items():
+                    service = f"{client} {service}"
+
+                    if status[0] in ('Down', 'pid not found'):
+                        rich.show_row('Agents', service, status[0], f"last log was {status[1]}", lvl='error')
+                        logger.log.error(
+                            f"{service} is {status[0]} - agent check (last log was {status[1]})")
+                        result_store.record(f"service:{service}", DOWN)
+                    elif status[0] == 'Warning':
+                        rich.show_row('Agents', service, status[0], f"last log was {status[1]}", lvl='warning')
+                        logger.log.warning(
+                            f"{service} is {status[0]} - agent check (last log was {status[1]})")
+                        result_store.record(f"service:{service}", DEGRADED)
+                    else:
+                        rich.show_row('Agents', service, status[0], f"last log was {status[1]}", lvl='info')
+                        logger.log.info(
+                            f"{service} is up - agent check (last log was {status[1]})")
+                        result_store.record(f"service:{service}", UP)
+
+        return {'*': None not in agents_status.values()}
 
     def stop(self) -> None:
         """Stop system monitoring"""
@@ -113,6 +403,8 @@ class Monitor:
         if self.__isActive is True:
             self.__isActive = False
             self.__event.set()  # Set event to True - start loop can stop immediately
+            self.__inventory_event.set()
+            self.__executor.cancel()  # Do not wait for running checkers
             rich.show("System monitoring has been stopped")
             logger.log.debug("System monitoring has been stopped")
         else:
@@ -126,7 +418,11 @@ class Monitor:
         print('\n')
 
         if self.__isActive:
-            rich.show("Monitor is working")
+            next_due = self.__scheduler.next_due()
+            if next_due is None:
+                rich.show("Monitor is working")
+            else:
+                rich.show(f"Monitor is working, next check in {max(0, next_due - monotonic()):0.0f} seconds")
         else:
             rich.show("Monitor is not working")
 
@@ -151,6 +447,7 @@ class Monitor:
 
         if self.__isActive:
             self.__delay = delay * 60  # Conver minutes to seconds
+            self.__scheduler.set_interval(None, self.__delay)  # Targets without own interval
             self.__event.set()  # Set event to True - start loop can stop immediately
 
             rich.show(f"Monitor delay has been changed to {delay} minutes")
@@ -161,11 +458,131 @@ class Monitor:
 
         print('\n')
 
-    def server_status(self):
-        pass
+    def change_interval(self, target: str, interval: int) -> None:
+        """Change check interval of one target - server, api url or description, 'agents'"""
+
+        print('\n')
+
+        try:  # Api can be found by description
+            api_urls = {desc: api_url for api_url, desc in api_checker.apis.items()}
+        except (OSError, ValueError):  # Missing or broken api.txt is shown by __get_targets
+            api_urls = dict()
+        target_key = None
+
+        for key in self.__get_targets():
+            if target == key[1] or api_urls.get(target) == key[1] or (target, key) == ('agents', ('agents', '*')):
+                target_key = key
+                break
+
+        if target_key is None:
+            rich.show(f"There is no target {target}", lvl='warning')
+        else:
+            self.__intervals[target_key] = interval * 60  # Convert minutes to seconds
+            if self.__isActive:
+                self.__scheduler.set_interval(target_key, interval * 60)
+                self.__event.set()  # Wake up loop - next check time could change
+
+            rich.show(f"Check interval of {target} has been changed to {interval} minutes")
+            logger.log.debug(f"Check interval of {target} has been changed to {interval} minutes")
+
+        print('\n')
+
+    def show_dashboard(self) -> None:
+        """Show live table of all targets until Enter is pressed"""
+
+        if not self.__isActive:
+            print('\n')
+            rich.show("Monitor is not working at the moment", lvl='warning')
+            print('\n')
+            return
+
+        rich.progressBar_status = False  # Stop progress bar, dashboard shows countdown
+        rich.dashboard.run(self.__scheduler.next_due)
+
+    def show_metrics(self) -> None:
+        """Show the slowest checkers, agents round trip and counters, per target results are in history"""
+
+        print('\n')
+
+        summaries = metrics.summary()
+        if summaries:
+            rich.show(f"{'Metric'.ljust(45)}{'Labels'.ljust(40)}checks, avg, p95, total\n")
+        else:
+            rich.show("There are no checks yet", lvl='warning')
+
+        # Series with the biggest total time are first - they slow the cycle most
+        for summary in summaries:
+            p95 = 'n/a' if summary.p95 is None else f"{summary.p95:g} sec"
+            rich.show(f"{summary.name.ljust(45)}{summary.labels.ljust(40)}"
+                      f"{summary.count}, {summary.avg:0.3f} sec, {p95}, {summary.total:0.1f} sec")
+
+        for name, labels, value in metrics.values():
+            if value:
+                rich.show(f"{name.ljust(45)}{labels.ljust(40)}{value:g}")
+
+        print('\n')
+
+    def show_history(self, target: str, hours: int = 24) -> None:
+        """Show target availability and response time for last n hours
+
+        Target without kind like 'server:' is shown for every kind which has results
+        """
+
+        print('\n')
+
+        since = time() - hours * 3600
+        keys = [target] if target.split(':', 1)[0] in self.HISTORY_KINDS else \
+            [f"{kind}:{target}" for kind in self.HISTORY_KINDS]
+        summaries = {key: result_store.summary(key, since) for key in keys}
+        summaries = {key: summary for key, summary in summaries.items() if summary.count}
+
+        if not summaries:
+            rich.show(f"There are no results for {target} in last {hours} hours", lvl='warning')
+
+        for key, summary in summaries.items():
+            rich.show(f"{key} for last {hours} hours: availability {summary.availability:0.2f}%, "
+                      f"min {format_ms(summary.min)}, avg {format_ms(summary.avg)}, "
+                      f"p95 {format_ms(summary.p95)}, {summary.count} checks\n")
+
+            # Per hour rollups from store, no log parsing
+            for rollup in result_store.rollups(key, '1h', since - 3600):
+                lvl = 'info' if rollup.availability == 100 else 'warning' if rollup.up_count else 'error'
+                rich.show(f"{strftime('%d.%m %H:00', localtime(rollup.start)).ljust(45)}"
+                          f"{f'{rollup.availability:0.2f}%'.ljust(40)}"
+                          f"avg {format_ms(rollup.avg)}, p95 {format_ms(rollup.p95)}", lvl=lvl)
+
+        print('\n')
+
+    def server_status(self) -> None:
+        """Show agent server status"""
 
-    def server_clients(self):
-        pass
+        print('\n')
+
+        if agent_server.is_running:
+            rich.show(
+                f"Server is listening on {agent_server.host}:{agent_server.port} since "
+                f"{agent_server.started_at:%d.%m %H:%M}, {len(agent_server.clients())} clients connected")
+        else:
+            rich.show("Server is not working at the moment", lvl='warning')
+
+        print('\n')
+
+    def server_clients(self) -> None:
+        """Show agents connected to the server"""
+
+        print('\n')
+
+        clients = agent_server.clients()
+
+        if clients:
+            for client in clients:
+                last_reply = 'never' if client.last_reply is None else f"{client.last_reply:%d.%m %H:%M:%S}"
+                rich.show(f"{client.hostname.ljust(45)}{client.address.ljust(40)}"
+                          f"connected {client.connected_at:%d.%m %H:%M}, last reply {last_reply}")
+        else:
+            rich.show("There are no connected clients", lvl='warning')
+
+        print('\n')
 
 
 monitor = Monitor()
@@ -1,26 +1,137 @@
-from time import sleep, localtime, strftime
+from time import sleep, localtime, strftime, monotonic
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+from threading import Lock
 
-from rich.console import Console
-from rich.theme import Theme
-from rich.progress import track
+if TYPE_CHECKING:  # rich modules are imported on first use - console starts faster
+    from rich.console import Console, Group
+    from rich.table import Table
+
+
+class Dashboard:
+    """Live table of targets, rows are updated in place only when their status changes
+
+    Table is rendered by rich.live in its own thread with throttled refresh rate,
+    so check execution does not wait for rendering
+    """
+
+    SECTIONS = ('Servers', "API's", 'Agents')
+    PROBLEM_LEVELS = ('error', 'critical', 'warning')
+
+    def __init__(self, get_console: Callable[[], 'Console'], refresh_per_second: float = 2) -> None:
+        self.__get_console = get_console
+        self.refresh_per_second = refresh_per_second
+
+        # Rows by (section, target): status, detail, level and update time
+        self.__rows: dict[tuple[str, str], tuple[str, str, str, str]] = dict()
+        self.__table = None  # Cached table, rebuilt only after rows change
+        self.__lock = Lock()
+        self.is_active = False
+
+    def update(self, section: str, name: str, status: str, detail: str, lvl: str) -> bool:
+        """Update row, return True if row was changed"""
+
+        key = section, name
+
+        with self.__lock:
+            row = self.__rows.get(key)
+            if row is not None and row[:3] == (status, detail, lvl):
+                return False
+
+            self.__rows[key] = status, detail, lvl, strftime("%d.%m %H:%M:%S", localtime())
+            self.__table = None
+
+        return True
+
+    def remove(self, section: str, name: str) -> None:
+        with self.__lock:
+            if self.__rows.pop((section, name), None) is not None:
+                self.__table = None
+
+    def run(self, next_due: Callable[[], float | None]) -> None:
+        """Show dashboard until Enter or Ctrl+C is pressed"""
+
+        from rich.live import Live
+
+        self.is_active = True
+
+        try:
+            with Live(get_renderable=lambda: self.__render(next_due), console=self.__get_console(),
+                      refresh_per_second=self.refresh_per_second, screen=True,
+                      vertical_overflow='crop'):
+                input()
+        except (KeyboardInterrupt, EOFError):
+            pass
+        finally:
+            self.is_active = False
+
+    def __render(self, next_due: Callable[[], float | None]) -> 'Group':
+        from rich.console import Group
+        from rich.text import Text
+
+        with self.__lock:
+            if self.__table is None:
+                self.__table = self.__build_table()
+            table = self.__table
+            problems = sum(row[2] in self.PROBLEM_LEVELS for row in self.__rows.values())
+            targets = len(self.__rows)
+
+        # Countdown is the only part which changes every refresh
+        due = next_due()
+        countdown = 'not scheduled' if due is None else f"in {max(0, due - monotonic()):0.0f} sec"
+        footer = Text(f"Next check {countdown}, {targets} targets, {problems} problems. "
+                      "Press Enter to return to console", style='system')
+
+        return Group(table, footer)
+
+    def __build_table(self) -> 'Table':
+        """Problems first - they stay visible when table is higher than terminal"""
+
+        from rich.table import Table
+
+        table = Table(expand=True)
+        for column in ('Target', 'Status', 'Details', 'Updated'):
+            table.add_column(column)
+
+        rows = sorted(self.__rows.items(), key=lambda item: (
+            item[1][2] not in self.PROBLEM_LEVELS, self.SECTIONS.index(item[0][0])
+            if item[0][0] in self.SECTIONS else len(self.SECTIONS)))
+
+        for (section, name), (status, detail, lvl, updated) in rows:
+            table.add_row(f"{section}: {name}", status, detail, updated, style=lvl)
+
+        return table
 
 
 class Pretifier:
     def __init__(self) -> None:
-        self.__custom_theme = Theme({
-            'system': 'dim cyan',
-            'commands': 'cyan',
-            'debug': 'white',
-            'info': 'green',
-            'warning': 'yellow1',
-            'error': 'bold red1 blink',
-            'critical': 'bold orange_red1 blink'
-        })
-
-        self.__custom_console = Console(theme=self.__custom_theme)
+        self.__custom_console = None  # Created on first output
+        self.__console_lock = Lock()
         self.progressBar_status = None
+        self.dashboard = Dashboard(self.__get_console)
+
+    def __get_console(self) -> 'Console':
+        with self.__console_lock:
+            if self.__custom_console is None:
+                from rich.console import Console
+                from rich.theme import Theme
+
+                custom_theme = Theme({
+                    'system': 'dim cyan',
+                    'commands': 'cyan',
+                    'debug': 'white',
+                    'info': 'green',
+                    'warning': 'yellow1',
+                    'error': 'bold red1 blink',
+                    'critical': 'bold orange_red1 blink'
+                })
+                self.__custom_console = Console(theme=custom_theme)
+
+        return self.__custom_console
 
     def progress_bar(self, delay: int) -> None:
+        from rich.progress import track
+
         self.progressBar_status = True
         print('\n')
 
@@ -34,10 +145,25 @@ class Pretifier:
 
     def show(self, message: str, lvl: str = 'debug') -> None:
         now = strftime("%d.%m %A %H:%M", localtime())
-        self.__custom_console.print(f"{now}\t{message}", style=lvl)
+        self.__get_console().print(f"{now}\t{message}", style=lvl)
+
+    def show_section(self, title: str) -> None:
+        """Show results section title, dashboard has its own sections"""
+
+        if not self.dashboard.is_active:
+            print('\n')
+            self.show(f"{title}:\n")
+
+    def show_row(self, section: str, name: str, status: str, detail: str, lvl: str = 'info') -> None:
+        """Update target row in dashboard and print it if dashboard is not shown"""
+
+        self.dashboard.update(section, name, status, detail, lvl)
+
+        if not self.dashboard.is_active:
+            self.show(f"{name.ljust(45)}{status.ljust(40)}{detail}", lvl=lvl)
 
     def enter(self, prompt: str, lvl: str = 'debug') -> str:
-        return self.__custom_console.input(f"[{lvl}]{prompt}")
+        return self.__get_console().input(f"[{lvl}]{prompt}")
 
 
 rich = Pretifier()
@@ -0,0 +1,143 @@
+from time import monotonic
+from threading import Lock
+from zlib import crc32
+import random
+import heapq
+
+
+class ScheduledTarget:
+    """Check schedule of one target"""
+
+    def __init__(self, key: tuple[str, str], interval: float | None) -> None:
+        self.key = key  # (checker kind, target name)
+        self.interval = interval  # Own interval in seconds, None for default interval
+        self.failures = 0  # Failed checks in a row
+        self.checks = 0
+        self.due = 0.0
+        self.version = 0  # Heap entries with old version are skipped
+
+        # Stable phase in period - targets are spread evenly across the period
+        self.phase = crc32(repr(key).encode('utf-8')) / 0xFFFFFFFF
+
+
+class Scheduler:
+    """Heap of targets by next check time
+
+    Target that just failed is rechecked after fast_recheck seconds, target that
+    stays down is rechecked with exponential backoff up to max_backoff seconds
+    """
+
+    def __init__(self, interval: float = 900, jitter: float = 0.05,
+                 fast_recheck: float = 30, max_backoff: float | None = None) -> None:
+        self.interval = interval  # Default interval in seconds
+        self.jitter = jitter  # Random part of interval, 0.05 is +-5%
+        self.fast_recheck = fast_recheck
+        self.max_backoff = max_backoff  # Default interval if None
+
+        self.__targets: dict[tuple[str, str], ScheduledTarget] = dict()
+        self.__heap: list[tuple[float, int, tuple[str, str]]] = []
+        self.__lock = Lock()
+
+    def add(self, key: tuple[str, str], interval: float | None = None) -> None:
+        """Add target, new target is checked immediately"""
+
+        with self.__lock:
+            if key in self.__targets:
+                return
+
+            target = self.__targets[key] = ScheduledTarget(key, interval)
+            self.__push(target, monotonic())
+
+    def remove(self, key: tuple[str, str]) -> None:
+        with self.__lock:
+            self.__targets.pop(key, None)
+
+    def keys(self) -> list[tuple[str, str]]:
+        with self.__lock:
+            return list(self.__targets)
+
+    def set_interval(self, key: tuple[str, str] | None, interval: float | None) -> None:
+        """Change interval of one target or default interval if key is None
+
+        Changed targets are spread across the new period from now. Target which
+        is not scheduled yet is ignored - its interval is given to add
+        """
+
+        with self.__lock:
+            if key is None:
+                self.interval = interval
+                targets = [target for target in self.__targets.values() if target.interval is None]
+            elif key in self.__targets:
+                targets = [self.__targets[key]]
+                targets[0].interval = interval
+            else:
+                return
+
+            now = monotonic()
+            for target in targets:
+                if target.failures == 0:
+                    self.__push(target, now + self.__interval(target) * target.phase)
+
+    def pop_due(self, now: float | None = None) -> list[tuple[str, str]]:
+        """Get targets which have to be checked now, they are scheduled again by report"""
+
+        now = monotonic() if now is None else now
+        due = []
+
+        with self.__lock:
+            while self.__heap and self.__heap[0][0] <= now:
+                _, version, key = heapq.heappop(self.__heap)
+                target = self.__targets.get(key)
+
+                # Target was removed or rescheduled after this entry
+                if target is None or target.version != version:
+                    continue
+
+                target.version += 1  # Target is in progress and not in heap
+                due.append(key)
+
+        return due
+
+    def next_due(self) -> float | None:
+        """Monotonic time of the nearest check"""
+
+        with self.__lock:
+            while self.__heap:
+                _, version, key = self.__heap[0]
+                target = self.__targets.get(key)
+
+                if target is not None and target.version == version:
+                    return self.__heap[0][0]
+                heapq.heappop(self.__heap)
+
+        return None
+
+    def report(self, key: tuple[str, str], success: bool) -> None:
+        """Schedule next check by check result"""
+
+        with self.__lock:
+            target = self.__targets.get(key)
+            if target is None:
+                return
+
+            target.checks += 1
+            target.failures = 0 if success else target.failures + 1
+            interval = self.__interval(target)
+            now = monotonic()
+
+            if target.failures == 0 and target.checks == 1:
+                # After first check every target gets its own phase in the period
+                self.__push(target, now + interval * (0.5 + target.phase))
+            elif target.failures == 0:
+                self.__push(target, now + interval * (1 + random.uniform(-self.jitter, self.jitter)))
+            else:
+                max_backoff = self.max_backoff or interval
+                self.__push(target, now + min(self.fast_recheck * 2 ** (target.failures - 1), max_backoff))
+
+    def __interval(self, target: ScheduledTarget) -> float:
+        return self.interval if target.interval is None else target.interval
+
+    def __push(self, target: ScheduledTarget, due: float) -> None:
+        target.version += 1
+        target.due = due
+        heapq.heappush(self.__heap, (due, target.version, target.key))
@@ -1,49 +1,93 @@
-from os import popen  # use for run cmd command
-import re  # use for check package loss
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+import os
+
+from servers_check.probe import Prober, ProbeResult
+from inventory import Inventory, InventoryDiff
+from metrics import metrics
+
+
+check_seconds = metrics.histogram('check_duration_seconds', "Duration of one target check", ('checker',))
+check_failures = metrics.counter('check_failures_total', "Checks with down result", ('checker',))
 
 
 class ServersChecker:
-    """Class for check servers status by cmd ping command"""
-
-    def __init__(self) -> None:
-        self.__servers = dict()
-        self.__ping_result = dict()
-        self.pingLoss_pattern = re.compile(r"\(\d+% \w+\)")
-
-        # Create server:desription dict by parsing servers.txt
-        with open(r'servers_check\servers.txt', 'r', encoding='utf-8') as file:
-            for line in file.readlines():
-                server, description = line.split(':')
-                self.__servers[server] = description.strip()
-
-    def ping(self) -> dict:
-        """Ping all servers and check for errors"""
-
-        # Iterate over server dict and run cmd ping command
-        for server, description in self.__servers.items():
-            ping_res = popen('ping ' + server).read()  # ping server
-            ping_res = ping_res.encode('cp1251').decode('cp866')  # Russian cmd
-
-            # Search packacge loss count in ping result - match object
-            ping_loss = self.pingLoss_pattern.search(ping_res)
-
-            if ping_loss is not None:  # Match object in ping result
-                # Convert match object to integer
-                loss_count = int(ping_loss.group().split()[0][1:-1])
-
-                if loss_count == 0:  # 0% package loss
-                    self.__ping_result[server] = 'up', description
-                elif loss_count == 100:  # 100% package loss
-                    self.__ping_result[server] = 'down', description
-                else:  # 1 - 99% package loss
-                    self.__ping_result[server] = f'up (package loss {
-                        loss_count}%)', description
-
-            # No match object in ping result - None
-            else:
-                self.__ping_result[server] = 'down', description
-
-        return self.__ping_result
+    """Class for check servers status by ICMP echo or TCP connect probes"""
+
+    def __init__(self, servers_path: str | None = None, max_workers: int = 64,
+                 deadline: float = 10, count: int = 4, timeout: float = 1.0) -> None:
+        # servers.txt is read on first use, so import does not fail on missing file
+        self.inventory = Inventory(
+            servers_path or os.environ.get('MONITOR_SERVERS_PATH', r'servers_check\servers.txt'), self.__parse_line)
+        self.probe_stats: dict[str, ProbeResult] = dict()  # Loss and rtt by server
+        self.durations: dict[str, float] = dict()  # Seconds of the last check by server
+
+        self.max_workers = max_workers  # Max count of parallel pings
+        self.deadline = deadline  # Max seconds for one server ping
+        self.prober = Prober(count, timeout)  # Packets count and reply timeout
+
+    @staticmethod
+    def __parse_line(line: str) -> tuple[str, str]:
+        """servers.txt line is server:desription"""
+
+        server, description = line.split(':')
+        return server, description.strip()
+
+    def reload(self) -> InventoryDiff | None:
+        """Apply servers.txt changes, results of removed servers are forgotten"""
+
+        diff = self.inventory.reload()
+
+        if diff is not None:
+            for server in diff.removed:
+                self.probe_stats.pop(server, None)
+                self.durations.pop(server, None)
+
+        return diff
+
+    def __ping_server(self, server: str, description: str) -> tuple[str, str]:
+        """Ping one server and get status by package loss"""
+
+        started = perf_counter()
+        probe_result = self.prober.probe(server, self.deadline)
+        duration = perf_counter() - started
+        check_seconds.labels('ping').observe(duration)
+
+        if server in self.inventory.targets:  # Server was not removed by reload during probe
+            self.probe_stats[server] = probe_result
+            self.durations[server] = duration
+
+        if probe_result.loss == 0:  # 0% package loss
+            return 'up', description
+        elif probe_result.loss == 100:  # 100% package loss
+            check_failures.labels('ping').inc()
+            return 'down', description
+        else:  # 1 - 99% package loss
+            return f'up (package loss {probe_result.loss}%)', description
+
+    @property
+    def servers(self) -> dict[str, str]:
+        """Servers with descriptions from servers.txt"""
+
+        return dict(self.inventory.targets)
+
+    def ping(self, servers: list[str] | None = None) -> dict:
+        """Ping all servers or only given servers in parallel and check for errors"""
+
+        all_servers = self.inventory.targets
+        if servers is None:
+            servers = list(all_servers)
+        servers = [server for server in servers if server in all_servers]
+
+        workers = max(1, min(self.max_workers, len(servers)))
+
+        # Thread pool for parallel pings, cycle time is close to the slowest server
+        with ThreadPoolExecutor(workers, thread_name_prefix='ping') as pool:
+            ping_threads = {server: pool.submit(self.__ping_server, server, all_servers[server])
+                            for server in servers}
+
+            # Get results from threads in servers.txt order
+            return {server: ping_thread.result() for server, ping_thread in ping_threads.items()}
 
 
 servers_checker = ServersChecker()
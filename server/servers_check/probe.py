@@ -0,0 +1,209 @@
+from itertools import count as counter
+from time import monotonic, sleep
+from typing import NamedTuple
+from threading import Lock
+from select import select
+import socket
+import struct
+import os
+
+
+class ProbeResult(NamedTuple):
+    """Probe statistics for one host, rtt values in milliseconds"""
+
+    method: str  # 'icmp', 'tcp' or 'unresolved'
+    sent: int
+    received: int
+    loss: int  # Package loss in percents
+    rtt_min: float | None
+    rtt_avg: float | None
+    rtt_max: float | None
+    jitter: float | None  # Mean difference between consecutive rtt
+
+
+class Prober:
+    """Check host availability by ICMP echo or by TCP connect if ICMP is not permitted"""
+
+    ICMP_ECHO_REQUEST = 8
+    ICMP_ECHO_REPLY = 0
+
+    def __init__(self, count: int = 4, timeout: float = 1.0, interval: float = 0.2,
+                 tcp_ports: tuple[int, ...] = (80, 443, 22, 3389)) -> None:
+        self.count = count  # Packets per host
+        self.timeout = timeout  # Seconds to wait for one reply
+        self.interval = interval  # Seconds between packets
+        self.tcp_ports = tcp_ports  # Ports for TCP connect probe
+
+        self.__icmp_kind = None  # SOCK_RAW, SOCK_DGRAM or False if ICMP is not permitted
+        self.__kind_lock = Lock()
+        self.__icmp_ids = counter(os.getpid() & 0xFFFF)
+
+    @property
+    def method(self) -> str:
+        """Probe method available for this process"""
+
+        return 'tcp' if self.__get_icmpKind() is False else 'icmp'
+
+    def probe(self, host: str, deadline: float | None = None) -> ProbeResult:
+        """Send count packets to host and collect loss and rtt statistics"""
+
+        # Stop sending packets when per host deadline is passed
+        stop_time = monotonic() + deadline if deadline is not None else None
+
+        try:  # Resolve host name once for all packets
+            address = socket.getaddrinfo(host, None, socket.AF_INET)[0][4][0]
+        except (socket.gaierror, UnicodeError):
+            return ProbeResult('unresolved', self.count, 0, 100, None, None, None, None)
+
+        if self.__get_icmpKind() is False:
+            method, rtts = 'tcp', self.__tcp_probe(address, stop_time)
+        else:
+            method, rtts = 'icmp', self.__icmp_probe(address, stop_time)
+
+        return self.__statistics(method, rtts)
+
+    def __statistics(self, method: str, rtts: list[float]) -> ProbeResult:
+        """Count loss, min/avg/max rtt and jitter by received replies"""
+
+        received = len(rtts)
+        loss = round((self.count - received) * 100 / self.count)
+
+        if received == 0:
+            return ProbeResult(method, self.count, 0, loss, None, None, None, None)
+
+        jitter = None
+        if received > 1:
+            jitter = sum(abs(rtts[i] - rtts[i - 1])
+                         for i in range(1, received)) / (received - 1)
+
+        return ProbeResult(method, self.count, received, loss,
+                           min(rtts), sum(rtts) / received, max(rtts), jitter)
+
+    def __get_icmpKind(self) -> int | bool:
+        """Check once which ICMP socket this process can open"""
+
+        with self.__kind_lock:
+            if self.__icmp_kind is None:
+                self.__icmp_kind = False
+
+                # Raw socket needs privileges, datagram socket is unprivileged ICMP on Linux
+                for kind in (socket.SOCK_RAW, socket.SOCK_DGRAM):
+                    try:
+                        socket.socket(socket.AF_INET, kind,
+                                      socket.IPPROTO_ICMP).close()
+                    except OSError:
+                        continue
+                    self.__icmp_kind = kind
+                    break
+
+            return self.__icmp_kind
+
+    @staticmethod
+    def __checksum(data: bytes) -> int:
+        """Internet checksum for ICMP header"""
+
+        if len(data) % 2:
+            data += b'\x00'
+
+        total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+        total = (total >> 16) + (total & 0xFFFF)
+        total += total >> 16
+
+        return ~total & 0xFFFF
+
+    def __icmp_packet(self, icmp_id: int, sequence: int) -> bytes:
+        """Build ICMP echo request"""
+
+        payload = struct.pack('!d', monotonic()) + b'skud_monitoring'
+        header = struct.pack('!BBHHH', self.ICMP_ECHO_REQUEST, 0, 0, icmp_id, sequence)
+        checksum = self.__checksum(header + payload)
+        header = struct.pack('!BBHHH', self.ICMP_ECHO_REQUEST, 0, checksum, icmp_id, sequence)
+
+        return header + payload
+
+    def __icmp_probe(self, address: str, stop_time: float | None) -> list[float]:
+        """Send ICMP echo requests and wait for replies"""
+
+        kind = self.__get_icmpKind()
+        icmp_id = next(self.__icmp_ids) & 0xFFFF
+        rtts = []
+
+        with socket.socket(socket.AF_INET, kind, socket.IPPROTO_ICMP) as sock:
+            for sequence in range(self.count):
+                if stop_time is not None and monotonic() >= stop_time:
+                    break
+                if sequence:
+                    sleep(self.interval)
+
+                send_time = monotonic()
+                try:
+                    sock.sendto(self.__icmp_packet(icmp_id, sequence), (address, 0))
+                except OSError:
+                    continue
+
+                wait_until = send_time + self.timeout
+                if stop_time is not None:
+                    wait_until = min(wait_until, stop_time)
+
+                # Raw socket gets every ICMP package on host - skip foreign replies
+                while (remaining := wait_until - monotonic()) > 0:
+                    if not select([sock], [], [], remaining)[0]:
+                        break
+
+                    data, source = sock.recvfrom(1024)
+                    if source[0] != address:
+                        continue
+
+                    # Raw socket reply starts from IP header, datagram socket reply does not
+                    offset = (data[0] & 0x0F) * 4 if kind == socket.SOCK_RAW else 0
+                    if len(data) < offset + 8:
+                        continue
+
+                    reply_type, _, _, reply_id, reply_sequence = struct.unpack(
+                        '!BBHHH', data[offset:offset + 8])
+
+                    # Kernel rewrites id for datagram sockets, so check it only for raw ones
+                    if reply_type != self.ICMP_ECHO_REPLY or reply_sequence != sequence:
+                        continue
+                    if kind == socket.SOCK_RAW and reply_id != icmp_id:
+                        continue
+
+                    rtts.append((monotonic() - send_time) * 1000)
+                    break
+
+        return rtts
+
+    def __tcp_probe(self, address: str, stop_time: float | None) -> list[float]:
+        """Measure TCP connect time, refused connection also means host is reachable"""
+
+        ports = list(self.tcp_ports)
+        rtts = []
+
+        for sequence in range(self.count):
+            if stop_time is not None and monotonic() >= stop_time:
+                break
+            if sequence:
+                sleep(self.interval)
+
+            # Try ports until one of them answers, then stay on this port
+            for port in ports:
+                timeout = self.timeout
+                if stop_time is not None:
+                    if monotonic() >= stop_time:
+                        break
+                    timeout = max(0.01, min(timeout, stop_time - monotonic()))
+
+                send_time = monotonic()
+                try:
+                    socket.create_connection((address, port), timeout).close()
+                except ConnectionRefusedError:
+                    pass
+                except OSError:
+                    continue
+
+                rtts.append((monotonic() - send_time) * 1000)
+                ports.remove(port)
+                ports.insert(0, port)
+                break
+
+        return rtts
@@ -0,0 +1,68 @@
+"""Entry script of shard worker processes
+
+Worker is started as a separate Python process with this file as main, so it
+does not import console, monitor, logger and other singletons of the server -
+only checkers of its shards. Worker connects to coordinator address, sends
+its token from stdin and then gets tasks and sends results over the same
+connection
+"""
+
+from multiprocessing.connection import Connection
+import socket
+import sys
+
+
+def shard_worker(connection: Connection, servers_path: str, api_path: str) -> None:
+    """Worker process loop - check targets of every task until None task or closed connection"""
+
+    from servers_check.checker import ServersChecker
+    from api_check.checker import APIChecker
+
+    servers = ServersChecker(servers_path)
+    apis = APIChecker(api_path)
+
+    try:
+        while (task := connection.recv()) is not None:
+            task_id, kind, targets = task
+
+            try:  # Targets files are reloaded by worker too - it knows added targets
+                if kind == 'server':
+                    servers.reload()
+                    statuses = servers.ping(targets)
+                    result = {server: (statuses[server], servers.probe_stats.get(server),
+                                       servers.durations.get(server))
+                              for server in targets if server in statuses}
+                else:
+                    apis.reload()
+                    statuses = apis.http_request(targets)
+                    descriptions = apis.apis
+                    result = {api_url: (statuses[descriptions[api_url]],
+                                        apis.response_times.get(descriptions[api_url]))
+                              for api_url in targets if api_url in descriptions}
+
+                connection.send((task_id, result, None))
+            except Exception as error:
+                connection.send((task_id, None, f"{type(error).__name__}: {error}"))
+
+    except (EOFError, OSError):  # Coordinator exited
+        pass
+    finally:
+        apis.engine.close()
+        connection.close()
+
+
+def connect(port: int, token: bytes) -> Connection:
+    """Connect to coordinator and prove that worker was started by it"""
+
+    connection = Connection(socket.create_connection(('127.0.0.1', port)).detach())
+    connection.send_bytes(token)
+
+    return connection
+
+
+if __name__ == '__main__':
+    # shard_worker.py port servers_path api_path, token is read from stdin - it is not seen in process list
+    port, servers_path, api_path = int(sys.argv[1]), sys.argv[2], sys.argv[3]
+    token = bytes.fromhex(sys.stdin.readline().strip())
+
+    shard_worker(connect(port, token), servers_path, api_path)
@@ -0,0 +1,309 @@
+"""Servers and api checks split across worker processes
+
+Every worker process has its own ServersChecker and APIChecker and reads
+the same servers.txt and api.txt. Worker is started from shard_worker.py
+script and connects back to coordinator over local socket. Coordinator sends
+every worker its part of due targets and gets back compact results: status
+tuple, probe result or response time and check duration of every target.
+Results are merged into coordinator checkers, so monitor output does not
+depend on sharding.
+
+Target is assigned to a worker slot by rendezvous hashing. When worker
+dies only its targets move to other slots, the slot gets a new process and
+its targets come back on the next check
+"""
+
+from concurrent.futures import Future, wait
+from multiprocessing.connection import Connection
+from multiprocessing import connection
+from itertools import count
+from threading import Thread, Lock
+from time import monotonic
+from zlib import crc32
+import subprocess
+import secrets
+import socket
+import hmac
+import sys
+import os
+
+from servers_check.checker import servers_checker
+from api_check.checker import api_checker
+import shard_worker as worker_main
+from metrics import metrics
+
+
+check_seconds = metrics.histogram('check_duration_seconds', "Duration of one target check", ('checker',))
+check_failures = metrics.counter('check_failures_total', "Checks with down result", ('checker',))
+shard_restarts = metrics.counter('shard_restarts_total', "Worker processes started again after death")
+
+
+class ShardPool:
+    """Pool of worker processes which check servers and api"""
+
+    WORKER_START_TIMEOUT = 30  # Seconds for started worker to connect back
+
+    def __init__(self, processes: int | None = None, timeout: float = 240) -> None:
+        self.processes = processes or os.cpu_count() or 1
+        self.timeout = timeout  # Seconds to wait for all shards of one check
+
+        self.__listener: socket.socket | None = None  # Workers connect to it on start
+        self.__workers: dict[int, tuple[subprocess.Popen, Connection]] = dict()  # Slot: (process, connection)
+        self.__futures: dict[int, Future] = dict()  # Sent tasks by id
+        self.__assignment: dict[tuple[str, str], int] = dict()  # (kind, target): slot
+        self.__task_ids = count(1)
+        self.__lock = Lock()
+        self.__is_running = False
+
+    @property
+    def is_running(self) -> bool:
+        return self.__is_running
+
+    def start(self) -> None:
+        with self.__lock:
+            if self.__is_running:
+                return
+
+            self.__listener = socket.create_server(('127.0.0.1', 0))
+            try:
+                for slot in range(self.processes):
+                    self.__start_worker(slot)
+            except OSError:  # Worker did not start - pool is not half started
+                self.__stop_workers()
+                raise
+
+            self.__is_running = True
+
+        Thread(target=self.__collect_results, name='shard_results', daemon=True).start()
+
+    def stop(self) -> None:
+        with self.__lock:
+            if not self.__is_running:
+                return
+            self.__is_running = False
+            self.__stop_workers()
+
+    def ping(self, servers: list[str]) -> dict:
+        """Sharded ServersChecker.ping, results are merged into servers_checker"""
+
+        results = self.__run('server', servers)
+        current_servers = servers_checker.inventory.targets  # Removed by reload during check are not kept
+        statuses = dict()
+
+        for server in servers:  # Results in servers.txt order like not sharded check
+            if server not in results:
+                continue
+
+            status, probe_result, duration = results[server]
+            statuses[server] = status
+            if probe_result is not None and server in current_servers:
+                servers_checker.probe_stats[server] = probe_result
+            if duration is not None:
+                check_seconds.labels('ping').observe(duration)
+                if server in current_servers:  # Dashboard and history get duration like not sharded check
+                    servers_checker.durations[server] = duration
+            if status[0] == 'down':
+                check_failures.labels('ping').inc()
+
+        return statuses
+
+    def http_request(self, apis: list[str]) -> dict:
+        """Sharded APIChecker.http_request, results are merged into api_checker"""
+
+        descriptions = api_checker.apis
+        results = self.__run('api', apis)
+        statuses = dict()
+
+        for api_url in apis:  # Results in api.txt order like not sharded check
+            if api_url not in results or api_url not in descriptions:
+                continue
+
+            status, response_time = results[api_url]
+            desc = descriptions[api_url]
+            statuses[desc] = status
+
+            if response_time is None:
+                api_checker.response_times.pop(desc, None)
+            else:
+                api_checker.response_times[desc] = response_time
+                check_seconds.labels('http').observe(response_time)
+            if status[0] == 'down':
+                check_failures.labels('http').inc()
+
+        return statuses
+
+    def __run(self, kind: str, targets: list[str]) -> dict:
+        """Send targets to their slots and wait for all shards, dead worker shard is sent again"""
+
+        if not self.__is_running:
+            raise RuntimeError("Shard pool is not running")
+
+        pending = self.__send(kind, targets)  # Future: (task id, slot, worker process, targets)
+        results = dict()
+        deadline = monotonic() + self.timeout
+
+        while pending:
+            if not self.__is_running:
+                raise RuntimeError("Shard pool has been stopped")
+
+            # Wait is short - dead workers are found while other shards are checked
+            done, _ = wait(pending, timeout=min(1.0, max(0.0, deadline - monotonic())))
+
+            for future in done:
+                results.update(future.result())  # Worker error is raised
+                del pending[future]
+
+            # Shards of dead workers are checked by other workers, dead slots get new processes
+            for future, (task_id, slot, process, shard_targets) in list(pending.items()):
+                if process.poll() is not None:
+                    del pending[future]
+                    self.__forget(task_id)
+                    self.__restart_worker(slot)
+                    pending.update(self.__send(kind, shard_targets, exclude=slot))
+
+            if pending and monotonic() >= deadline:
+                for task_id, *_ in pending.values():
+                    self.__forget(task_id)
+                raise TimeoutError(f"{kind} shards did not finish in {self.timeout} seconds")
+
+        return results
+
+    def __send(self, kind: str, targets: list[str], exclude: int | None = None) -> dict[Future, tuple]:
+        """Group targets by slot and send task to every slot worker"""
+
+        shards: dict[int, list[str]] = dict()
+        for target in targets:
+            shards.setdefault(self.__get_slot(kind, target, exclude), []).append(target)
+
+        sent = dict()
+        with self.__lock:
+            for slot, shard_targets in shards.items():
+                task_id = next(self.__task_ids)
+                future = self.__futures[task_id] = Future()
+                process, worker_connection = self.__workers[slot]
+                try:
+                    worker_connection.send((task_id, kind, shard_targets))
+                except OSError:  # Worker died - shard is sent again when its death is found
+                    pass
+                sent[future] = task_id, slot, process, shard_targets
+
+        return sent
+
+    def __get_slot(self, kind: str, target: str, exclude: int | None = None) -> int:
+        """Rendezvous hashing - the slot with the biggest hash of slot and target"""
+
+        slot = self.__assignment.get((kind, target))
+        if slot is not None and slot != exclude:
+            return slot
+
+        slots = [slot for slot in range(self.processes) if slot != exclude] or [exclude]
+        slot = max(slots, key=lambda slot: crc32(f'{slot}:{kind}:{target}'.encode('utf-8')))
+
+        if exclude is None:  # Moved targets return to their slot after restart
+            self.__assignment[(kind, target)] = slot
+
+        return slot
+
+    def __collect_results(self) -> None:
+        """Complete task futures by results from all workers until pool stops
+
+        Every worker has its own connection - killed worker can't leave locked
+        queue shared with other workers
+        """
+
+        while self.__is_running:
+            with self.__lock:
+                connections = [worker_connection for _, worker_connection in self.__workers.values()
+                               if not worker_connection.closed]
+
+            for worker_connection in connection.wait(connections, timeout=1):
+                try:
+                    task_id, shard_result, error = worker_connection.recv()
+                except (EOFError, OSError):  # Worker died, its shards are sent again by __run
+                    worker_connection.close()
+                    continue
+
+                with self.__lock:
+                    future = self.__futures.pop(task_id, None)
+
+                if future is None or future.done():  # Late result of reassigned shard
+                    continue
+                if error is None:
+                    future.set_result(shard_result)
+                else:
+                    future.set_exception(RuntimeError(error))
+
+    def __forget(self, task_id: int) -> None:
+        with self.__lock:
+            self.__futures.pop(task_id, None)
+
+    def __start_worker(self, slot: int) -> None:
+        """Start worker script and wait until it connects back with its token"""
+
+        token = secrets.token_bytes(16)  # Other local process can't pretend to be worker
+        process = subprocess.Popen(
+            [sys.executable, worker_main.__file__, str(self.__listener.getsockname()[1]),
+             servers_checker.inventory.path, api_checker.inventory.path], stdin=subprocess.PIPE)
+
+        try:
+            process.stdin.write(token.hex().encode('ascii') + b'\n')
+            process.stdin.close()
+            worker_connection = self.__accept(token)
+        except OSError:
+            process.kill()
+            process.wait()
+            raise
+
+        self.__workers[slot] = process, worker_connection
+
+    def __accept(self, token: bytes) -> Connection:
+        """Get connection of worker which sent the token"""
+
+        deadline = monotonic() + self.WORKER_START_TIMEOUT
+
+        while True:
+            self.__listener.settimeout(max(0.01, deadline - monotonic()))
+            try:
+                worker_socket, _ = self.__listener.accept()
+            except TimeoutError:
+                raise TimeoutError(f"Shard worker did not connect in {self.WORKER_START_TIMEOUT} seconds") from None
+
+            worker_connection = Connection(worker_socket.detach())
+            try:  # Token is checked before any pickle is read from connection
+                if (worker_connection.poll(max(0.01, deadline - monotonic()))
+                        and hmac.compare_digest(worker_connection.recv_bytes(len(token)), token)):
+                    return worker_connection
+            except (EOFError, OSError):
+                pass
+
+            worker_connection.close()
+
+    def __stop_workers(self) -> None:
+        """Ask workers to exit, kill workers which do not exit in time"""
+
+        for _, worker_connection in self.__workers.values():
+            try:
+                worker_connection.send(None)
+            except OSError:  # Worker is already dead
+                pass
+        for process, worker_connection in self.__workers.values():
+            try:
+                process.wait(5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+            worker_connection.close()
+
+        self.__workers.clear()
+        if self.__listener is not None:
+            self.__listener.close()
+            self.__listener = None
+
+    def __restart_worker(self, slot: int) -> None:
+        with self.__lock:
+            if not self.__is_running or self.__workers[slot][0].poll() is None:
+                return  # Other check has already restarted it
+
+            self.__workers[slot][1].close()
+            self.__start_worker(slot)
+            shard_restarts.labels().inc()
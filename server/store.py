@@ -0,0 +1,291 @@
+from collections import deque
+from typing import NamedTuple
+from threading import Thread, Event, Lock
+from hashlib import sha1
+from pathlib import Path
+from time import time
+import atexit
+import struct
+import math
+import re
+
+from logger import logger
+
+
+DOWN, UP, DEGRADED = 0, 1, 2  # Sample status codes, degraded is up with package loss or long delay
+
+
+class Sample(NamedTuple):
+    timestamp: float
+    status: int
+    value: float  # Rtt or response time in milliseconds, NaN if unknown
+
+
+class Rollup(NamedTuple):
+    start: float  # Bucket start timestamp
+    count: int
+    up_count: int  # Up and degraded samples
+    min: float
+    avg: float
+    p95: float
+
+    @property
+    def availability(self) -> float:
+        return self.up_count * 100 / self.count if self.count else 0.0
+
+
+class RollupBucket:
+    """Open minute or hour bucket, values are kept until bucket is closed"""
+
+    def __init__(self, start: float) -> None:
+        self.start = start
+        self.statuses: list[int] = []
+        self.values: list[float] = []
+
+    def add(self, sample: Sample) -> None:
+        self.statuses.append(sample.status)
+        if not math.isnan(sample.value):
+            self.values.append(sample.value)
+
+    def rollup(self) -> Rollup:
+        up_count = sum(status != DOWN for status in self.statuses)
+        if not self.values:
+            return Rollup(self.start, len(self.statuses), up_count, math.nan, math.nan, math.nan)
+
+        return Rollup(self.start, len(self.statuses), up_count, min(self.values),
+                      sum(self.values) / len(self.values), percentile(self.values, 95))
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """Nearest rank percentile"""
+
+    values = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(values)))
+
+    return values[rank - 1]
+
+
+class TargetSeries:
+    """Samples and rollups of one target: ring buffer in memory and fixed-width files on disk
+
+    Records are not written by add - they wait in pending until store flushes them
+    """
+
+    SAMPLE = struct.Struct('<dBf')  # timestamp, status, value
+    ROLLUP = struct.Struct('<dIIfff')  # start, count, up count, min, avg, p95
+    RESOLUTIONS = {'1m': 60, '1h': 3600}
+
+    def __init__(self, target: str, directory: Path, buffer_size: int) -> None:
+        self.target = target
+
+        # File name is readable part of target and hash - targets can have any symbols
+        name = re.sub(r'[^\w.-]', '_', target)[:64] + '-' + sha1(target.encode('utf-8')).hexdigest()[:8]
+        self.samples_path = directory / f"{name}.bin"
+        self.rollup_paths = {resolution: directory / f"{name}.{resolution}.bin"
+                             for resolution in self.RESOLUTIONS}
+
+        self.recent: deque[Sample] = deque(maxlen=buffer_size)
+        self.buckets: dict[str, RollupBucket | None] = dict.fromkeys(self.RESOLUTIONS)
+        self.pending: dict[Path, bytearray] = dict()  # Packed records waiting for flush by file
+
+    def add(self, sample: Sample) -> None:
+        """Append sample to ring buffer, samples file and open rollup buckets"""
+
+        self.recent.append(sample)
+        self.pending.setdefault(self.samples_path, bytearray()).extend(self.SAMPLE.pack(*sample))
+
+        for resolution, seconds in self.RESOLUTIONS.items():
+            bucket_start = sample.timestamp // seconds * seconds
+            bucket = self.buckets[resolution]
+
+            # Sample from next period - close bucket and save its rollup
+            if bucket is not None and bucket.start != bucket_start:
+                self.pending.setdefault(self.rollup_paths[resolution], bytearray()).extend(
+                    self.ROLLUP.pack(*bucket.rollup()))
+                bucket = None
+
+            if bucket is None:
+                bucket = self.buckets[resolution] = RollupBucket(bucket_start)
+            bucket.add(sample)
+
+    def samples(self, since: float, until: float) -> list[Sample]:
+        """Get samples in period, from ring buffer if it covers the period"""
+
+        if self.recent and self.recent[0].timestamp <= since:
+            return [sample for sample in self.recent if since <= sample.timestamp <= until]
+
+        return [Sample(*record) for record in
+                self.__read_range(self.samples_path, self.SAMPLE, since, until)]
+
+    def rollups(self, resolution: str, since: float, until: float) -> list[Rollup]:
+        """Get closed rollups from file and open rollup from memory"""
+
+        rollups = [Rollup(*record) for record in
+                   self.__read_range(self.rollup_paths[resolution], self.ROLLUP, since, until)]
+
+        bucket = self.buckets[resolution]
+        if bucket is not None and since <= bucket.start <= until:
+            rollups.append(bucket.rollup())
+
+        return rollups
+
+    @staticmethod
+    def __read_range(path: Path, record: struct.Struct, since: float, until: float) -> list[tuple]:
+        """Binary search of first record by timestamp, read only records of the period"""
+
+        try:
+            data_file = open(path, mode='rb')
+        except FileNotFoundError:
+            return []
+
+        with data_file:
+            count = data_file.seek(0, 2) // record.size
+
+            def timestamp(index: int) -> float:
+                data_file.seek(index * record.size)
+                return struct.unpack('<d', data_file.read(8))[0]
+
+            low, high = 0, count
+            while low < high:
+                middle = (low + high) // 2
+                if timestamp(middle) < since:
+                    low = middle + 1
+                else:
+                    high = middle
+
+            records = []
+            data_file.seek(low * record.size)
+            while (data := data_file.read(record.size)) and len(data) == record.size:
+                values = record.unpack(data)
+                if values[0] > until:
+                    break
+                records.append(values)
+
+        return records
+
+
+class ResultStore:
+    """Embedded time series store for check results
+
+    Targets are keyed by kind, like 'server:host' and 'agent:host' - server and
+    agent on the same host have different series. record only keeps sample in
+    memory, background thread appends records of all targets to disk every
+    flush_interval seconds, so checkers and agent server loop never wait for disk
+    """
+
+    def __init__(self, directory: str = 'history', buffer_size: int = 1024,
+                 flush_interval: float = 5.0) -> None:
+        self.directory = Path(directory)
+        self.buffer_size = buffer_size  # Recent samples kept in memory for every target
+        self.flush_interval = flush_interval  # Max seconds records wait in memory
+        self.__series: dict[str, TargetSeries] = dict()
+        self.__lock = Lock()
+        self.__flush_lock = Lock()  # One flush at a time, records do not wait for it
+        self.__flusher: Thread | None = None  # Started by the first record
+        self.__stop = Event()
+
+    def record(self, target: str, status: int, value: float | None = None,
+               timestamp: float | None = None) -> None:
+        """Save check result of target"""
+
+        sample = Sample(time() if timestamp is None else timestamp, status,
+                        math.nan if value is None else value)
+
+        with self.__lock:
+            self.__get_series(target).add(sample)
+
+            if self.__flusher is None:
+                self.__flusher = Thread(target=self.__flush_loop, name='store_flusher', daemon=True)
+                self.__flusher.start()
+                atexit.register(self.close)  # Write records which wait in memory before program exit
+
+    def samples(self, target: str, since: float, until: float | None = None) -> list[Sample]:
+        series = self.__flush_series(target)
+
+        with self.__lock:
+            return series.samples(since, until or time())
+
+    def rollups(self, target: str, resolution: str, since: float,
+                until: float | None = None) -> list[Rollup]:
+        """Get per minute ('1m') or per hour ('1h') rollups"""
+
+        series = self.__flush_series(target)
+
+        with self.__lock:
+            return series.rollups(resolution, since, until or time())
+
+    def summary(self, target: str, since: float, until: float | None = None) -> Rollup:
+        """Availability, min, avg and p95 of target for period"""
+
+        samples = self.samples(target, since, until)
+        bucket = RollupBucket(since)
+        for sample in samples:
+            bucket.add(sample)
+
+        return bucket.rollup()
+
+    def targets(self) -> list[str]:
+        """Targets recorded since program start"""
+
+        with self.__lock:
+            return list(self.__series)
+
+    def flush(self) -> None:
+        """Write records of all targets which wait in memory"""
+
+        with self.__lock:
+            all_series = list(self.__series.values())
+
+        self.__flush(all_series)
+
+    def close(self) -> None:
+        """Stop background flushes and write the last records"""
+
+        self.__stop.set()
+        self.flush()
+
+    def __flush_loop(self) -> None:
+        while not self.__stop.wait(self.flush_interval):
+            self.flush()
+
+    def __flush_series(self, target: str) -> TargetSeries:
+        """Flush one target before reading its files"""
+
+        with self.__lock:  # Target of previous program run has only files
+            series = self.__series.get(target) or TargetSeries(target, self.directory, self.buffer_size)
+
+        self.__flush([series])
+
+        return series
+
+    def __flush(self, all_series: list[TargetSeries]) -> None:
+        """Append pending records to files, disk errors lose the batch but never reach checkers"""
+
+        with self.__flush_lock:
+            with self.__lock:
+                batch = [(path, data) for series in all_series for path, data in series.pending.items()]
+                for series in all_series:
+                    series.pending = dict()
+
+            if not batch:
+                return
+
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                for path, data in batch:
+                    with open(path, mode='ab') as data_file:
+                        data_file.write(data)
+
+            except OSError as error:
+                logger.log.error(f"Check results were not saved to {self.directory} - {error}")
+
+    def __get_series(self, target: str) -> TargetSeries:
+        series = self.__series.get(target)
+
+        if series is None:
+            series = self.__series[target] = TargetSeries(target, self.directory, self.buffer_size)
+
+        return series
+
+
+result_store = ResultStore()
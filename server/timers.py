@@ -0,0 +1,60 @@
+from collections.abc import Hashable
+from time import monotonic
+from math import ceil
+
+
+class TimerWheel:
+    """Hashed timer wheel - deadlines of thousands of agents in fixed slots
+
+    Timer is put to slot of its deadline tick, deadlines further than one
+    wheel turn stay in slot for more turns. Every tick checks only one slot,
+    so schedule, cancel and tick do not depend on timers count. Wheel is not
+    thread safe, it is used by agent server event loop only
+    """
+
+    def __init__(self, tick: float = 1.0, size: int = 512) -> None:
+        self.tick = tick  # Seconds, deadlines are rounded up to tick
+        self.size = size
+        self.__slots: list[dict[Hashable, int]] = [dict() for _ in range(size)]  # Key: deadline tick
+        self.__timers: dict[Hashable, int] = dict()
+        self.__started = monotonic()
+        self.__current = 0  # Last checked tick
+
+    def __len__(self) -> int:
+        return len(self.__timers)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.__timers
+
+    def schedule(self, key: Hashable, deadline: float) -> None:
+        """Set timer to monotonic deadline, previous timer of key is replaced"""
+
+        self.cancel(key)
+
+        tick = max(self.__current + 1, ceil((deadline - self.__started) / self.tick))
+        self.__slots[tick % self.size][key] = tick
+        self.__timers[key] = tick
+
+    def cancel(self, key: Hashable) -> None:
+        tick = self.__timers.pop(key, None)
+        if tick is not None:
+            del self.__slots[tick % self.size][key]
+
+    def advance(self, now: float | None = None) -> list[Hashable]:
+        """Check slots of ticks passed since last call, expired keys are returned"""
+
+        now = monotonic() if now is None else now
+        last_tick = int((now - self.__started) / self.tick)
+        expired = []
+
+        # Long pause is not longer than one turn - every slot is checked once
+        while self.__current < last_tick:
+            self.__current = max(self.__current + 1, last_tick - self.size + 1)
+            slot = self.__slots[self.__current % self.size]
+
+            for key in [key for key, tick in slot.items() if tick <= self.__current]:
+                del slot[key]
+                del self.__timers[key]
+                expired.append(key)
+
+        return expired
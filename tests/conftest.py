@@ -0,0 +1,17 @@
+"""Tests import server and client modules from their directories like consoles do
+
+protocol, executor and metrics are the same in both directories, server copies
+are imported (test_shared checks that copies are equal)
+"""
+
+from pathlib import Path
+import tempfile
+import sys
+import os
+
+ROOT_DIRECTORY = Path(__file__).resolve().parent.parent
+
+sys.path[:0] = [str(ROOT_DIRECTORY / 'server'), str(ROOT_DIRECTORY / 'client')]
+
+# Server logger writes logs.log to current directory on import
+os.chdir(tempfile.mkdtemp(prefix='monitor_tests_'))
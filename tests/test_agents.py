@@ -0,0 +1,49 @@
+from threading import Event, current_thread
+import socket
+import time
+
+import pytest
+
+from agents import AgentServer
+import protocol
+
+
+def free_port() -> int:
+    with socket.socket() as free_socket:
+        free_socket.bind(('127.0.0.1', 0))
+        return free_socket.getsockname()[1]
+
+
+@pytest.fixture
+def agent_server():
+    agent_server = AgentServer('127.0.0.1', free_port(), poll_deadline=0.5,
+                               heartbeat_interval=0.1, heartbeat_misses=3, lost_expiry=1)
+    agent_server.start()
+
+    yield agent_server
+
+    agent_server.stop()
+
+
+def test_silent_agent_is_lost_and_expires(agent_server):
+    lost, lost_event = [], Event()
+
+    def on_lost(hostname: str, silence: float) -> None:
+        lost.append((hostname, silence, current_thread().name))
+        lost_event.set()
+
+    agent_server.on_lost = on_lost
+
+    with socket.create_connection(('127.0.0.1', agent_server.port)) as agent:
+        # Agent sends heartbeat once and then hangs without closing connection
+        agent.sendall(protocol.encode_frame(protocol.HELLO, 0, 'lyrix-host') +
+                      protocol.encode_frame(protocol.HEARTBEAT, 0, 0.1))
+
+        assert lost_event.wait(5)
+        hostname, silence, thread_name = lost[0]
+        assert hostname == 'lyrix-host' and silence >= 0.3
+        assert thread_name != 'agent_server'  # Callback does not block event loop
+        assert agent_server.poll_all() == {'lyrix-host': None}
+
+        time.sleep(1)  # Lost agent is forgotten after lost_expiry
+        assert agent_server.poll_all() == dict()
@@ -0,0 +1,58 @@
+import pytest
+
+from protocol import diff_statuses, apply_delta, encode_frame, FrameDecoder, PUSH
+
+
+BASE = {
+    'Lyrix services': {'Collector': ['up', 1200], 'Parser': ['up', 1300], 'Loader': ['down', None]},
+    'Ostel services': "Ostel services don't exist",
+    'Lyrix logs': {'Collector': 3},
+}
+
+
+@pytest.mark.parametrize('current', [
+    BASE,  # Nothing changed
+    {**BASE, 'Lyrix services': {'Collector': ['down', None], 'Parser': ['up', 1300], 'Loader': ['down', None]}},
+    {**BASE, 'Lyrix services': {'Collector': ['up', 1200], 'Checker': ['up', 1400]}},  # Added and removed
+    {**BASE, 'Ostel services': {'Gateway': ['up', 900]}},  # Message is replaced by dict
+    {**BASE, 'Lyrix services': "Lyrix services don't exist"},  # Dict is replaced by message
+    {'Lyrix services': BASE['Lyrix services']},  # Sections are not removed
+])
+def test_delta_round_trip(current):
+    delta = diff_statuses(BASE, current)
+
+    assert apply_delta(BASE, delta) == {**BASE, **current}
+
+
+def test_unchanged_statuses_have_empty_delta():
+    assert diff_statuses(BASE, BASE) == dict()
+
+
+def test_delta_has_only_changes():
+    current = {**BASE, 'Lyrix services': {'Collector': ['down', None], 'Parser': ['up', 1300]}}
+
+    delta = diff_statuses(BASE, current)
+
+    assert delta == {'Lyrix services': {'changed': {'Collector': ['down', None]}, 'removed': ['Loader']}}
+
+
+def test_full_statuses_from_empty_base():
+    assert apply_delta(dict(), diff_statuses(dict(), BASE)) == BASE
+
+
+def test_apply_delta_keeps_previous_state():
+    previous = {'Lyrix services': {'Collector': ['up', 1200]}}
+
+    apply_delta(previous, {'Lyrix services': {'changed': {'Parser': ['up', 1]}, 'removed': ['Collector']}})
+
+    assert previous == {'Lyrix services': {'Collector': ['up', 1200]}}
+
+
+@pytest.mark.parametrize('binary', [False, True])
+def test_delta_survives_push_frame(binary):
+    current = {**BASE, 'Lyrix logs': {'Collector': 4, 'Parser': 1}}
+    push = {'sequence': 2, 'base': 1, 'delta': diff_statuses(BASE, current)}
+
+    frame, = FrameDecoder().feed(encode_frame(PUSH, 2, push, binary=binary))
+
+    assert apply_delta(BASE, frame.body['delta']) == current
@@ -0,0 +1,132 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Thread
+import socket
+import time
+
+import pytest
+
+from api_check.engine import HTTPEngine, HTTPResult, ReadTimeout
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Local api stand-in, every request path is one server behaviour"""
+
+    protocol_version = 'HTTP/1.1'  # Keep-alive like real api servers
+
+    def do_GET(self) -> None:
+        self.server.connections.add(self.client_address)
+
+        match self.path.split('?')[0]:
+            case '/ok':
+                self.__send(200, b'ok')
+            case '/redirect':
+                self.send_response(302)
+                self.send_header('Location', '/ok')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+            case '/chunked':
+                self.send_response(200)
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                for chunk in (b'first', b'second chunk'):
+                    self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+                self.wfile.write(b'0\r\n\r\n')
+            case '/slow':
+                time.sleep(1)
+                self.__send(200, b'late')
+            case _:
+                self.__send(404, b'missing', 'Not Found')
+
+    def __send(self, status: int, body: bytes, reason: str | None = None) -> None:
+        self.send_response(status, reason)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 64  # Default backlog 5 drops parallel connects
+
+
+@pytest.fixture
+def stand_in():
+    server = StandInServer(('127.0.0.1', 0), StandInHandler)
+    server.connections = set()  # Client addresses - one address is one TCP connection
+    Thread(target=server.serve_forever, daemon=True).start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def engine():
+    engine = HTTPEngine(connect_timeout=1, read_timeout=0.3)
+
+    yield engine
+
+    engine.close()
+
+
+def url(server: StandInServer, path: str) -> str:
+    return f"http://127.0.0.1:{server.server_port}{path}"
+
+
+def test_keep_alive(stand_in, engine):
+    for _ in range(3):
+        result = engine.run([url(stand_in, '/ok')])[url(stand_in, '/ok')]
+        assert isinstance(result, HTTPResult) and result.status == 200
+
+    assert len(stand_in.connections) == 1
+
+
+def test_read_timeout(stand_in, engine):
+    result = engine.run([url(stand_in, '/slow')])[url(stand_in, '/slow')]
+
+    assert isinstance(result, ReadTimeout)
+
+
+def test_redirect(stand_in, engine):
+    result = engine.run([url(stand_in, '/redirect')])[url(stand_in, '/redirect')]
+
+    assert result.status == 200
+    assert result.url == url(stand_in, '/ok')
+
+
+def test_chunked_body_is_drained(stand_in, engine):
+    results = engine.run([url(stand_in, '/chunked')])
+    results.update(engine.run([url(stand_in, '/ok')]))
+
+    assert [result.status for result in results.values()] == [200, 200]
+    assert len(stand_in.connections) == 1  # Connection is reused after chunked body
+
+
+def test_client_error(stand_in, engine):
+    result = engine.run([url(stand_in, '/missing')])[url(stand_in, '/missing')]
+
+    assert (result.status, result.reason) == (404, 'Not Found')
+
+
+def test_errors_are_results(engine):
+    with socket.socket() as closed_socket:  # Free port without listener
+        closed_socket.bind(('127.0.0.1', 0))
+        refused_url = f"http://127.0.0.1:{closed_socket.getsockname()[1]}/"
+
+    results = engine.run([refused_url, 'ftp://example.com/'])
+
+    assert isinstance(results[refused_url], ConnectionRefusedError)
+    assert isinstance(results['ftp://example.com/'], ValueError)
+
+
+def test_parallel_urls(stand_in, engine):
+    urls = [url(stand_in, f'/ok?number={number}') for number in range(20)]
+
+    results = engine.run(urls)
+
+    assert list(results) == urls  # Results are in urls order
+    assert all(result.status == 200 for result in results.values())
@@ -0,0 +1,82 @@
+from threading import Event, Thread
+from time import monotonic
+
+import pytest
+
+from executor import CheckerExecutor, CheckerTimeout, CheckerCancelled
+
+
+@pytest.fixture
+def release():
+    release = Event()  # Blocking checks end when test ends
+
+    yield release
+
+    release.set()
+
+
+@pytest.fixture
+def executor():
+    executor = CheckerExecutor(max_workers=4, deadline=5)
+
+    yield executor
+
+    executor.shutdown()
+
+
+def test_results_as_checkers_finish(executor, release):
+    executor.register('fast', lambda: 'fast result')
+    executor.register('failed', lambda: 1 / 0)
+    executor.register('hung', release.wait, deadline=0.3)
+
+    started = monotonic()
+    results = list(executor.run())
+
+    assert [name for name, _ in results][-1] == 'hung'  # Finished checkers do not wait for hung one
+    results = dict(results)
+    assert results['fast'] == 'fast result'
+    assert isinstance(results['failed'], ZeroDivisionError)
+    assert isinstance(results['hung'], CheckerTimeout)
+    assert monotonic() - started < 1  # Result comes back in deadline, check goes on in background
+
+
+def test_hung_checker_is_skipped(executor, release):
+    calls = []
+    executor.register('hung', lambda: calls.append(1) or release.wait(), deadline=0.2)
+
+    list(executor.run())
+    name, result = next(executor.run())
+
+    assert name == 'hung' and isinstance(result, CheckerTimeout)
+    assert 'still running' in str(result)
+    assert len(calls) == 1  # Second check is not stacked on top of hung one
+
+
+def test_cancelled_checker_is_not_reported(executor, release):
+    started = Event()
+    executor.register('blocking', lambda: started.set() or release.wait() and 'late result')
+    reported, results = [], []
+
+    def run() -> None:  # Loop of monitor - only results which are not exceptions are reported
+        for name, result in executor.run():
+            results.append((name, result))
+            if not isinstance(result, Exception):
+                reported.append((name, result))
+
+    run_thread = Thread(target=run)
+    run_thread.start()
+    assert started.wait(5)
+
+    executor.cancel()
+    run_thread.join(5)
+    release.set()
+
+    assert not run_thread.is_alive()
+    assert len(results) == 1 and isinstance(results[0][1], CheckerCancelled)
+    assert reported == []
+
+
+def test_run_with_arguments(executor):
+    executor.register('double', lambda number: number * 2)
+
+    assert list(executor.run({'double': (21,), 'unknown': ()})) == [('double', 42)]
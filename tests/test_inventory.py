@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from inventory import Inventory
+
+
+def parse_line(line: str) -> tuple[str, str]:
+    target, description = line.strip().split(' - ')
+    return target, description
+
+
+@pytest.fixture
+def servers_file(tmp_path):
+    path = tmp_path / 'servers.txt'
+    path.write_text('10.0.0.1 - Lyrix db\n10.0.0.2 - Lyrix app\n\n10.0.0.3 - Ostel app\n', encoding='utf-8')
+    return path
+
+
+def rewrite(path, text: str) -> None:
+    path.write_text(text, encoding='utf-8')
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))  # Coarse mtime filesystems
+
+
+def test_targets_in_file_order(servers_file):
+    inventory = Inventory(str(servers_file), parse_line)
+
+    assert list(inventory.targets.items()) == [
+        ('10.0.0.1', 'Lyrix db'), ('10.0.0.2', 'Lyrix app'), ('10.0.0.3', 'Ostel app')]
+
+
+def test_unchanged_file_is_not_read(servers_file):
+    inventory = Inventory(str(servers_file), parse_line)
+    targets = inventory.targets
+
+    assert inventory.reload() is None
+    assert inventory.targets is targets
+
+
+def test_reload_diff(servers_file):
+    inventory = Inventory(str(servers_file), parse_line)
+    old_targets = dict(inventory.targets)
+    old_dict = inventory.targets
+
+    rewrite(servers_file, '10.0.0.1 - Lyrix db\n10.0.0.2 - Lyrix api\n10.0.0.4 - Ostel db\n')
+    diff = inventory.reload()
+
+    assert diff.added == {'10.0.0.4': 'Ostel db'}
+    assert diff.removed == {'10.0.0.3': 'Ostel app'}
+    assert diff.changed == {'10.0.0.2': ('Lyrix app', 'Lyrix api')}
+    assert old_dict == old_targets  # Readers of the old dict are not disturbed
+    assert list(inventory.targets) == ['10.0.0.1', '10.0.0.2', '10.0.0.4']
+
+
+def test_touched_file_has_empty_diff(servers_file):
+    inventory = Inventory(str(servers_file), parse_line)
+    inventory.targets
+
+    rewrite(servers_file, servers_file.read_text(encoding='utf-8'))
+
+    assert inventory.reload().is_empty
+
+
+def test_broken_file_keeps_old_targets(servers_file):
+    inventory = Inventory(str(servers_file), parse_line)
+    targets = inventory.targets
+
+    rewrite(servers_file, '10.0.0.1 - Lyrix db\nbroken line\n')
+
+    with pytest.raises(ValueError, match='line 2'):
+        inventory.reload()
+    assert inventory.targets is targets
+
+
+def test_missing_file_is_added_when_it_appears(tmp_path):
+    servers_file = tmp_path / 'servers.txt'
+    inventory = Inventory(str(servers_file), parse_line)
+
+    with pytest.raises(FileNotFoundError):
+        inventory.targets
+    with pytest.raises(FileNotFoundError):
+        inventory.reload()
+
+    servers_file.write_text('10.0.0.1 - Lyrix db\n', encoding='utf-8')
+    diff = inventory.reload()
+
+    assert diff.added == {'10.0.0.1': 'Lyrix db'} and not diff.removed and not diff.changed
+    assert inventory.targets == {'10.0.0.1': 'Lyrix db'}
+    assert inventory.reload() is None
@@ -0,0 +1,51 @@
+import pytest
+
+from logExtractor import LogExtractor
+from servicesChecker import TIME_FIELD, PID_FIELD, ERRORS_FIELD
+
+
+LOG = (b'2024-01-01 10:00:00 Service started PID 100\n'
+       b'2024-01-01 10:00:05 ERROR connection lost\n'
+       b'    stack line without time\n'
+       b'2024-01-01 10:01:00 Service restarted PID 200\n'
+       b'2024-01-01 10:01:30 ERRORS are not errors, ERROR is\n')
+
+
+@pytest.mark.parametrize('window', [1, 16, 16 * 1024])
+def test_fields(window):
+    extractor = LogExtractor([TIME_FIELD, PID_FIELD, ERRORS_FIELD], window)
+
+    assert extractor.extract(LOG) == {'last_time': '2024-01-01 10:01:30', 'pid': '200', 'errors': 2}
+
+
+def test_missing_fields():
+    extractor = LogExtractor([TIME_FIELD, PID_FIELD, ERRORS_FIELD])
+
+    assert extractor.extract(b'no fields here\n') == {'last_time': None, 'pid': None, 'errors': 0}
+    assert extractor.extract(b'') == extractor.empty()
+
+
+def test_chunks_update_values():
+    extractor = LogExtractor([TIME_FIELD, PID_FIELD, ERRORS_FIELD])
+    first, second = LOG[:LOG.index(b'    stack')], LOG[LOG.index(b'    stack'):]
+
+    values = extractor.extract(first)
+    values = extractor.extract(second, values)
+
+    assert values == extractor.extract(LOG)
+
+
+def test_last_value_is_kept_when_chunk_has_none():
+    extractor = LogExtractor([PID_FIELD])
+
+    values = extractor.extract(b'PID 100\n')
+    values = extractor.extract(b'no pid\n', values)
+
+    assert values == {'pid': '100'}
+
+
+def test_time_only_at_line_start():
+    extractor = LogExtractor([TIME_FIELD])
+
+    assert extractor.extract(b'2024-01-01 10:00:00 ok\nrestored from 2023-12-31 23:59:59\n') == {
+        'last_time': '2024-01-01 10:00:00'}
@@ -0,0 +1,41 @@
+import pytest
+
+from logReader import reverse_blocks
+
+
+def write_log(tmp_path, data: bytes):
+    log_path = tmp_path / 'service.log'
+    log_path.write_bytes(data)
+    return log_path
+
+
+LINES = b''.join(b'2024-01-01 10:00:%02d PID %d line %s\n' % (number % 60, number, b'x' * (number % 37))
+                 for number in range(500))
+
+
+@pytest.mark.parametrize('use_mmap', [False, True])
+@pytest.mark.parametrize('block_size', [1, 16, 100, 64 * 1024])
+@pytest.mark.parametrize('data', [LINES, LINES + b'partial last line', b'\n\n\n', b'one line'])
+def test_blocks_are_lines_in_reverse(tmp_path, use_mmap, block_size, data):
+    log_path = write_log(tmp_path, data)
+
+    blocks = list(reverse_blocks(log_path, block_size, use_mmap=use_mmap))
+
+    assert b''.join(reversed(blocks)) == data
+    assert all(block.endswith(b'\n') for block in blocks[1:])  # Lines are not split between blocks
+
+
+@pytest.mark.parametrize('use_mmap', [False, True])
+def test_empty_log(tmp_path, use_mmap):
+    assert list(reverse_blocks(write_log(tmp_path, b''), use_mmap=use_mmap)) == []
+
+
+@pytest.mark.parametrize('use_mmap', [False, True])
+def test_tail_is_read_without_whole_file(tmp_path, use_mmap):
+    log_path = write_log(tmp_path, LINES)
+    read_sizes = []
+
+    last_block = next(reverse_blocks(log_path, 256, use_mmap=use_mmap, on_read=read_sizes.append))
+
+    assert LINES.endswith(last_block)
+    assert sum(read_sizes) < len(LINES) // 10
@@ -0,0 +1,24 @@
+from threading import Event
+import sys
+
+from logWatcher import LogWatcher
+
+
+def test_polling_reports_start_state(tmp_path, monkeypatch):
+    reported, first_report = [], Event()
+
+    def on_change(directory, names):
+        reported.append((directory, names))
+        first_report.set()
+
+    watcher = LogWatcher([tmp_path], on_change, poll_interval=0.1, resync_interval=60)
+    with monkeypatch.context() as patch:
+        patch.setattr(sys, 'platform', 'darwin')  # Systems without inotify and ReadDirectoryChangesW
+        watcher.start()
+
+    try:
+        assert first_report.wait(5)
+        assert watcher.method == 'polling'
+        assert reported[0] == (tmp_path, None)
+    finally:
+        watcher.stop()
@@ -0,0 +1,94 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Lock
+import time
+
+import pytest
+
+from servicesChecker import services_checker
+import client
+
+
+class StubChecker:
+    """Lyrix checker which blocks until release and counts checks"""
+
+    def __init__(self) -> None:
+        self.checks = 0
+        self.error: Exception | None = None
+        self.started, self.release = Event(), Event()
+        self.__lock = Lock()
+
+    def __call__(self) -> dict:
+        with self.__lock:
+            self.checks += 1
+        self.started.set()
+        self.release.wait(5)
+
+        if self.error is not None:
+            raise self.error
+        return {'Collector': ('Up', '2024-01-01 10:00:00')}
+
+
+@pytest.fixture
+def stub_checker(monkeypatch):
+    stub_checker = StubChecker()
+    monkeypatch.setattr(services_checker, 'get_lyrixServices_status', stub_checker)
+    monkeypatch.setattr(services_checker, 'get_ostelServices_status', lambda: 'Ostel services does not exist')
+
+    yield stub_checker
+
+    stub_checker.release.set()
+
+
+def get_concurrently(model: client.Model, stub_checker: StubChecker, callers: int = 5) -> list:
+    """Callers wait while the first check is blocked, then check is released"""
+
+    with ThreadPoolExecutor(callers) as pool:
+        futures = [pool.submit(model.get_servicesStatuses)]
+        assert stub_checker.started.wait(5)
+        futures += [pool.submit(model.get_servicesStatuses) for _ in range(callers - 1)]
+        time.sleep(0.2)  # Other callers join the check in progress
+        stub_checker.release.set()
+
+        return [future.exception(5) or future.result() for future in futures]
+
+
+def test_concurrent_callers_share_one_check(stub_checker):
+    model = client.Model(cache_ttl=60)
+
+    results = get_concurrently(model, stub_checker)
+
+    assert stub_checker.checks == 1
+    assert all(result == results[0] for result in results)
+    assert results[0] == ({'Collector': ('Up', '2024-01-01 10:00:00')}, 'Ostel services does not exist')
+
+
+def test_check_error_reaches_every_caller(stub_checker):
+    model = client.Model(cache_ttl=60)
+    stub_checker.error = OSError('Lyrix logs are not readable')
+
+    results = get_concurrently(model, stub_checker)
+
+    assert stub_checker.checks == 1
+    assert all(result is stub_checker.error for result in results)
+
+
+def test_statuses_are_cached_until_ttl(stub_checker):
+    stub_checker.release.set()
+    model = client.Model(cache_ttl=60)
+
+    model.get_servicesStatuses()
+    model.get_servicesStatuses()
+    assert stub_checker.checks == 1
+
+    model.get_servicesStatuses(force=True)  # Force bypasses cached statuses
+    assert stub_checker.checks == 2
+
+
+def test_expired_cache_is_checked_again(stub_checker):
+    stub_checker.release.set()
+    model = client.Model(cache_ttl=0)
+
+    model.get_servicesStatuses()
+    model.get_servicesStatuses()
+
+    assert stub_checker.checks == 2
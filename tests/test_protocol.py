@@ -0,0 +1,73 @@
+import zlib
+
+import pytest
+
+from protocol import (encode_frame, decode_body, FrameDecoder, ProtocolError, BinaryCodec, HEADER,
+                      RESPONSE, PUSH, COMPRESSED, BINARY, COMPRESS_THRESHOLD)
+
+
+@pytest.mark.parametrize('binary', [False, True])
+@pytest.mark.parametrize('body', [
+    'hostname',
+    {'numbers': [0, 1, -1, 2 ** 40, -2 ** 40], 'float': 0.25, 'flags': [True, False, None]},
+    {f'service_{number}': ['up', number, 'x' * 50] for number in range(100)},  # Compressed
+])
+def test_frame_round_trip(binary, body):
+    frame_bytes = encode_frame(RESPONSE, 7, body, binary=binary)
+
+    frame, = FrameDecoder().feed(frame_bytes)
+
+    assert (frame.type, frame.request_id) == (RESPONSE, 7)
+    assert bool(frame.flags & BINARY) == binary
+    assert frame.body == body
+
+
+def test_large_body_is_compressed():
+    body = 'x' * COMPRESS_THRESHOLD * 4
+
+    frame_bytes = encode_frame(RESPONSE, 1, body)
+
+    assert HEADER.unpack_from(frame_bytes)[2] & COMPRESSED
+    assert len(frame_bytes) < len(body)
+
+
+def test_split_and_merged_feeds():
+    frames_bytes = b''.join(encode_frame(PUSH, number, {'number': number}) for number in range(3))
+    decoder = FrameDecoder()
+
+    frames = []
+    for position in range(0, len(frames_bytes), 5):  # Frames come in small TCP pieces
+        frames += decoder.feed(frames_bytes[position:position + 5])
+
+    assert [frame.body for frame in frames] == [{'number': number} for number in range(3)]
+    assert [frame.body for frame in FrameDecoder().feed(frames_bytes)] == [{'number': number} for number in range(3)]
+
+
+def test_oversize_frame_is_rejected():
+    frame_bytes = encode_frame(RESPONSE, 1, 'x' * 200, compress=False)
+
+    with pytest.raises(ProtocolError):
+        FrameDecoder(max_body_size=100).feed(frame_bytes[:HEADER.size])  # Rejected by header only
+
+
+def test_decompression_bomb_is_rejected():
+    payload = zlib.compress(b'0' * 1_000_000)
+
+    with pytest.raises(ProtocolError):
+        decode_body(COMPRESSED, payload, max_body_size=1000)
+
+
+def test_broken_body_is_protocol_error():
+    with pytest.raises(ProtocolError):
+        decode_body(0, b'{not json')
+    with pytest.raises(ProtocolError):
+        decode_body(BINARY, BinaryCodec.encode('value') + b'\x00')  # Trailing bytes
+
+
+def test_binary_codec_tuple_is_list():
+    assert BinaryCodec.decode(BinaryCodec.encode(('up', 1))) == ['up', 1]
+
+
+def test_binary_codec_rejects_unknown_type():
+    with pytest.raises(TypeError):
+        BinaryCodec.encode({1, 2})
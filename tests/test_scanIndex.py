@@ -0,0 +1,115 @@
+import os
+
+import pytest
+
+from logExtractor import LogExtractor
+from scanIndex import ScanIndex
+from servicesChecker import TIME_FIELD, PID_FIELD, ERRORS_FIELD
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    log_path = tmp_path / 'service.log'
+    log_path.write_bytes(b'2024-01-01 10:00:00 started PID 100\n2024-01-01 10:00:01 ERROR\n')
+    return log_path
+
+
+def append(log_path, data: bytes) -> None:
+    with open(log_path, mode='ab') as log:
+        log.write(data)
+
+
+def test_append_reads_only_new_bytes(log_path):
+    scan_index = ScanIndex(LogExtractor([TIME_FIELD, PID_FIELD, ERRORS_FIELD]))
+    scan_index.scan(log_path)
+    bytes_read = scan_index.bytes_read
+
+    append(log_path, b'2024-01-01 10:00:02 ERROR again\n')
+
+    assert scan_index.scan(log_path) == {'last_time': '2024-01-01 10:00:02', 'pid': '100', 'errors': 2}
+    assert scan_index.bytes_read - bytes_read == len(b'2024-01-01 10:00:02 ERROR again\n')
+
+
+def test_unchanged_log_is_not_read(log_path):
+    scan_index = ScanIndex(LogExtractor([PID_FIELD]))
+    fields = scan_index.scan(log_path)
+    bytes_read = scan_index.bytes_read
+
+    assert scan_index.scan(log_path) == fields
+    assert scan_index.bytes_read == bytes_read
+
+
+def test_partial_line_waits_for_line_end(log_path):
+    scan_index = ScanIndex(LogExtractor([PID_FIELD]))
+    append(log_path, b'2024-01-01 10:00:02 restarted PID 2')
+
+    assert scan_index.scan(log_path) == {'pid': '100'}
+
+    append(log_path, b'00\n')
+    assert scan_index.scan(log_path) == {'pid': '200'}
+
+
+def test_truncated_log_is_scanned_again(log_path):
+    scan_index = ScanIndex(LogExtractor([PID_FIELD, ERRORS_FIELD]))
+    scan_index.scan(log_path)
+
+    log_path.write_bytes(b'PID 300\n')
+
+    assert scan_index.scan(log_path) == {'pid': '300', 'errors': 0}
+
+
+def test_rotated_log_is_scanned_again(log_path):
+    scan_index = ScanIndex(LogExtractor([PID_FIELD, ERRORS_FIELD]))
+    scan_index.scan(log_path)
+
+    # New file of bigger size with other inode on the same path
+    rotated_path = log_path.with_suffix('.new')
+    rotated_path.write_bytes(b'PID 400\n' * 20)
+    os.replace(rotated_path, log_path)
+
+    assert scan_index.scan(log_path) == {'pid': '400', 'errors': 0}
+
+
+def test_new_field_scans_log_again(log_path, tmp_path):
+    index_path = tmp_path / 'index.json'
+    scan_index = ScanIndex(LogExtractor([PID_FIELD]), index_path)
+    scan_index.scan(log_path)
+    scan_index.save()
+
+    next_index = ScanIndex(LogExtractor([PID_FIELD, ERRORS_FIELD]), index_path)
+
+    assert next_index.scan(log_path) == {'pid': '100', 'errors': 1}
+    assert next_index.bytes_read == os.path.getsize(log_path)
+
+
+def test_saved_index_survives_restart(log_path, tmp_path):
+    index_path = tmp_path / 'index.json'
+    scan_index = ScanIndex(LogExtractor([PID_FIELD, ERRORS_FIELD]), index_path)
+    scan_index.scan(log_path)
+    scan_index.save()
+
+    next_index = ScanIndex(LogExtractor([PID_FIELD, ERRORS_FIELD]), index_path)
+
+    assert next_index.scan(log_path) == {'pid': '100', 'errors': 1}
+    assert next_index.bytes_read == 0
+
+
+def test_broken_index_file_is_ignored(log_path, tmp_path):
+    index_path = tmp_path / 'index.json'
+    index_path.write_text('{broken', encoding='utf-8')
+
+    scan_index = ScanIndex(LogExtractor([PID_FIELD]), index_path)
+
+    assert scan_index.scan(log_path) == {'pid': '100'}
+
+
+def test_prune_removes_missing_logs(log_path, tmp_path):
+    index_path = tmp_path / 'index.json'
+    scan_index = ScanIndex(LogExtractor([PID_FIELD]), index_path)
+    scan_index.scan(log_path)
+    scan_index.save()
+
+    scan_index.prune([])
+    scan_index.save()
+
+    assert index_path.read_text(encoding='utf-8') == '{}'
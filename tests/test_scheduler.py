@@ -0,0 +1,85 @@
+from time import monotonic
+
+import pytest
+
+from scheduler import Scheduler
+
+
+SERVER = ('server', '10.0.0.1')
+API = ('api', 'Lyrix api')
+
+
+def delay(scheduler: Scheduler) -> float:
+    return scheduler.next_due() - monotonic()
+
+
+def test_new_target_is_due_immediately():
+    scheduler = Scheduler(interval=60)
+    scheduler.add(SERVER)
+    scheduler.add(SERVER)  # Second add does not duplicate target
+
+    assert scheduler.pop_due() == [SERVER]
+    assert scheduler.pop_due(monotonic() + 1000) == []  # In progress until report
+    assert scheduler.next_due() is None
+
+
+def test_success_is_scheduled_in_interval():
+    scheduler = Scheduler(interval=60, jitter=0.05)
+    scheduler.add(SERVER)
+    scheduler.pop_due()
+
+    scheduler.report(SERVER, True)  # First check spreads targets across the period
+    assert 30 - 1 <= delay(scheduler) <= 90
+
+    scheduler.pop_due(monotonic() + 100)
+    scheduler.report(SERVER, True)
+    assert 60 * 0.95 - 1 <= delay(scheduler) <= 60 * 1.05
+
+
+def test_failure_backoff():
+    scheduler = Scheduler(interval=600, fast_recheck=30, max_backoff=100)
+    scheduler.add(SERVER)
+
+    delays = []
+    for _ in range(4):
+        assert scheduler.pop_due(monotonic() + 1000) == [SERVER]
+        scheduler.report(SERVER, False)
+        delays.append(delay(scheduler))
+
+    assert delays == pytest.approx([30, 60, 100, 100], abs=1)
+
+
+def test_removed_target_is_not_due():
+    scheduler = Scheduler(interval=60)
+    scheduler.add(SERVER)
+    scheduler.add(API)
+    scheduler.remove(SERVER)
+
+    assert scheduler.keys() == [API]
+    assert scheduler.pop_due() == [API]
+
+    scheduler.report(SERVER, True)  # Late report of removed target is ignored
+    assert scheduler.next_due() is None
+
+
+def test_set_interval_reschedules_target():
+    scheduler = Scheduler(interval=600)
+    scheduler.add(SERVER)
+    scheduler.add(API)
+    for key in scheduler.pop_due():
+        scheduler.report(key, True)
+
+    scheduler.set_interval(SERVER, 10)
+    assert delay(scheduler) <= 10
+
+    scheduler.set_interval(None, 20)  # Default interval of targets without own interval
+    due = scheduler.pop_due(monotonic() + 20)
+    assert sorted(due) == sorted([SERVER, API])
+
+
+def test_set_interval_of_not_scheduled_target():
+    scheduler = Scheduler(interval=600)
+
+    scheduler.set_interval(API, 60)  # Target was added to api.txt after the last reload
+
+    assert scheduler.keys() == []
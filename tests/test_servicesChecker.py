@@ -0,0 +1,68 @@
+from datetime import datetime
+import os
+
+import pytest
+
+from servicesChecker import ServicesChecker
+
+
+NOW = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+DEAD_PID = 2 ** 22 + 1  # Above Linux pid_max - never alive
+
+
+def write_log(path, lines: list[str], mtime: float) -> None:
+    path.write_text(''.join(f'{line}\n' for line in lines), encoding='cp866')
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def lyrix_logs(tmp_path):
+    lyrix_logs = tmp_path / 'LyrixLogs'
+    lyrix_logs.mkdir()
+    now = datetime.now().timestamp()
+
+    write_log(lyrix_logs / 'Collector.2024-01-01.log', [f'{NOW} started PID {os.getpid()}'], now - 60)
+    write_log(lyrix_logs / 'Collector.2024-01-02.log', [f'{NOW} no pid in newest log'], now)
+    write_log(lyrix_logs / 'Parser.log', [f'{NOW} started PID {DEAD_PID}'], now)
+    write_log(lyrix_logs / 'kernelDiag.log', [f'{NOW} not a service PID 1'], now)
+
+    return lyrix_logs
+
+
+@pytest.fixture
+def services_checker(lyrix_logs, tmp_path):
+    return ServicesChecker(lyrix_logs, tmp_path / 'OstelLogs', scan_workers=1)
+
+
+def test_services_are_grouped_in_one_pass(services_checker):
+    statuses = services_checker.get_lyrixServices_status()
+
+    assert services_checker.lyrix_services == {'Collector', 'Parser'}
+    assert statuses['Collector'] == ('Up', NOW)  # PID is found in older log, time is from newest log
+    assert statuses['Parser'] == ('Down', NOW)
+
+
+def test_new_service_is_found_after_directory_change(services_checker, lyrix_logs):
+    services_checker.get_lyrixServices_status()
+
+    write_log(lyrix_logs / 'Loader.log', [f'{NOW} no pid yet'], datetime.now().timestamp())
+    stat = os.stat(lyrix_logs)
+    os.utime(lyrix_logs, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))  # Coarse mtime filesystems
+
+    assert services_checker.get_lyrixServices_status()['Loader'] == ('pid not found', NOW)
+
+
+def test_missing_directories(tmp_path):
+    services_checker = ServicesChecker(tmp_path / 'LyrixLogs', tmp_path / 'OstelLogs')
+
+    assert services_checker.get_lyrixServices_status() == 'Lyrix services does not exist on this server'
+    assert services_checker.get_ostelServices_status() == 'Ostel services does not exist on this server'
+
+
+def test_statuses_are_ready_right_after_watch(services_checker):
+    services_checker.watch(poll_interval=0.1)
+
+    try:
+        assert set(services_checker.get_lyrixServices_status()) == {'Collector', 'Parser'}
+    finally:
+        services_checker.unwatch()
@@ -0,0 +1,46 @@
+import sys
+
+import pytest
+
+from servers_check.checker import servers_checker
+from api_check.checker import api_checker
+from inventory import Inventory
+from shards import ShardPool
+
+
+@pytest.fixture
+def shard_pool(tmp_path, monkeypatch):
+    (tmp_path / 'servers.txt').write_text('127.0.0.1:local\n', encoding='utf-8')
+    (tmp_path / 'api.txt').write_text('http://127.0.0.1:1/ closed port\n', encoding='utf-8')
+    monkeypatch.setattr(servers_checker, 'inventory',
+                        Inventory(str(tmp_path / 'servers.txt'), servers_checker.inventory.parse_line))
+    monkeypatch.setattr(api_checker, 'inventory',
+                        Inventory(str(tmp_path / 'api.txt'), api_checker.inventory.parse_line))
+    monkeypatch.setattr(servers_checker, 'durations', dict())
+
+    shard_pool = ShardPool(2, timeout=60)
+    main_module = sys.modules['__main__']
+    shard_pool.start()
+    assert sys.modules['__main__'] is main_module  # Workers are started without main module swap
+
+    yield shard_pool
+
+    shard_pool.stop()
+
+
+def test_results_are_merged(shard_pool):
+    statuses = shard_pool.ping(['127.0.0.1'])
+
+    assert list(statuses) == ['127.0.0.1']
+    assert servers_checker.durations['127.0.0.1'] > 0  # Dashboard and history get duration in shard mode
+
+    statuses = shard_pool.http_request(['http://127.0.0.1:1/'])
+
+    assert statuses['closed port'][0] == 'down'
+
+
+def test_stopped_pool():
+    shard_pool = ShardPool(1)
+
+    with pytest.raises(RuntimeError):
+        shard_pool.ping(['127.0.0.1'])
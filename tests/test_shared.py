@@ -0,0 +1,11 @@
+import pytest
+
+from conftest import ROOT_DIRECTORY
+
+
+@pytest.mark.parametrize('module', ['protocol.py', 'executor.py', 'metrics.py'])
+def test_server_and_client_copies_are_equal(module):
+    server_copy = (ROOT_DIRECTORY / 'server' / module).read_bytes()
+    client_copy = (ROOT_DIRECTORY / 'client' / module).read_bytes()
+
+    assert server_copy == client_copy, f"server/{module} and client/{module} differ, keep both copies equal"
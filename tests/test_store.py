@@ -0,0 +1,106 @@
+import math
+
+import pytest
+
+import store
+from store import ResultStore, DOWN, UP, DEGRADED
+
+
+HOUR = 1_700_000_000 // 3600 * 3600  # Period start aligned to hour
+
+
+@pytest.fixture
+def result_store(tmp_path):
+    result_store = ResultStore(str(tmp_path / 'history'), buffer_size=4, flush_interval=3600)
+
+    yield result_store
+
+    result_store.close()
+
+
+def test_recent_samples(result_store):
+    for second in range(3):
+        result_store.record('server:10.0.0.1', UP, 10 + second, timestamp=HOUR + second)
+
+    samples = result_store.samples('server:10.0.0.1', HOUR + 1, HOUR + 2)
+
+    assert [(sample.timestamp, sample.status, sample.value) for sample in samples] == [
+        (HOUR + 1, UP, 11), (HOUR + 2, UP, 12)]
+
+
+def test_old_samples_are_read_from_disk(result_store):
+    for second in range(10):  # Ring buffer keeps only 4 samples
+        result_store.record('server:10.0.0.1', UP, second, timestamp=HOUR + second)
+
+    samples = result_store.samples('server:10.0.0.1', HOUR + 2, HOUR + 7)
+
+    assert [sample.value for sample in samples] == [2, 3, 4, 5, 6, 7]
+
+
+def test_minute_rollups(result_store):
+    for minute in range(3):
+        for second in range(0, 60, 10):  # 6 samples per minute, one of them is down
+            status = DOWN if second == 50 else UP
+            result_store.record('api:Lyrix api', status, None if status == DOWN else second + minute,
+                                timestamp=HOUR + minute * 60 + second)
+
+    rollups = result_store.rollups('api:Lyrix api', '1m', HOUR, HOUR + 3600)
+
+    assert [rollup.start for rollup in rollups] == [HOUR, HOUR + 60, HOUR + 120]  # Two closed and open one
+    assert [rollup.count for rollup in rollups] == [6, 6, 6]
+    assert rollups[1].availability == pytest.approx(500 / 6)
+    assert (rollups[1].min, rollups[1].avg, rollups[1].p95) == (1, 21, 41)
+
+
+def test_summary(result_store):
+    result_store.record('server:10.0.0.1', UP, 10, timestamp=HOUR)
+    result_store.record('server:10.0.0.1', DEGRADED, 30, timestamp=HOUR + 1)
+    result_store.record('server:10.0.0.1', DOWN, timestamp=HOUR + 2)
+    result_store.record('server:10.0.0.1', DOWN, timestamp=HOUR + 3)
+
+    summary = result_store.summary('server:10.0.0.1', HOUR, HOUR + 3)
+
+    assert (summary.count, summary.availability) == (4, 50)
+    assert (summary.min, summary.avg, summary.p95) == (10, 20, 30)
+
+
+def test_summary_without_values(result_store):
+    result_store.record('server:10.0.0.1', DOWN, timestamp=HOUR)
+
+    summary = result_store.summary('server:10.0.0.1', HOUR, HOUR + 1)
+
+    assert summary.availability == 0 and math.isnan(summary.avg)
+
+
+def test_kinds_have_own_series(result_store):
+    result_store.record('server:host', UP, 1, timestamp=HOUR)
+    result_store.record('agent:host', DOWN, timestamp=HOUR)
+
+    assert result_store.targets() == ['server:host', 'agent:host']
+    assert [sample.status for sample in result_store.samples('agent:host', HOUR, HOUR)] == [DOWN]
+
+
+def test_results_of_previous_run(result_store):
+    for second in range(3):
+        result_store.record('server:10.0.0.1', UP, second, timestamp=HOUR + second)
+    result_store.close()
+
+    next_store = ResultStore(str(result_store.directory))
+
+    assert next_store.targets() == []  # Reads do not register targets
+    assert [sample.value for sample in next_store.samples('server:10.0.0.1', HOUR, HOUR + 2)] == [0, 1, 2]
+    assert next_store.targets() == []
+
+
+def test_disk_error_does_not_reach_checker(tmp_path, monkeypatch):
+    errors = []
+    monkeypatch.setattr(store.logger.log, 'error', errors.append)
+    (tmp_path / 'history').write_text('')  # Store directory is a file
+    broken_store = ResultStore(str(tmp_path / 'history'), flush_interval=3600)
+
+    broken_store.record('server:10.0.0.1', UP, 1, timestamp=HOUR)
+    broken_store.flush()
+    broken_store.close()
+
+    assert len(errors) == 1 and 'were not saved' in errors[0]
+    assert [sample.value for sample in broken_store.samples('server:10.0.0.1', HOUR, HOUR)] == [1]
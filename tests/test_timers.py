@@ -0,0 +1,57 @@
+from time import monotonic
+
+from timers import TimerWheel
+
+
+def test_timer_expires_after_deadline():
+    wheel = TimerWheel(tick=1.0, size=8)
+    started = monotonic()
+    wheel.schedule('agent', started + 3)
+
+    assert wheel.advance(started + 2.5) == []
+    assert wheel.advance(started + 5) == ['agent']  # Deadline is rounded up to tick
+    assert 'agent' not in wheel and len(wheel) == 0
+
+
+def test_deadline_further_than_one_turn():
+    wheel = TimerWheel(tick=1.0, size=8)
+    started = monotonic()
+    wheel.schedule('agent', started + 20)
+
+    assert wheel.advance(started + 10) == []  # Slot of deadline was passed in the first turn
+    assert wheel.advance(started + 22) == ['agent']
+
+
+def test_cancel_and_reschedule():
+    wheel = TimerWheel(tick=1.0, size=8)
+    started = monotonic()
+    wheel.schedule('cancelled', started + 2)
+    wheel.schedule('moved', started + 2)
+    wheel.cancel('cancelled')
+    wheel.cancel('unknown')
+    wheel.schedule('moved', started + 6)  # Heartbeat moves deadline
+
+    assert len(wheel) == 1
+    assert wheel.advance(started + 4) == []
+    assert wheel.advance(started + 8) == ['moved']
+
+
+def test_long_pause_expires_every_timer_once():
+    wheel = TimerWheel(tick=1.0, size=8)
+    started = monotonic()
+    for number in range(30):
+        wheel.schedule(number, started + number)
+
+    expired = wheel.advance(started + 1000)
+
+    assert sorted(expired) == list(range(30))
+    assert wheel.advance(started + 2000) == []
+
+
+def test_past_deadline_expires_on_next_tick():
+    wheel = TimerWheel(tick=1.0, size=8)
+    started = monotonic()
+    wheel.advance(started + 5)
+    wheel.schedule('agent', started)
+
+    assert wheel.advance(started + 7) == ['agent']